@@ -52,8 +52,10 @@ export interface TripCreateData {
   name?: string | null;
   current_location: Location;
   pickup_location: Location;
+  stops?: Location[];
   dropoff_location: Location;
   current_cycle_hours: number;
+  optimize_stops?: boolean;
 }
 
 export interface ActivityCreateData {
@@ -1,5 +1,6 @@
 export type ActivityStatus = 'off_duty' | 'sleeper_berth' | 'driving' | 'on_duty_not_driving';
 export type TripStatus = 'planning' | 'in_progress' | 'completed';
+export type RouteStatus = 'not_calculated' | 'pending' | 'calculating' | 'ready' | 'failed';
 export type DriverRole = 'driver' | 'admin';
 
 export interface Location {
@@ -42,12 +43,14 @@ export interface Trip {
   name?: string | null;
   current_location: Location;
   pickup_location: Location;
+  stops: Location[];
   dropoff_location: Location;
   current_cycle_hours: number;
   total_distance: number;
   estimated_duration: number;
   start_datetime: string | null;
   end_datetime: string | null;
+  route_status: RouteStatus;
   created_at: string;
   updated_at: string;
 }
@@ -94,16 +97,18 @@ export interface Route {
   waypoints: Location[];
   total_distance: number;
   estimated_time: number;
+  estimated_arrival?: string | null;
   stops?: RequiredStop[];
 }
 
 export interface RequiredStop {
   id: number;
-  type: 'fuel' | '30min_break' | '10hr_rest' | 'pickup' | 'dropoff';
+  type: 'fuel' | '30min_break' | '10hr_rest' | '34hr_restart' | 'pickup' | 'dropoff';
   location: Location;
   duration_minutes: number;
   miles_from_start: number;
   reason: string;
+  eta?: string | null;
 }
 
 export interface HOSCompliance {
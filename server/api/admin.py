@@ -1,6 +1,17 @@
 from django.contrib import admin
 
-from .models import Driver, Trip, DailyLog, Activity, Route, RequiredStop
+from .models import (
+    Driver,
+    Trip,
+    DailyLog,
+    Activity,
+    DriverDutyRollup,
+    Route,
+    RequiredStop,
+    RouteJob,
+    RouteCacheEntry,
+    ComputationLock,
+)
 
 
 @admin.register(Driver)
@@ -21,6 +32,12 @@ class DailyLogAdmin(admin.ModelAdmin):
     inlines = [ActivityInline]
 
 
+@admin.register(DriverDutyRollup)
+class DriverDutyRollupAdmin(admin.ModelAdmin):
+    list_display = ('id', 'driver', 'date', 'on_duty_minutes', 'driving_minutes')
+    list_filter = ('date',)
+
+
 class RequiredStopInline(admin.TabularInline):
     model = RequiredStop
     extra = 0
@@ -34,7 +51,24 @@ class RouteAdmin(admin.ModelAdmin):
 
 @admin.register(Trip)
 class TripAdmin(admin.ModelAdmin):
-    list_display = ('id', 'driver', 'status', 'start_datetime', 'end_datetime', 'total_distance')
+    list_display = ('id', 'driver', 'status', 'route_status', 'start_datetime', 'end_datetime', 'total_distance')
+    list_filter = ('status', 'route_status')
+
+
+@admin.register(RouteJob)
+class RouteJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'trip', 'status', 'progress', 'attempts', 'run_after', 'finished_at')
     list_filter = ('status',)
 
 
+@admin.register(RouteCacheEntry)
+class RouteCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'origin', 'destination', 'hit_count', 'last_accessed_at', 'expires_at')
+    search_fields = ('origin', 'destination')
+    readonly_fields = ('key', 'created_at')
+
+
+@admin.register(ComputationLock)
+class ComputationLockAdmin(admin.ModelAdmin):
+    list_display = ('key', 'owner', 'created_at', 'expires_at')
+    search_fields = ('key',)
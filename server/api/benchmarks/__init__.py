@@ -0,0 +1,17 @@
+"""
+Performance benchmarks, run with `manage.py benchmark <suite>`.
+
+Each suite builds its own fixture data inside a transaction that is rolled
+back afterwards, so suites can run against a development database.
+"""
+from . import endpoints, geo, hos, maps, road_graph, simulator, timeline
+
+SUITES = {
+    'endpoints': endpoints.run,
+    'geo': geo.run,
+    'hos': hos.run,
+    'maps': maps.run,
+    'road_graph': road_graph.run,
+    'simulator': simulator.run,
+    'timeline': timeline.run,
+}
@@ -0,0 +1,121 @@
+"""
+Hot API endpoints over a synthetic fleet: wall time and SQL queries per request.
+
+Each request runs in its own rolled-back savepoint, so writes (activity
+cascades, route recalculation) start from the same data every iteration.
+The savepoint never commits, so the transaction.on_commit callbacks that do
+the post-write work (log totals, duty rollups, trip fields, route
+recalculation requests) are run explicitly and counted with the request.
+"""
+import itertools
+import time
+from datetime import time as dtime
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from ..models import DailyLog, Driver, TripStatus
+from .fleet import generate_fleet
+from .utils import rolled_back, summarize
+
+
+def _request(name, client, method, url, iterations, data=None, setup=None):
+    """
+    Time one API request per iteration.
+
+    Args:
+        url: path, or callable(setup result) returning it
+        setup: optional callable run (untimed) in the iteration's savepoint first
+    """
+    timings = []
+    queries = 0
+    for _ in range(iterations):
+        with rolled_back():
+            context = setup() if setup is not None else None
+            path = url(context) if callable(url) else url
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                with TestCase.captureOnCommitCallbacks(execute=True):
+                    response = getattr(client, method)(path, data, format='json')
+                timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise AssertionError(f'{method.upper()} {path}: {response.status_code} {response.content[:200]}')
+            queries = len(ctx.captured_queries)
+    return summarize(name, timings, queries)
+
+
+def run(iterations=20, drivers=5, trips_per_driver=3, **options):
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                           ROUTING_PROVIDERS=['haversine']):
+        return _run(iterations, drivers, trips_per_driver)
+
+
+def _run(iterations, drivers, trips_per_driver):
+    counts = generate_fleet(drivers=drivers, trips_per_driver=trips_per_driver, seed=42, prefix='bench-fleet')
+    driver = Driver.objects.select_related('user').get(user__username=counts['usernames'][0])
+    trip = driver.trips.get(status=TripStatus.IN_PROGRESS)
+    daily_log = trip.daily_logs.order_by('-date').first()
+    activities = list(daily_log.activities.order_by('sequence'))
+    middle = activities[len(activities) // 2]
+
+    client = APIClient()
+    client.force_authenticate(driver.user)
+
+    fleet = (
+        f"{counts['drivers']} drivers, {counts['daily_logs']} logs, "
+        f"{counts['activities']:,} activities"
+    )
+    day = f'{len(activities)} activities'
+
+    # A version no cached compliance result exists for, so hos-status recomputes
+    fresh_versions = itertools.count(10 ** 6)
+
+    def uncached_log():
+        DailyLog.objects.filter(pk=daily_log.pk).update(version=next(fresh_versions))
+
+    def extended_end():
+        end = middle.end_time.hour * 60 + middle.end_time.minute + 15
+        return dtime(end // 60 % 24, end % 60).strftime('%H:%M')
+
+    return [
+        _request(f'GET trips list ({fleet})', client, 'get', '/api/trips/', iterations),
+        _request('GET trip detail', client, 'get', f'/api/trips/{trip.pk}/', iterations),
+        _request(
+            f'GET trip daily-logs ({trip.daily_logs.count()} logs)',
+            client, 'get', f'/api/trips/{trip.pk}/daily-logs/', iterations,
+        ),
+        _request(
+            f'GET daily-log activities + compliance ({day})',
+            client, 'get', f'/api/daily-logs/{daily_log.pk}/activities/', iterations,
+        ),
+        _request(
+            f'POST activity (append, {day})',
+            client, 'post', f'/api/daily-logs/{daily_log.pk}/activities/', iterations,
+            data={'status': 'off_duty', 'start_time': '23:45', 'end_time': '23:59', 'remark': 'Benchmark'},
+        ),
+        _request(
+            f'PATCH activity +15 min (cascade, {day})',
+            client, 'patch', f'/api/daily-logs/{daily_log.pk}/activities/{middle.pk}/', iterations,
+            data={
+                'status': middle.status,
+                'start_time': middle.start_time.strftime('%H:%M'),
+                'end_time': extended_end(),
+            },
+        ),
+        _request(
+            f'DELETE activity (cascade, {day})',
+            client, 'delete', f'/api/daily-logs/{daily_log.pk}/activities/{middle.pk}/', iterations,
+        ),
+        _request(
+            'GET trip hos-status (cold)',
+            client, 'get', f'/api/trips/{trip.pk}/hos_status/', iterations, setup=uncached_log,
+        ),
+        _request('GET trip hos-status (cached)', client, 'get', f'/api/trips/{trip.pk}/hos_status/', iterations),
+        _request(
+            'POST trip calculate-route (haversine)',
+            client, 'post', f'/api/trips/{trip.pk}/calculate_route/', iterations,
+        ),
+    ]
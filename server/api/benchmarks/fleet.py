@@ -0,0 +1,238 @@
+"""
+Synthetic fleet data: drivers with back-to-back multi-week trips, full
+24-hour daily logs of 10-40 activities and routes with required stops.
+Used by `manage.py generate_fleet` and the `endpoints` benchmark suite.
+"""
+import random
+import uuid
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from ..models import (
+    Activity, ActivityStatus, DailyLog, Driver, RequiredStop, Route, RouteStatus, Trip, TripStatus,
+)
+from ..services.duty_rollup import DutyRollupService
+from ..services.geo import haversine
+from ..services.log_projection import TOTAL_FIELDS
+from ..services.route_calculator import RouteCalculator
+from ..services.timeline import TimelineService
+
+
+MINUTES_PER_DAY = 24 * 60
+DRIVING_MPH = 55
+
+# Continental US, roughly
+LAT_RANGE = (30.0, 47.0)
+LNG_RANGE = (-120.0, -75.0)
+
+
+def _random_location(rng):
+    return {
+        'latitude': round(rng.uniform(*LAT_RANGE), 5),
+        'longitude': round(rng.uniform(*LNG_RANGE), 5),
+    }
+
+
+def _along(start, end, fraction):
+    fraction = min(max(fraction, 0.0), 1.0)
+    return {
+        'latitude': round(start['latitude'] + (end['latitude'] - start['latitude']) * fraction, 5),
+        'longitude': round(start['longitude'] + (end['longitude'] - start['longitude']) * fraction, 5),
+    }
+
+
+def random_day_pattern(rng, count):
+    """
+    A 24-hour day of `count` activities: an off-duty night, a working window
+    of 8-14 hours cut into driving / on-duty blocks (every fifth an off-duty
+    break), and off duty for the rest of the day.
+
+    Returns:
+        list of (status, duration_minutes), summing to 24 hours
+    """
+    count = max(count, 3)
+    night = rng.randrange(6 * 60, 9 * 60 + 1, 15)
+    window = rng.randrange(8 * 60, 14 * 60 + 1, 15)
+
+    # Working blocks are multiples of 5 minutes
+    cuts = sorted(rng.sample(range(1, window // 5), count - 3))
+    bounds = [0] + [cut * 5 for cut in cuts] + [window]
+
+    pattern = [(ActivityStatus.OFF_DUTY, night)]
+    for i, (start, end) in enumerate(zip(bounds, bounds[1:])):
+        if i % 5 == 4:
+            status = ActivityStatus.OFF_DUTY
+        elif i % 2 == 0:
+            status = ActivityStatus.DRIVING
+        else:
+            status = ActivityStatus.ON_DUTY_NOT_DRIVING
+        pattern.append((status, end - start))
+    pattern.append((ActivityStatus.OFF_DUTY, MINUTES_PER_DAY - night - window))
+    return pattern
+
+
+def _day_activities(daily_log, pattern, start, end, progress_miles, total_miles):
+    """Activity rows for one log, moving along the start-end line as the driver drives"""
+    activities = []
+    minute = 0
+    miles = progress_miles
+    for index, (status, duration) in enumerate(pattern):
+        location = _along(start, end, miles / total_miles if total_miles else 1.0)
+        driven = None
+        if status == ActivityStatus.DRIVING:
+            driven = round(duration * DRIVING_MPH / 60, 1)
+            miles += driven
+        activities.append(Activity(
+            daily_log=daily_log,
+            status=status,
+            start_time=TimelineService._minutes_to_time(minute),
+            end_time=TimelineService._minutes_to_time(minute + duration),
+            duration_minutes=duration,
+            location=location,
+            end_location=_along(start, end, miles / total_miles if total_miles else 1.0),
+            remark=status.label,
+            miles_driven=driven,
+            sequence=(index + 1) * TimelineService.SEQUENCE_GAP,
+        ))
+        minute += duration
+
+        # Apply the log totals in memory (rows are bulk-created without signals)
+        field = TOTAL_FIELDS[status]
+        setattr(daily_log, field, getattr(daily_log, field) + duration / 60)
+        if driven:
+            daily_log.total_miles_driven += driven
+    daily_log.total_miles_driven = round(daily_log.total_miles_driven, 1)
+    daily_log.total_truck_mileage = daily_log.total_miles_driven
+    return activities, miles
+
+
+def generate_fleet(drivers=20, trips_per_driver=4, min_days=7, max_days=21, min_activities=10,
+                   max_activities=40, routes=True, seed=0, prefix='fleet', password=None,
+                   routing_providers=('haversine',), end_date=None):
+    """
+    Create a synthetic fleet.
+
+    Each driver gets back-to-back trips of min_days-max_days days ending on
+    end_date (default today): the last one in progress, the rest completed.
+    Every trip day has a full 24-hour log of min_activities-max_activities
+    activities. Rows are bulk-inserted without signals, so log totals are
+    set in memory and duty rollups are rebuilt per driver afterwards.
+
+    Args:
+        routes: also calculate each trip's route and required stops
+            (through routing_providers; offline haversine by default)
+        password: login password for the generated users (unusable if None)
+
+    Returns:
+        dict of created row counts
+    """
+    rng = random.Random(seed)
+    end_date = end_date or timezone.localdate()
+    tag = uuid.uuid4().hex[:6]
+    password_hash = make_password(password) if password else make_password(None)
+
+    users = User.objects.bulk_create([
+        User(
+            username=f'{prefix}-{tag}-{i:04d}',
+            first_name=rng.choice(('Alex', 'Sam', 'Jordan', 'Casey', 'Riley', 'Morgan', 'Taylor')),
+            last_name=f'Driver {i + 1}',
+            password=password_hash,
+        )
+        for i in range(drivers)
+    ])
+    fleet = Driver.objects.bulk_create([
+        Driver(
+            user=user,
+            home_terminal=f'Terminal {rng.randint(1, 12)}',
+            carrier_name='Synthetic Freight Co.',
+        )
+        for user in users
+    ])
+
+    trips = []
+    trip_days = []
+    for driver in fleet:
+        lengths = [rng.randint(min_days, max_days) for _ in range(trips_per_driver)]
+        gaps = [rng.randint(1, 3) for _ in range(trips_per_driver)]
+        day = end_date - timedelta(days=sum(lengths) + sum(gaps[1:]) - 1)
+        location = _random_location(rng)
+        for index, (length, gap) in enumerate(zip(lengths, gaps)):
+            if index:
+                day += timedelta(days=gap)
+            last = index == trips_per_driver - 1
+            pickup, dropoff = _random_location(rng), _random_location(rng)
+            start = timezone.make_aware(datetime.combine(day, time(6)))
+            trips.append(Trip(
+                driver=driver,
+                name=f'Load {index + 1} for driver {driver.pk}',
+                status=TripStatus.IN_PROGRESS if last else TripStatus.COMPLETED,
+                current_location=location,
+                pickup_location=pickup,
+                dropoff_location=dropoff,
+                current_cycle_hours=round(rng.uniform(0, 40), 1),
+                start_datetime=start,
+                end_datetime=None if last else start + timedelta(days=length - 1, hours=12),
+            ))
+            trip_days.append((day, length))
+            day += timedelta(days=length)
+            location = dropoff
+    trips = Trip.objects.bulk_create(trips)
+
+    logs = []
+    log_plans = []
+    drivers_by_id = {driver.pk: driver for driver in fleet}
+    for trip, (first_day, length) in zip(trips, trip_days):
+        driver = drivers_by_id[trip.driver_id]
+        for offset in range(length):
+            logs.append(DailyLog(
+                trip=trip,
+                date=first_day + timedelta(days=offset),
+                driver_name=driver.user.get_full_name(),
+                home_terminal=driver.home_terminal,
+                carrier_name=driver.carrier_name,
+                tractor_number=f'T-{driver.pk:04d}',
+            ))
+            log_plans.append(random_day_pattern(rng, rng.randint(min_activities, max_activities)))
+
+    # Totals are filled in while building the activities, before the logs are inserted
+    activities = []
+    progress = {}
+    for daily_log, pattern in zip(logs, log_plans):
+        trip = daily_log.trip
+        start = trip.current_location
+        end = trip.dropoff_location
+        total = haversine(start['latitude'], start['longitude'], end['latitude'], end['longitude'])
+        day_activities, progress[trip.pk] = _day_activities(
+            daily_log, pattern, start, end, progress.get(trip.pk, 0.0), total
+        )
+        activities.append(day_activities)
+    logs = DailyLog.objects.bulk_create(logs, batch_size=500)
+    for daily_log, day_activities in zip(logs, activities):
+        for activity in day_activities:
+            activity.daily_log = daily_log
+    Activity.objects.bulk_create(
+        [activity for day_activities in activities for activity in day_activities], batch_size=1000
+    )
+
+    for driver in fleet:
+        DutyRollupService.rebuild(driver_id=driver.pk)
+
+    if routes:
+        with override_settings(ROUTING_PROVIDERS=list(routing_providers)):
+            for trip in trips:
+                RouteCalculator.calculate_route(trip)
+        Trip.objects.filter(pk__in=[trip.pk for trip in trips]).update(route_status=RouteStatus.READY)
+
+    return {
+        'drivers': len(fleet),
+        'trips': len(trips),
+        'daily_logs': len(logs),
+        'activities': sum(len(day_activities) for day_activities in activities),
+        'routes': Route.objects.filter(trip__in=trips).count() if routes else 0,
+        'required_stops': RequiredStop.objects.filter(route__trip__in=trips).count() if routes else 0,
+        'usernames': [user.username for user in users],
+    }
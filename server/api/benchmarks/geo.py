@@ -0,0 +1,67 @@
+"""Bulk haversine: scalar per-pair loop vs geo.pairwise_distances / distance_matrix."""
+import random
+
+from ..services import geo
+from .utils import measure
+
+
+def _random_points(count, rng):
+    # Continental US bounding box
+    return [(rng.uniform(25.0, 49.0), rng.uniform(-124.0, -67.0)) for _ in range(count)]
+
+
+def _with_throughput(result, count):
+    result['extra'] = {'pairs_per_s': f"{count / (result['mean_ms'] / 1000):,.0f}"}
+    return result
+
+
+def run(iterations=20, pairs=100_000, matrix_size=300, **options):
+    rng = random.Random(42)
+    origins = _random_points(pairs, rng)
+    destinations = _random_points(pairs, rng)
+    stops = _random_points(matrix_size, rng)
+
+    def scalar():
+        return [
+            geo.haversine(a[0], a[1], b[0], b[1])
+            for a, b in zip(origins, destinations)
+        ]
+
+    expected = scalar()
+    variants = [('python', False)]
+    if geo.HAS_NUMPY:
+        variants.append(('numpy', True))
+
+    for label, use_numpy in variants:
+        got = geo.pairwise_distances(origins, destinations, use_numpy=use_numpy)
+        if any(abs(x - y) > 1e-6 for x, y in zip(expected, got)):
+            raise AssertionError(f'geo.pairwise_distances ({label}) differs from the scalar path')
+
+    results = [_with_throughput(measure(f'geo scalar haversine loop ({pairs:,} pairs)', scalar, iterations), pairs)]
+
+    for label, use_numpy in variants:
+        results.append(_with_throughput(measure(
+            f'geo pairwise_distances, {label} ({pairs:,} pairs)',
+            lambda: geo.pairwise_distances(origins, destinations, use_numpy=use_numpy),
+            iterations,
+        ), pairs))
+
+    if geo.HAS_NUMPY:
+        # Callers that already hold coordinate arrays skip the list -> array conversion
+        origin_array = geo.np.asarray(origins)
+        destination_array = geo.np.asarray(destinations)
+        results.append(_with_throughput(measure(
+            f'geo pairwise_distances, numpy arrays ({pairs:,} pairs)',
+            lambda: geo.pairwise_distances(origin_array, destination_array, use_numpy=True),
+            iterations,
+        ), pairs))
+
+    cells = matrix_size * matrix_size
+    for label, use_numpy in variants:
+        results.append(_with_throughput(measure(
+            f'geo distance_matrix, {label} ({matrix_size}x{matrix_size})',
+            lambda: geo.distance_matrix(stops, use_numpy=use_numpy),
+            iterations,
+        ), cells))
+
+    return results
@@ -0,0 +1,53 @@
+"""HOS compliance: per-rule HOSValidator vs single-pass HOSComplianceEngine."""
+from datetime import date, timedelta
+
+from ..models import Trip, DailyLog
+from ..services.duty_rollup import DutyRollupService
+from ..services.hos_engine import HOSComplianceEngine
+from ..services.hos_validator import HOSValidator
+from .utils import create_driver, day_pattern, build_activities, measure
+
+
+def run(iterations=20, activities_per_day=24, days=8, **options):
+    driver = create_driver('bench-hos')
+    trip = Trip.objects.create(driver=driver, name='HOS benchmark')
+
+    first_day = date(2025, 1, 1)
+    logs = []
+    for offset in range(days):
+        daily_log = DailyLog.objects.create(trip=trip, date=first_day + timedelta(days=offset))
+        build_activities(daily_log, day_pattern(activities_per_day))
+        logs.append(daily_log)
+
+    # Activities were bulk-created without signals
+    DutyRollupService.rebuild(driver_id=driver.pk)
+
+    daily_log = logs[-1]
+    current_date = daily_log.date
+
+    per_rule = HOSValidator.get_compliance_status_per_rule(trip, daily_log, current_date)
+    engine = HOSComplianceEngine.get_compliance_status(trip, daily_log, current_date, use_cache=False)
+    if per_rule != engine:
+        raise AssertionError(f'Engine result differs from per-rule validator: {engine} != {per_rule}')
+
+    # Warm the compliance cache for the cached run
+    HOSComplianceEngine.get_compliance_status(trip, daily_log, current_date)
+
+    suffix = f'{days}d x {activities_per_day} activities'
+    return [
+        measure(
+            f'hos per-rule validator ({suffix})',
+            lambda: HOSValidator.get_compliance_status_per_rule(trip, daily_log, current_date),
+            iterations,
+        ),
+        measure(
+            f'hos single-pass engine ({suffix})',
+            lambda: HOSComplianceEngine.get_compliance_status(trip, daily_log, current_date, use_cache=False),
+            iterations,
+        ),
+        measure(
+            f'hos single-pass engine, cached ({suffix})',
+            lambda: HOSComplianceEngine.get_compliance_status(trip, daily_log, current_date),
+            iterations,
+        ),
+    ]
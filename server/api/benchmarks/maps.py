@@ -0,0 +1,162 @@
+"""
+Routing through the Directions API, offline: runs against the local maps stub
+(maps_stub.MapsStubServer) to measure provider latency, cache hit rates,
+retries under errors/throttling and end-to-end trip creation.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from ..models import RouteJob, RouteJobStatus
+from ..services.distance_calculator import DistanceCalculator
+from ..services.maps_client import reset_maps_client
+from ..services.route_cache import DirectionsCache
+from ..services.route_jobs import RouteJobQueue
+from ..services.routing import GoogleDirectionsProvider
+from .maps_stub import MapsStubServer
+from .utils import create_driver, summarize
+
+
+STUB_LATENCY_MS = 20
+
+
+def _location(rng):
+    return {
+        'latitude': round(rng.uniform(32, 46), 5),
+        'longitude': round(rng.uniform(-118, -78), 5),
+    }
+
+
+def _timed(name, calls):
+    """Run each call once, timing it and counting the queries of the first"""
+    timings = []
+    queries = 0
+    for i, call in enumerate(calls):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - start) * 1000)
+        if i == 0:
+            queries = len(ctx.captured_queries)
+    return summarize(name, timings, queries)
+
+
+def _with_stub_stats(result, stub, calls, **extra):
+    stats = stub.snapshot()
+    result['extra'] = {
+        'stub_requests': stats['requests'],
+        'requests_per_call': f"{stats['requests'] / calls:.2f}",
+        **extra,
+    }
+    stub.reset_stats()
+    return result
+
+
+def run(iterations=20, **options):
+    rng = random.Random(42)
+    stub = MapsStubServer(latency_ms=STUB_LATENCY_MS, seed=42)
+    base_url = stub.start()
+    settings_override = override_settings(
+        GOOGLE_MAPS_API_KEY='stub',
+        MAPS_API_BASE_URL=base_url,
+        MAPS_HTTP_BACKOFF_SECONDS=0.01,
+        ROUTING_PROVIDERS=['google', 'haversine'],
+        ROUTE_CACHE_ENABLED=True,
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+    )
+    settings_override.enable()
+    reset_maps_client()
+    DirectionsCache.clear()
+
+    results = []
+    try:
+        provider = GoogleDirectionsProvider()
+        trips = [[_location(rng), _location(rng), _location(rng)] for _ in range(iterations)]
+
+        # Every route is new: one provider request each, plus the cache miss and write
+        results.append(_with_stub_stats(_timed(
+            f'directions cold ({STUB_LATENCY_MS}ms stub, 3 stops)',
+            [lambda t=t: provider.route(t) for t in trips],
+        ), stub, iterations))
+
+        # The same routes again, answered from DirectionsCache
+        before = DirectionsCache.stats()
+        result = _timed('directions warm (DirectionsCache hits)', [lambda t=t: provider.route(t) for t in trips])
+        after = DirectionsCache.stats()
+        hits = after['hits'] - before['hits']
+        lookups = hits + after['misses'] - before['misses']
+        results.append(_with_stub_stats(
+            result, stub, iterations, hit_rate=f'{hits / lookups:.0%}' if lookups else '-'
+        ))
+
+        # Transient failures: 10% HTTP 500 and 10% OVER_QUERY_LIMIT, retried by MapsClient
+        stub.error_rate = 0.1
+        stub.rate_limit_rate = 0.1
+        trips = [[_location(rng), _location(rng)] for _ in range(iterations)]
+        answered = []
+        result = _timed(
+            'directions cold, 10% errors + 10% throttled',
+            [lambda t=t: answered.append(provider.route(t) is not None) for t in trips],
+        )
+        stats = stub.snapshot()
+        results.append(_with_stub_stats(
+            result, stub, iterations,
+            succeeded=f'{sum(answered) / len(answered):.0%}',
+            failures_seen=stats['errors'] + stats['over_query_limit'],
+        ))
+        stub.error_rate = 0.0
+        stub.rate_limit_rate = 0.0
+        reset_maps_client()
+
+        # Batched distances: a day's 60 consecutive activities (each pair starts where
+        # the last ended) in chained multi-waypoint requests of up to 26 legs
+        runs = max(iterations // 4, 1)
+        pairs_runs = []
+        for _ in range(runs):
+            points = [_location(rng) for _ in range(61)]
+            pairs_runs.append(list(zip(points, points[1:])))
+        results.append(_with_stub_stats(_timed(
+            'calculate_distances (60 chained pairs, cold)',
+            [lambda p=p: DistanceCalculator.calculate_distances(p) for p in pairs_runs],
+        ), stub, runs))
+
+        # Unrelated pairs: one request per pair, no connecting legs requested
+        pairs_runs = [[(_location(rng), _location(rng)) for _ in range(20)] for _ in range(runs)]
+        results.append(_with_stub_stats(_timed(
+            'calculate_distances (20 disjoint pairs, cold)',
+            [lambda p=p: DistanceCalculator.calculate_distances(p) for p in pairs_runs],
+        ), stub, runs))
+
+        # End to end: POST /api/trips/, then the worker routes it and places stops.
+        # Jobs already queued in the database are set aside (rolled back) so the
+        # worker step claims the new trip's job.
+        RouteJob.objects.filter(status=RouteJobStatus.QUEUED).delete()
+        driver = create_driver('bench-maps')
+        client = APIClient()
+        client.force_authenticate(driver.user)
+
+        def create_and_route():
+            response = client.post('/api/trips/', {
+                'name': 'Maps benchmark',
+                'current_location': _location(rng),
+                'pickup_location': _location(rng),
+                'dropoff_location': _location(rng),
+                'current_cycle_hours': 10,
+            }, format='json')
+            assert response.status_code == 201, response.content
+            RouteJobQueue.run(RouteJobQueue.claim_next())
+
+        results.append(_with_stub_stats(
+            _timed('trip create + route job (end to end)', [create_and_route] * iterations),
+            stub, iterations,
+        ))
+    finally:
+        settings_override.disable()
+        reset_maps_client()
+        stub.stop()
+
+    return results
@@ -0,0 +1,315 @@
+"""
+Local stand-in for the Google Directions API, for offline benchmarks and load tests.
+
+Serves `/maps/api/directions/json` in the Directions response format the
+MapsClient reads, from recorded fixtures or a deterministic synthetic
+generator, with configurable latency, error and rate-limit behaviour.
+Point MAPS_API_BASE_URL at it (see `manage.py run_maps_stub`), or start
+it in-process with MapsStubServer(...).start().
+"""
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from ..services import polyline
+from ..services.geo import haversine
+from ..services.route_cache import DirectionsCache, _LAT_LNG_RE
+
+
+DIRECTIONS_PATH = '/maps/api/directions/json'
+STATS_PATH = '/__stats'
+RESET_PATH = '/__reset'
+
+METERS_PER_MILE = 1609.34
+
+
+def _address_point(address):
+    """Deterministic pseudo-coordinates in the continental US for a free-text address"""
+    digest = hashlib.sha256(DirectionsCache.normalize(address).encode('utf-8')).digest()
+    lat = 30 + int.from_bytes(digest[:4], 'big') / 2 ** 32 * 17
+    lng = -120 + int.from_bytes(digest[4:8], 'big') / 2 ** 32 * 45
+    return lat, lng
+
+
+def _point(value):
+    match = _LAT_LNG_RE.match(value)
+    if match:
+        return float(match.group(1)), float(match.group(2))
+    return _address_point(value)
+
+
+class SyntheticDirections:
+    """
+    Generates Directions routes from straight lines between the stops:
+    leg distances are haversine miles times a road factor, durations are at
+    a fixed speed, and the overview polyline has a point every few miles.
+    """
+
+    def __init__(self, road_factor=1.2, speed_mph=55, point_every_miles=5):
+        self.road_factor = road_factor
+        self.speed_mph = speed_mph
+        self.point_every_miles = point_every_miles
+
+    def route(self, origin, destination, waypoints=()):
+        stops = [origin, *waypoints, destination]
+        points = [_point(stop) for stop in stops]
+
+        legs = []
+        overview = [points[0]]
+        for (a, b), (start, end) in zip(zip(stops, stops[1:]), zip(points, points[1:])):
+            miles = haversine(*start, *end)
+            road_miles = miles * self.road_factor
+            legs.append({
+                'distance': {'value': round(road_miles * METERS_PER_MILE), 'text': f'{road_miles:,.0f} mi'},
+                'duration': {'value': round(road_miles / self.speed_mph * 3600)},
+                'start_address': a,
+                'end_address': b,
+                'start_location': {'lat': start[0], 'lng': start[1]},
+                'end_location': {'lat': end[0], 'lng': end[1]},
+            })
+            steps = max(1, math.ceil(miles / self.point_every_miles))
+            overview.extend(
+                (start[0] + (end[0] - start[0]) * i / steps, start[1] + (end[1] - start[1]) * i / steps)
+                for i in range(1, steps + 1)
+            )
+
+        return {
+            'legs': legs,
+            'overview_polyline': {'points': polyline.encode(overview)},
+            'summary': 'Synthetic route',
+        }
+
+
+class FixtureStore:
+    """
+    Recorded Directions responses, keyed like DirectionsCache (normalized
+    origin, destination and waypoints). The file is a JSON list of
+    {origin, destination, waypoints, response} objects.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for entry in json.load(f):
+                    key = DirectionsCache.make_key(entry['origin'], entry['destination'], entry.get('waypoints'))
+                    self.entries[key] = entry
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, origin, destination, waypoints):
+        entry = self.entries.get(DirectionsCache.make_key(origin, destination, waypoints))
+        return entry['response'] if entry else None
+
+    def record(self, origin, destination, waypoints, response):
+        """Store a full Directions response (and rewrite the file, if any)"""
+        with self._lock:
+            self.entries[DirectionsCache.make_key(origin, destination, waypoints)] = {
+                'origin': origin,
+                'destination': destination,
+                'waypoints': list(waypoints),
+                'response': response,
+            }
+            if self.path:
+                tmp_path = f'{self.path}.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(list(self.entries.values()), f)
+                os.replace(tmp_path, self.path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        stub = self.server.stub
+        url = urlparse(self.path)
+        if url.path == STATS_PATH:
+            return self._send(200, stub.snapshot())
+        if url.path == RESET_PATH:
+            stub.reset_stats()
+            return self._send(200, {'status': 'OK'})
+        if url.path != DIRECTIONS_PATH:
+            return self._send(404, {'status': 'NOT_FOUND'})
+
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        status, body = stub.handle_directions(query)
+        self._send(status, body)
+
+
+class MapsStubServer:
+    """
+    The stand-in server. Each Directions request waits latency_ms (+ up to
+    jitter_ms), then:
+
+    - gets an HTTP 429 if more than max_rps requests arrived this second,
+    - fails with probability error_rate (HTTP 500),
+    - is throttled with probability rate_limit_rate (200 with status
+      OVER_QUERY_LIMIT, as Google reports quota exhaustion),
+    - is answered from fixtures, else recorded from `upstream` (a real
+      Directions base URL) if set, else generated synthetically.
+
+    Randomness comes from one seeded generator, so a run is reproducible.
+    Request counts are served as JSON at /__stats and cleared by /__reset.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, fixtures=None, synthetic=True, upstream=None,
+                 upstream_key='', latency_ms=0, jitter_ms=0, error_rate=0.0, rate_limit_rate=0.0,
+                 max_rps=0, seed=0):
+        self.fixtures = fixtures if isinstance(fixtures, FixtureStore) else FixtureStore(fixtures)
+        self.synthetic = SyntheticDirections() if synthetic else None
+        self.upstream = upstream.rstrip('/') if upstream else None
+        self.upstream_key = upstream_key
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_rps = max_rps
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._second = 0
+        self._second_count = 0
+        self.reset_stats()
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {
+                'requests': 0,
+                'fixture': 0,
+                'recorded': 0,
+                'synthetic': 0,
+                'not_found': 0,
+                'errors': 0,
+                'over_query_limit': 0,
+                'too_many_requests': 0,
+            }
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _draw(self):
+        """(delay seconds, failure roll, throttle roll, over the per-second limit)"""
+        with self._lock:
+            self.stats['requests'] += 1
+            delay = (self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000
+            fail_roll = self._random.random()
+            throttle_roll = self._random.random()
+
+            over_limit = False
+            if self.max_rps:
+                second = int(time.monotonic())
+                if second != self._second:
+                    self._second, self._second_count = second, 0
+                self._second_count += 1
+                over_limit = self._second_count > self.max_rps
+        return delay, fail_roll, throttle_roll, over_limit
+
+    def handle_directions(self, query):
+        """
+        Answer one Directions request.
+
+        Returns:
+            tuple: (HTTP status, JSON body)
+        """
+        delay, fail_roll, throttle_roll, over_limit = self._draw()
+        if delay:
+            time.sleep(delay)
+
+        if over_limit:
+            self._count('too_many_requests')
+            return 429, {'status': 'OVER_QUERY_LIMIT', 'error_message': 'Too many requests per second'}
+        if fail_roll < self.error_rate:
+            self._count('errors')
+            return 500, {'status': 'UNKNOWN_ERROR'}
+        if throttle_roll < self.rate_limit_rate:
+            self._count('over_query_limit')
+            return 200, {'status': 'OVER_QUERY_LIMIT', 'routes': []}
+
+        origin = query.get('origin', '')
+        destination = query.get('destination', '')
+        waypoints = [w for w in query.get('waypoints', '').split('|') if w]
+        if not origin or not destination:
+            return 200, {'status': 'INVALID_REQUEST', 'routes': []}
+
+        response = self.fixtures.get(origin, destination, waypoints)
+        if response is not None:
+            self._count('fixture')
+            return 200, response
+
+        if self.upstream:
+            response = self._fetch_upstream(query)
+            if response is not None:
+                self.fixtures.record(origin, destination, waypoints, response)
+                self._count('recorded')
+                return 200, response
+
+        if self.synthetic is not None:
+            self._count('synthetic')
+            return 200, {
+                'status': 'OK',
+                'geocoded_waypoints': [],
+                'routes': [self.synthetic.route(origin, destination, waypoints)],
+            }
+
+        self._count('not_found')
+        return 200, {'status': 'ZERO_RESULTS', 'routes': []}
+
+    def _fetch_upstream(self, query):
+        params = {**query, 'key': self.upstream_key or query.get('key', '')}
+        try:
+            response = requests.get(f'{self.upstream}{DIRECTIONS_PATH}', params=params, timeout=(3, 15))
+            data = response.json()
+        except (requests.RequestException, ValueError):
+            return None
+        return data if data.get('status') == 'OK' else None
+
+    def start(self):
+        """Serve in a background thread; returns the base URL"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,78 @@
+"""Offline road-graph routing: A* shortest paths over synthetic road grids."""
+import random
+import time
+
+from ..services.road_graph import RoadGraph
+from .utils import summarize
+
+
+# Grid spacing in degrees (~3.5 miles north-south)
+SPACING = 0.05
+HIGHWAY_EVERY = 10
+
+
+def synthetic_grid(rows, cols, seed=42):
+    """
+    A jittered rows x cols road grid over the central US, two-way edges.
+
+    Every HIGHWAY_EVERY-th row and column is a 65 mph highway; the other
+    roads run at 35-45 mph, so the fastest path is not the straight one.
+
+    Returns:
+        RoadGraph
+    """
+    rng = random.Random(seed)
+    coords = [
+        (
+            35.0 + r * SPACING + rng.uniform(-0.2, 0.2) * SPACING,
+            -100.0 + c * SPACING + rng.uniform(-0.2, 0.2) * SPACING,
+        )
+        for r in range(rows)
+        for c in range(cols)
+    ]
+    edges = []
+    for r in range(rows):
+        for c in range(cols):
+            node = r * cols + c
+            if c + 1 < cols:
+                speed = 65 if r % HIGHWAY_EVERY == 0 else rng.choice((35, 40, 45))
+                edges.extend(((node, node + 1, speed), (node + 1, node, speed)))
+            if r + 1 < rows:
+                speed = 65 if c % HIGHWAY_EVERY == 0 else rng.choice((35, 40, 45))
+                edges.extend(((node, node + cols, speed), (node + cols, node, speed)))
+    return RoadGraph.from_edges(coords, edges)
+
+
+def _queries(rows, cols, rng, count, span):
+    """Random source/target pairs about `span` grid steps apart in each direction"""
+    pairs = []
+    for _ in range(count):
+        r = rng.randrange(0, rows - span)
+        c = rng.randrange(0, cols - span)
+        pairs.append((r * cols + c, (r + span) * cols + c + span))
+    return pairs
+
+
+def run(iterations=20, **options):
+    rng = random.Random(42)
+    results = []
+    for rows in (100, 300):
+        graph = synthetic_grid(rows, rows)
+        graph.shortest_path(0, 1)  # build the search arrays outside the timings
+        for span in (15, 75, rows - 1):
+            timings = []
+            miles = []
+            for source, target in _queries(rows, rows, rng, iterations, span):
+                start = time.perf_counter()
+                path = graph.shortest_path(source, target)
+                timings.append((time.perf_counter() - start) * 1000)
+                miles.append(path[0])
+
+            result = summarize(
+                f'road_graph A* ({graph.node_count // 1000}k nodes, ~{sum(miles) / len(miles):,.0f} mi)',
+                timings,
+                0,
+            )
+            result['extra'] = {'edges': f'{graph.edge_count:,}'}
+            results.append(result)
+    return results
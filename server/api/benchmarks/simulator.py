@@ -0,0 +1,39 @@
+"""HOS trip simulation: TripSimulator plans per second over a mix of trips."""
+import random
+
+from ..services.trip_simulator import TripSimulator
+from .utils import measure
+
+
+def _with_throughput(result, count):
+    result['extra'] = {'plans_per_s': f"{count / (result['mean_ms'] / 1000):,.0f}"}
+    return result
+
+
+def run(iterations=20, plans=2000, **options):
+    rng = random.Random(42)
+    trips = []
+    for _ in range(plans):
+        total_miles = rng.uniform(50, 3000)
+        trips.append((
+            total_miles,
+            rng.uniform(45, 65),
+            rng.uniform(0, 70),
+            rng.uniform(0, total_miles / 2),
+        ))
+
+    def simulate_all():
+        for total_miles, speed, cycle_hours, pickup_mile in trips:
+            TripSimulator.simulate(total_miles, speed, cycle_hours, pickup_mile)
+
+    stop_counts = [
+        len(TripSimulator.simulate(*trip)['stops'])
+        for trip in trips
+    ]
+
+    result = _with_throughput(measure(
+        f'simulator plans (50-3,000 mi, {plans:,} trips, {sum(stop_counts) / plans:.1f} stops avg)',
+        simulate_all,
+        iterations,
+    ), plans)
+    return [result]
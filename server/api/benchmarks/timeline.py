@@ -0,0 +1,93 @@
+"""Timeline cascades: rows renumbered by inserts/deletes with sparse sequence numbers."""
+from datetime import date, time as dtime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Trip, DailyLog, Activity
+from ..services.timeline import TimelineService
+from .utils import create_driver, day_pattern, build_activities, measure, rolled_back
+
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def _minutes_to_time(minutes):
+    minutes %= 24 * 60
+    return dtime(minutes // 60, minutes % 60)
+
+
+def _write_stats(daily_log, func):
+    """
+    Run func in a rolled-back savepoint and count its write queries and the
+    existing activities whose sequence number changed.
+    """
+    with rolled_back():
+        before = dict(daily_log.activities.values_list('id', 'sequence'))
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        after = dict(daily_log.activities.values_list('id', 'sequence'))
+
+    writes = sum(1 for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith(WRITE_PREFIXES))
+    renumbered = sum(1 for pk, seq in after.items() if pk in before and before[pk] != seq)
+    return writes, renumbered
+
+
+def run(iterations=20, activities_per_day=30, **options):
+    driver = create_driver('bench-timeline')
+    trip = Trip.objects.create(driver=driver, name='Timeline benchmark')
+    daily_log = DailyLog.objects.create(trip=trip, date=date(2025, 1, 1))
+
+    # Start the day after midnight so there is room to insert before the first activity
+    build_activities(
+        daily_log,
+        day_pattern(activities_per_day),
+        sequence_step=TimelineService.SEQUENCE_GAP,
+        start_minutes=60,
+    )
+    activities = list(daily_log.activities.order_by('sequence', 'start_time'))
+    count = len(activities)
+
+    positions = {'head': 0, 'middle': count // 2, 'tail': count}
+
+    def insert_at(position):
+        if position < count:
+            next_start = TimelineService._time_to_minutes(activities[position].start_time)
+        else:
+            next_start = TimelineService._time_to_minutes(activities[-1].end_time) + 30
+        data = {
+            'status': 'on_duty_not_driving',
+            'start_time': _minutes_to_time(next_start - 15),
+            'end_time': _minutes_to_time(next_start + 15),
+        }
+
+        def func():
+            with rolled_back():
+                TimelineService.insert_activity(daily_log, data, position=position)
+        return func
+
+    def delete_at(position):
+        pk = activities[min(position, count - 1)].pk
+
+        def func():
+            with rolled_back():
+                TimelineService.delete_activity(Activity.objects.select_related('daily_log').get(pk=pk))
+        return func
+
+    results = []
+    for label, position in positions.items():
+        for op, factory, dense in (
+            ('insert', insert_at, count - position),
+            ('delete', delete_at, max(count - 1 - min(position, count - 1), 0)),
+        ):
+            func = factory(position)
+            writes, renumbered = _write_stats(daily_log, func)
+            result = measure(f'timeline {op} at {label} ({count} activities)', func, iterations)
+            result['extra'] = {
+                'writes': writes,
+                'renumbered': renumbered,
+                'dense_renumbered': dense,
+            }
+            results.append(result)
+
+    return results
@@ -0,0 +1,118 @@
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import time as dtime
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Driver, Activity
+
+
+@contextmanager
+def rolled_back():
+    """Run a block in a transaction that is always rolled back"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def measure(name, func, iterations=20):
+    """
+    Time func over several iterations and count the queries of one run.
+
+    Returns:
+        dict with name, queries, iterations and mean/median/p95/min milliseconds
+    """
+    with CaptureQueriesContext(connection) as ctx:
+        func()
+    queries = len(ctx.captured_queries)
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return summarize(name, timings, queries)
+
+
+def summarize(name, timings, queries):
+    """Result dict (as returned by measure) for timings in milliseconds"""
+    timings = sorted(timings)
+    return {
+        'name': name,
+        'queries': queries,
+        'iterations': len(timings),
+        'mean_ms': statistics.fmean(timings),
+        'median_ms': statistics.median(timings),
+        'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'min_ms': timings[0],
+    }
+
+
+def create_driver(prefix='bench'):
+    """Create a throwaway user + driver"""
+    user = User.objects.create(username=f'{prefix}-{uuid.uuid4().hex[:12]}')
+    return Driver.objects.create(user=user, home_terminal='Benchmark Terminal', carrier_name='Benchmark Carrier')
+
+
+def day_pattern(count):
+    """
+    Build a 24-hour day of `count` activities: 10 hours off duty, then
+    alternating driving / on-duty blocks, ending off duty.
+
+    Returns:
+        list of (status, duration_minutes)
+    """
+    count = max(count, 3)
+    working = count - 2
+    work_minutes = 12 * 60
+    block = work_minutes // working
+
+    pattern = [('off_duty', 10 * 60)]
+    for i in range(working):
+        minutes = block if i < working - 1 else work_minutes - block * (working - 1)
+        pattern.append(('driving' if i % 2 == 0 else 'on_duty_not_driving', minutes))
+    pattern.append(('off_duty', 24 * 60 - 10 * 60 - work_minutes))
+    return pattern
+
+
+def build_activities(daily_log, pattern, sequence_step=1, start_minutes=0):
+    """
+    Bulk-create a day's activities from (status, minutes) pairs without firing signals.
+
+    Args:
+        start_minutes: minutes after midnight the first activity starts
+
+    Returns:
+        list of Activity instances
+    """
+    activities = []
+    start = start_minutes
+    for index, (status, minutes) in enumerate(pattern):
+        end = start + minutes
+        activities.append(Activity(
+            daily_log=daily_log,
+            status=status,
+            start_time=dtime((start // 60) % 24, start % 60),
+            end_time=dtime((end // 60) % 24, end % 60),
+            duration_minutes=minutes,
+            miles_driven=minutes * 55 / 60 if status == 'driving' else None,
+            sequence=index * sequence_step,
+        ))
+        start = end
+    return Activity.objects.bulk_create(activities)
+
+
+def format_table(results):
+    """Render benchmark results as a fixed-width table, with any 'extra' values appended"""
+    lines = [f"{'benchmark':<56} {'queries':>8} {'mean ms':>10} {'median ms':>10} {'p95 ms':>10}"]
+    for r in results:
+        line = f"{r['name']:<56} {r['queries']:>8} {r['mean_ms']:>10.2f} {r['median_ms']:>10.2f} {r['p95_ms']:>10.2f}"
+        if r.get('extra'):
+            line += '  ' + ' '.join(f'{k}={v}' for k, v in r['extra'].items())
+        lines.append(line)
+    return '\n'.join(lines)
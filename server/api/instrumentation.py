@@ -0,0 +1,130 @@
+"""
+Per-request timing: SQL queries, external HTTP calls and named service spans.
+
+A RequestProfile is active only while ServerTimingMiddleware (api.middleware)
+handles a request. Outside of one (middleware disabled, management commands,
+worker threads) span() and traced() only look up the context variable.
+"""
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+_profile = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """
+    Timings collected while handling one request.
+
+    Spans of the same name are summed. A span nested in another of the same
+    name (e.g. a service method calling itself through another entry point)
+    is not counted twice.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.http_calls = 0
+        self.http_seconds = 0.0
+        self.spans = {}  # name -> [seconds, calls]
+        self._open = {}  # name -> nesting depth
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook timing every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.queries += 1
+
+    def add_http(self, seconds):
+        self.http_calls += 1
+        self.http_seconds += seconds
+
+    def _enter(self, name):
+        depth = self._open.get(name, 0)
+        self._open[name] = depth + 1
+        return depth == 0
+
+    def _exit(self, name, seconds, outermost):
+        self._open[name] -= 1
+        if outermost:
+            span = self.spans.setdefault(name, [0.0, 0])
+            span[0] += seconds
+            span[1] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        """Totals in milliseconds"""
+        return {
+            'total_ms': round(self.elapsed() * 1000, 1),
+            'db_ms': round(self.db_seconds * 1000, 1),
+            'queries': self.queries,
+            'http_ms': round(self.http_seconds * 1000, 1),
+            'http_calls': self.http_calls,
+            'spans': {
+                name: {'ms': round(seconds * 1000, 1), 'calls': calls}
+                for name, (seconds, calls) in self.spans.items()
+            },
+        }
+
+    def server_timing(self):
+        """Server-Timing header value (durations in milliseconds)"""
+        metrics = [
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f'http;dur={self.http_seconds * 1000:.1f};desc="{self.http_calls} calls"',
+        ]
+        for name, (seconds, calls) in self.spans.items():
+            metrics.append(f'{name};dur={seconds * 1000:.1f};desc="{calls}x"')
+        metrics.append(f'total;dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+def current_profile():
+    """The RequestProfile of the request being handled, or None"""
+    return _profile.get()
+
+
+@contextmanager
+def profiling(profile):
+    """Make `profile` the current RequestProfile inside the block"""
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Time the block as span `name` of the current request, if any"""
+    profile = _profile.get()
+    if profile is None:
+        yield
+        return
+
+    outermost = profile._enter(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile._exit(name, time.perf_counter() - start, outermost)
+
+
+def traced(name):
+    """Decorator timing each call of a function as span `name`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _profile.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,98 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.benchmarks import SUITES
+from api.benchmarks.utils import rolled_back, format_table
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Run performance benchmarks (wall time and SQL query counts)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'suites',
+            nargs='*',
+            help=f"Suites to run: {', '.join(sorted(SUITES))} (default: all)",
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per benchmark')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file')
+        parser.add_argument(
+            '--compare',
+            help='JSON results of an earlier run (e.g. another commit) to show mean time and query changes against',
+        )
+
+    def handle(self, *args, **options):
+        suites = options['suites'] or sorted(SUITES)
+        unknown = [name for name in suites if name not in SUITES]
+        if unknown:
+            raise CommandError(f"Unknown suite(s): {', '.join(unknown)}")
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    baseline = {r['name']: r for r in json.load(f)['results']}
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+
+        results = []
+
+        for name in suites:
+            self.stdout.write(f'Running {name}...')
+            with rolled_back():
+                suite_results = SUITES[name](iterations=options['iterations'])
+            for result in suite_results:
+                result['suite'] = name
+            results.extend(suite_results)
+
+        self.stdout.write(format_table(results))
+
+        if baseline is not None:
+            self._write_comparison(results, baseline)
+
+        if options['json_path']:
+            report = {
+                'commit': _git_commit(),
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': settings.DATABASES['default']['ENGINE'],
+                'iterations': options['iterations'],
+                'suites': suites,
+                'results': results,
+            }
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, default=str)
+            self.stdout.write(f"Wrote {options['json_path']}")
+
+    def _write_comparison(self, results, baseline):
+        self.stdout.write('')
+        self.stdout.write(f"{'compared with baseline':<56} {'queries':>8} {'mean ms':>10} {'change':>8}")
+        for r in results:
+            before = baseline.get(r['name'])
+            if before is None:
+                continue
+            change = (r['mean_ms'] - before['mean_ms']) / before['mean_ms'] if before['mean_ms'] else 0.0
+            queries = r['queries'] - before['queries']
+            line = (
+                f"{r['name']:<56} {queries:>+8} {r['mean_ms'] - before['mean_ms']:>+10.2f} {change:>+8.0%}"
+            )
+            if queries > 0 or change > 0.2:
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.road_graph import RoadGraph
+
+
+class Command(BaseCommand):
+    help = 'Convert an OSM XML extract into the compact road graph used by the road_graph routing provider'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='OSM XML extract (.osm), e.g. from osmium or Overpass')
+        parser.add_argument(
+            '--output',
+            help='Graph file to write (default: ROUTING_GRAPH_PATH)',
+        )
+
+    def handle(self, *args, **options):
+        output = options.get('output') or getattr(settings, 'ROUTING_GRAPH_PATH', '')
+        if not output:
+            raise CommandError('Pass --output or set ROUTING_GRAPH_PATH')
+
+        started = time.perf_counter()
+        try:
+            graph = RoadGraph.from_osm_xml(options['source'])
+        except (OSError, SyntaxError) as e:
+            raise CommandError(f"Could not read {options['source']}: {e}")
+
+        if not graph.node_count:
+            raise CommandError('No drivable highways found in the extract')
+
+        graph.save(output)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {output}: {graph.node_count} nodes, {graph.edge_count} edges '
+            f'in {time.perf_counter() - started:.1f}s'
+        ))
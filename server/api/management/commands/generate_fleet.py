@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.benchmarks.fleet import generate_fleet
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic fleet (drivers, multi-week trips, full daily logs, routes) for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drivers', type=int, default=20, help='Drivers to create (default: 20)')
+        parser.add_argument('--trips-per-driver', type=int, default=4, help='Trips per driver (default: 4)')
+        parser.add_argument('--min-days', type=int, default=7, help='Shortest trip in days (default: 7)')
+        parser.add_argument('--max-days', type=int, default=21, help='Longest trip in days (default: 21)')
+        parser.add_argument('--min-activities', type=int, default=10, help='Fewest activities per day (default: 10)')
+        parser.add_argument('--max-activities', type=int, default=40, help='Most activities per day (default: 40)')
+        parser.add_argument('--no-routes', action='store_true', help='Skip route and required stop calculation')
+        parser.add_argument(
+            '--providers',
+            default='haversine',
+            help='Comma-separated routing providers for the routes (default: haversine, offline)',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        parser.add_argument('--prefix', default='fleet', help="Username prefix (default: 'fleet')")
+        parser.add_argument('--password', help='Password for the generated users (default: unusable)')
+
+    def handle(self, *args, **options):
+        if options['drivers'] < 1 or options['trips_per_driver'] < 1:
+            raise CommandError('--drivers and --trips-per-driver must be at least 1')
+        if not 1 <= options['min_days'] <= options['max_days']:
+            raise CommandError('Need 1 <= --min-days <= --max-days')
+        if not 3 <= options['min_activities'] <= options['max_activities'] <= 96:
+            raise CommandError('Need 3 <= --min-activities <= --max-activities <= 96')
+
+        started = time.monotonic()
+        with transaction.atomic():
+            counts = generate_fleet(
+                drivers=options['drivers'],
+                trips_per_driver=options['trips_per_driver'],
+                min_days=options['min_days'],
+                max_days=options['max_days'],
+                min_activities=options['min_activities'],
+                max_activities=options['max_activities'],
+                routes=not options['no_routes'],
+                seed=options['seed'],
+                prefix=options['prefix'],
+                password=options['password'],
+                routing_providers=[name.strip() for name in options['providers'].split(',') if name.strip()],
+            )
+
+        usernames = counts.pop('usernames')
+        summary = ', '.join(f"{count:,} {name.replace('_', ' ')}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary} in {time.monotonic() - started:.1f}s'))
+        self.stdout.write(f'Users: {usernames[0]} .. {usernames[-1]}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.services.duty_rollup import DutyRollupService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-driver daily duty rollups used by the 70-hour/8-day cycle check'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--driver', type=int, help='Only rebuild rollups for this driver id')
+
+    def handle(self, *args, **options):
+        written = DutyRollupService.rebuild(driver_id=options.get('driver'))
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} rollup rows'))
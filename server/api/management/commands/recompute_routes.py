@@ -0,0 +1,138 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import TripStatus
+from api.services.route_batch import RouteBatchRecalculator, RouteCheckpoint
+
+
+class Command(BaseCommand):
+    help = 'Recompute routes for a filtered set of trips on a rate-limited thread pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--status',
+            action='append',
+            choices=TripStatus.values,
+            help='Only trips with this status (repeatable; default: all)',
+        )
+        parser.add_argument(
+            '--provider',
+            action='append',
+            help="Only trips whose route came from this provider, e.g. haversine "
+                 "(repeatable; 'none' selects trips without a route)",
+        )
+        parser.add_argument('--trip', type=int, action='append', help='Only this trip id (repeatable)')
+        parser.add_argument('--limit', type=int, default=0, help='Stop after this many trips (default: all)')
+        parser.add_argument('--workers', type=int, default=4, help='Routing threads (default: 4)')
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=10,
+            help='Provider requests per second across all threads, 0 for unlimited (default: 10)',
+        )
+        parser.add_argument('--burst', type=int, default=0, help='Token bucket size (default: the rate)')
+        parser.add_argument(
+            '--checkpoint',
+            help='JSON progress file; rerunning with the same file skips trips already done',
+        )
+        parser.add_argument(
+            '--checkpoint-every',
+            type=int,
+            default=25,
+            help='Save the checkpoint after this many trips (default: 25)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='List the selection and exit')
+        parser.add_argument('--quiet', action='store_true', help='Only print the summary')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        if options['rate'] < 0:
+            raise CommandError('--rate must not be negative')
+
+        providers = [
+            '' if provider == 'none' else provider
+            for provider in options['provider'] or []
+        ]
+        trip_ids = RouteBatchRecalculator.select_trips(
+            statuses=options['status'], providers=providers, trip_ids=options['trip'],
+        )
+        if options['limit']:
+            trip_ids = trip_ids[:options['limit']]
+
+        checkpoint = RouteCheckpoint.load(options['checkpoint'])
+        remaining = sum(1 for trip_id in trip_ids if trip_id not in checkpoint.done)
+        self.stdout.write(
+            f'Selected {len(trip_ids)} trip(s), {remaining} to recompute '
+            f'({options["workers"]} workers, {options["rate"] or "unlimited"} requests/s)'
+        )
+        if options['dry_run'] or not remaining:
+            return
+
+        stop_event = threading.Event()
+
+        def request_stop(signum, frame):
+            self.stdout.write(self.style.WARNING('Stopping after trips in flight...'))
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        done = [0]
+
+        def report(result):
+            trip_id, outcome, provider, seconds, error = result
+            done[0] += 1
+            if options['quiet']:
+                return
+            message = f'[{done[0]}/{remaining}] Trip {trip_id}: {outcome} ({provider or "-"}) in {seconds * 1000:.0f}ms'
+            if outcome == RouteBatchRecalculator.SUCCEEDED:
+                self.stdout.write(self.style.SUCCESS(message))
+            elif outcome == RouteBatchRecalculator.FALLBACK:
+                self.stdout.write(self.style.WARNING(message))
+            else:
+                self.stdout.write(self.style.ERROR(f'{message} - {error}'))
+
+        summary = RouteBatchRecalculator.run(
+            trip_ids,
+            workers=options['workers'],
+            rate=options['rate'],
+            burst=options['burst'] or None,
+            stale_providers=providers,
+            checkpoint=checkpoint,
+            checkpoint_every=options['checkpoint_every'],
+            on_result=report,
+            stop_event=stop_event,
+        )
+        self._write_summary(summary, options['checkpoint'])
+
+    def _write_summary(self, summary, checkpoint_path):
+        self.stdout.write('')
+        self.stdout.write(
+            f"Recomputed {summary['succeeded'] + summary['fallback'] + summary['failed']} trip(s) "
+            f"in {summary['elapsed_seconds']:.1f}s ({summary['trips_per_second']:.1f} trips/s), "
+            f"skipped {summary['skipped']} already done"
+        )
+        self.stdout.write(self.style.SUCCESS(f"  succeeded: {summary['succeeded']}"))
+        if summary['fallback']:
+            self.stdout.write(self.style.WARNING(
+                f"  fallback:  {summary['fallback']} (still on a selected provider; retried on resume)"
+            ))
+        if summary['failed']:
+            self.stdout.write(self.style.ERROR(f"  failed:    {summary['failed']}"))
+        providers = ', '.join(f'{name}={count}' for name, count in sorted(summary['providers'].items()))
+        self.stdout.write(f'  providers: {providers or "-"}')
+        if summary['provider_requests'] is not None:
+            self.stdout.write(
+                f"  provider requests: {summary['provider_requests']} "
+                f"(throttled {summary['throttled_seconds']:.1f}s)"
+            )
+        self.stdout.write(
+            f"  per trip: p50 {summary['p50_seconds'] * 1000:.0f}ms, p95 {summary['p95_seconds'] * 1000:.0f}ms"
+        )
+        if summary['stopped']:
+            self.stdout.write(self.style.WARNING('  stopped early'))
+        if checkpoint_path:
+            self.stdout.write(f'  checkpoint: {checkpoint_path}')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from api.services.route_cache import DirectionsCache
+
+
+class Command(BaseCommand):
+    help = 'Inspect or maintain the directions/distance response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'operation',
+            nargs='?',
+            default='stats',
+            choices=['stats', 'evict', 'clear'],
+            help='stats: show counters (default), evict: purge expired/overflow entries, clear: drop everything',
+        )
+
+    def handle(self, *args, **options):
+        operation = options['operation']
+
+        if operation == 'evict':
+            removed = DirectionsCache.evict()
+            self.stdout.write(self.style.SUCCESS(f'Evicted {removed} entries'))
+        elif operation == 'clear':
+            DirectionsCache.clear()
+            self.stdout.write(self.style.SUCCESS('Route cache cleared'))
+
+        stats = DirectionsCache.stats()
+        self.stdout.write(
+            f"entries={stats['entries']} hits={stats['hits']} misses={stats['misses']} "
+            f"evictions={stats['evictions']} hit_rate={stats['hit_rate']:.1%}"
+        )
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks.maps_stub import MapsStubServer
+
+
+class Command(BaseCommand):
+    help = 'Serve a local stand-in for the Google Directions API (point MAPS_API_BASE_URL at it)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+        parser.add_argument('--fixtures', help='JSON file of recorded responses to serve (and record into)')
+        parser.add_argument(
+            '--record',
+            action='store_true',
+            help='Fetch fixture misses from the real API (MAPS upstream, GOOGLE_MAPS_API_KEY) and save them',
+        )
+        parser.add_argument(
+            '--no-synthetic',
+            action='store_true',
+            help='Answer ZERO_RESULTS instead of generating a route when no fixture matches',
+        )
+        parser.add_argument('--latency-ms', type=float, default=0, help='Delay before each response')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Extra random delay, up to this much')
+        parser.add_argument('--error-rate', type=float, default=0, help='Share of requests failing with HTTP 500')
+        parser.add_argument(
+            '--rate-limit-rate',
+            type=float,
+            default=0,
+            help='Share of requests answered with status OVER_QUERY_LIMIT',
+        )
+        parser.add_argument(
+            '--max-rps',
+            type=int,
+            default=0,
+            help='Answer HTTP 429 beyond this many requests per second (default: no limit)',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for latency and failures')
+
+    def handle(self, *args, **options):
+        for name in ('error_rate', 'rate_limit_rate'):
+            if not 0 <= options[name] <= 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be between 0 and 1")
+        if options['record'] and not options['fixtures']:
+            raise CommandError('--record needs --fixtures to save into')
+
+        upstream = None
+        if options['record']:
+            if not getattr(settings, 'GOOGLE_MAPS_API_KEY', ''):
+                raise CommandError('--record needs GOOGLE_MAPS_API_KEY')
+            upstream = 'https://maps.googleapis.com'
+
+        stub = MapsStubServer(
+            host=options['host'],
+            port=options['port'],
+            fixtures=options['fixtures'],
+            synthetic=not options['no_synthetic'],
+            upstream=upstream,
+            upstream_key=getattr(settings, 'GOOGLE_MAPS_API_KEY', ''),
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+            max_rps=options['max_rps'],
+            seed=options['seed'],
+        )
+        self.stdout.write(
+            f'Maps stub listening on {stub.base_url} ({len(stub.fixtures)} fixture(s)); '
+            f'set MAPS_API_BASE_URL={stub.base_url}'
+        )
+        try:
+            stub.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stub.httpd.server_close()
+        self.stdout.write(f'Served: {stub.snapshot()}')
@@ -0,0 +1,74 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.models import RouteJobStatus
+from api.services.route_jobs import RouteJobQueue
+
+
+class Command(BaseCommand):
+    help = 'Process queued route calculation jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue and exit instead of polling forever',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep when the queue is empty (default: 1.0)',
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=0,
+            help='Exit after processing this many jobs (default: unlimited)',
+        )
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        processed = 0
+        self.stdout.write('Route worker started')
+
+        while not self._stopping:
+            close_old_connections()
+
+            requeued, failed = RouteJobQueue.requeue_stale()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale job(s)'))
+            if failed:
+                self.stdout.write(self.style.ERROR(f'Failed {failed} stale job(s) out of attempts'))
+
+            job = RouteJobQueue.claim_next()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            started = time.monotonic()
+            job = RouteJobQueue.run(job)
+            elapsed_ms = (time.monotonic() - started) * 1000
+            processed += 1
+
+            message = f'Job {job.id} (trip {job.trip_id}): {job.status} in {elapsed_ms:.0f}ms'
+            if job.status == RouteJobStatus.SUCCEEDED:
+                self.stdout.write(self.style.SUCCESS(message))
+            else:
+                self.stdout.write(self.style.ERROR(f'{message} - {job.error}'))
+
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+
+        self.stdout.write(f'Route worker stopped after {processed} job(s)')
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
@@ -0,0 +1,52 @@
+import json
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .instrumentation import RequestProfile, profiling
+
+
+logger = logging.getLogger('api.timing')
+
+
+class ServerTimingMiddleware:
+    """
+    Per-request instrumentation: SQL query count and time, external HTTP
+    (maps) time and named service spans (see api.instrumentation).
+
+    Adds them to the response as a Server-Timing header and logs one JSON
+    line per request to the 'api.timing' logger (only requests slower than
+    SERVER_TIMING_LOG_MIN_MS, if set).
+
+    Opt-in with SERVER_TIMING_ENABLED. When disabled the middleware removes
+    itself at startup (MiddlewareNotUsed), so requests pay nothing for it.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.log_min_ms = settings.SERVER_TIMING_LOG_MIN_MS
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile.execute_wrapper))
+            stack.enter_context(profiling(profile))
+            response = self.get_response(request)
+
+        response['Server-Timing'] = profile.server_timing()
+
+        timings = profile.as_dict()
+        if timings['total_ms'] >= self.log_min_ms:
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **timings,
+            }))
+        return response
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_existing_routes_ready(apps, schema_editor):
+    Trip = apps.get_model('api', 'Trip')
+    Trip.objects.filter(route__isnull=False).update(route_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_route_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='route_status',
+            field=models.CharField(choices=[('not_calculated', 'Not Calculated'), ('pending', 'Pending'), ('calculating', 'Calculating'), ('ready', 'Ready'), ('failed', 'Failed')], default='not_calculated', max_length=32),
+        ),
+        migrations.CreateModel(
+            name='RouteJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=3)),
+                ('error', models.TextField(blank=True)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='route_jobs', to='api.trip')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='api_routejo_status_25e0cc_idx')],
+            },
+        ),
+        migrations.RunPython(mark_existing_routes_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_route_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='route',
+            name='calculated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='route',
+            name='origin_location',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
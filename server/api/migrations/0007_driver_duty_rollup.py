@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_duty_rollups(apps, schema_editor):
+    Activity = apps.get_model('api', 'Activity')
+    DriverDutyRollup = apps.get_model('api', 'DriverDutyRollup')
+
+    grouped = {}
+    rows = Activity.objects.filter(
+        status__in=['driving', 'on_duty_not_driving']
+    ).values_list('daily_log__trip__driver_id', 'daily_log__date', 'status').annotate(
+        total=Sum('duration_minutes')
+    )
+    for driver_id, date, status, total in rows:
+        rollup = grouped.setdefault(
+            (driver_id, date),
+            DriverDutyRollup(driver_id=driver_id, date=date, on_duty_minutes=0, driving_minutes=0),
+        )
+        rollup.on_duty_minutes += total or 0
+        if status == 'driving':
+            rollup.driving_minutes += total or 0
+
+    DriverDutyRollup.objects.bulk_create(grouped.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_route_recalc_debounce'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverDutyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('on_duty_minutes', models.PositiveIntegerField(default=0)),
+                ('driving_minutes', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duty_rollups', to='api.driver')),
+            ],
+            options={
+                'unique_together': {('driver', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_duty_rollups, migrations.RunPython.noop),
+    ]
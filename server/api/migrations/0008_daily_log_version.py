@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_driver_duty_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailylog',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
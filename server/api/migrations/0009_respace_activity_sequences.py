@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:27
+
+from django.db import migrations
+
+
+SEQUENCE_GAP = 1024
+
+
+def respace_sequences(apps, schema_editor):
+    Activity = apps.get_model('api', 'Activity')
+
+    batch = []
+    current_log = None
+    index = 0
+    for activity in Activity.objects.order_by('daily_log_id', 'sequence', 'start_time').only(
+        'id', 'daily_log_id', 'sequence'
+    ).iterator():
+        if activity.daily_log_id != current_log:
+            current_log = activity.daily_log_id
+            index = 0
+        index += 1
+        activity.sequence = index * SEQUENCE_GAP
+        batch.append(activity)
+
+        if len(batch) >= 1000:
+            Activity.objects.bulk_update(batch, ['sequence'])
+            batch = []
+
+    if batch:
+        Activity.objects.bulk_update(batch, ['sequence'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_daily_log_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(respace_sequences, migrations.RunPython.noop),
+    ]
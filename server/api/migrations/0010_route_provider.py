@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_respace_activity_sequences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='route',
+            name='provider',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
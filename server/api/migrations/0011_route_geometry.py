@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_route_provider'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='route',
+            name='cumulative_miles',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.AddField(
+            model_name='route',
+            name='geometry',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_route_geometry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requiredstop',
+            name='eta',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='route',
+            name='estimated_arrival',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='requiredstop',
+            name='type',
+            field=models.CharField(choices=[('fuel', 'Fuel'), ('30min_break', '30 Minute Break'), ('10hr_rest', '10 Hour Rest'), ('34hr_restart', '34 Hour Restart'), ('pickup', 'Pickup'), ('dropoff', 'Dropoff')], max_length=32),
+        ),
+    ]
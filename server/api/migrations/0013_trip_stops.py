@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_trip_simulation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='stops',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
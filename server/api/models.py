@@ -2,6 +2,7 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 
 class DriverRole(models.TextChoices):
@@ -30,6 +31,14 @@ class TripStatus(models.TextChoices):
     COMPLETED = 'completed', 'Completed'
 
 
+class RouteStatus(models.TextChoices):
+    NOT_CALCULATED = 'not_calculated', 'Not Calculated'
+    PENDING = 'pending', 'Pending'
+    CALCULATING = 'calculating', 'Calculating'
+    READY = 'ready', 'Ready'
+    FAILED = 'failed', 'Failed'
+
+
 class Trip(models.Model):
     driver = models.ForeignKey(Driver, on_delete=models.CASCADE, related_name='trips')
     status = models.CharField(max_length=32, choices=TripStatus.choices, default=TripStatus.PLANNING)
@@ -39,6 +48,7 @@ class Trip(models.Model):
     current_location = models.JSONField(default=dict)
     pickup_location = models.JSONField(default=dict)
     dropoff_location = models.JSONField(default=dict)
+    stops = models.JSONField(default=list, blank=True)  # ordered intermediate drops between pickup and dropoff
     current_cycle_hours = models.FloatField(default=0.0)
 
     # Calculated
@@ -46,6 +56,7 @@ class Trip(models.Model):
     estimated_duration = models.FloatField(default=0.0)  # hours
     start_datetime = models.DateTimeField(null=True, blank=True)
     end_datetime = models.DateTimeField(null=True, blank=True)
+    route_status = models.CharField(max_length=32, choices=RouteStatus.choices, default=RouteStatus.NOT_CALCULATED)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -83,6 +94,9 @@ class DailyLog(models.Model):
     driving_hours = models.FloatField(default=0.0)
     on_duty_not_driving_hours = models.FloatField(default=0.0)
 
+    # Bumped whenever the activities change; keys cached HOS compliance results
+    version = models.PositiveIntegerField(default=0)
+
     class Meta:
         unique_together = ('trip', 'date')
 
@@ -120,11 +134,33 @@ class Activity(models.Model):
         return f"{self.status} {self.start_time}-{self.end_time} (Log {self.daily_log_id})"
 
 
+class DriverDutyRollup(models.Model):
+    """Per-driver, per-date duty minutes across all trips, for the 70-hour/8-day cycle."""
+    driver = models.ForeignKey(Driver, on_delete=models.CASCADE, related_name='duty_rollups')
+    date = models.DateField()
+    on_duty_minutes = models.PositiveIntegerField(default=0)  # driving + on duty not driving
+    driving_minutes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('driver', 'date')
+
+    def __str__(self) -> str:
+        return f"DutyRollup {self.date} (Driver {self.driver_id}): {self.on_duty_minutes} min on duty"
+
+
 class Route(models.Model):
     trip = models.OneToOneField(Trip, on_delete=models.CASCADE, related_name='route')
     waypoints = models.JSONField(default=list)
     total_distance = models.FloatField(default=0.0)
     estimated_time = models.FloatField(default=0.0)
+    origin_location = models.JSONField(default=dict, blank=True)  # trip.current_location used for this calculation
+    calculated_at = models.DateTimeField(null=True, blank=True)
+    provider = models.CharField(max_length=32, blank=True, default='')  # routing backend that produced it
+    geometry = models.BinaryField(blank=True, default=b'')  # packed float32 lat/lng pairs, see RouteGeometry
+    cumulative_miles = models.BinaryField(blank=True, default=b'')  # packed float32 miles at each geometry point
+    estimated_arrival = models.DateTimeField(null=True, blank=True)  # dropoff complete, from the HOS simulation
+    input_fingerprint = models.CharField(max_length=64, blank=True, default='')  # hash of the trip inputs it was computed from
 
     def __str__(self) -> str:
         return f"Route for Trip {self.trip_id}"
@@ -134,6 +170,7 @@ class RequiredStopType(models.TextChoices):
     FUEL = 'fuel', 'Fuel'
     BREAK_30 = '30min_break', '30 Minute Break'
     REST_10HR = '10hr_rest', '10 Hour Rest'
+    RESTART_34 = '34hr_restart', '34 Hour Restart'
     PICKUP = 'pickup', 'Pickup'
     DROPOFF = 'dropoff', 'Dropoff'
 
@@ -145,8 +182,77 @@ class RequiredStop(models.Model):
     duration_minutes = models.PositiveIntegerField(default=0)
     miles_from_start = models.FloatField(default=0.0)
     reason = models.CharField(max_length=256, blank=True)
+    eta = models.DateTimeField(null=True, blank=True)
 
     def __str__(self) -> str:
         return f"{self.type} at {self.miles_from_start} mi (Route {self.route_id})"
 
 
+
+
+class RouteJobStatus(models.TextChoices):
+    QUEUED = 'queued', 'Queued'
+    RUNNING = 'running', 'Running'
+    SUCCEEDED = 'succeeded', 'Succeeded'
+    FAILED = 'failed', 'Failed'
+
+
+class RouteJob(models.Model):
+    """Background route calculation for a trip, processed by the run_route_worker command."""
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='route_jobs')
+    status = models.CharField(max_length=16, choices=RouteJobStatus.choices, default=RouteJobStatus.QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)  # percent
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    error = models.TextField(blank=True)
+
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self) -> str:
+        return f"RouteJob {self.id} for Trip {self.trip_id} ({self.status})"
+
+
+class RouteCacheEntry(models.Model):
+    """Cached Directions API route, keyed by normalized origin/destination/waypoints."""
+    key = models.CharField(max_length=64, unique=True)
+    origin = models.CharField(max_length=512)
+    destination = models.CharField(max_length=512)
+    waypoints = models.JSONField(default=list)
+    response = models.JSONField(default=dict)  # routes[0] of the Directions response, without steps
+    hit_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed_at = models.DateTimeField(db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.origin} -> {self.destination} ({self.hit_count} hits)"
+
+
+class RouteCacheCounter(models.Model):
+    """Global hit/miss/eviction counters for the route cache."""
+    name = models.CharField(max_length=32, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.value}"
+
+
+class ComputationLock(models.Model):
+    """Lock row held while one caller computes a shared result (see SingleFlight)."""
+    key = models.CharField(max_length=191, unique=True)
+    owner = models.CharField(max_length=32)
+    expires_at = models.DateTimeField(db_index=True)  # a crashed holder's lock can be taken over after this
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.key} (until {self.expires_at})"
@@ -20,8 +20,10 @@ from .trip import (
     TripDetailSerializer,
     TripCreateSerializer,
     TripUpdateSerializer,
+    TripPlanSerializer,
     RouteSerializer,
     RequiredStopSerializer,
+    RouteJobSerializer,
 )
 from .log import (
     ActivitySerializer,
@@ -31,6 +33,8 @@ from .log import (
     DailyLogSummarySerializer,
     DailyLogCreateSerializer,
     DailyLogUpdateSerializer,
+    TimelineActivitySerializer,
+    DailyLogTimelineSerializer,
 )
 
 __all__ = [
@@ -54,8 +58,10 @@ __all__ = [
     'TripDetailSerializer',
     'TripCreateSerializer',
     'TripUpdateSerializer',
+    'TripPlanSerializer',
     'RouteSerializer',
     'RequiredStopSerializer',
+    'RouteJobSerializer',
     # Log
     'ActivitySerializer',
     'ActivityCreateSerializer',
@@ -64,5 +70,7 @@ __all__ = [
     'DailyLogSummarySerializer',
     'DailyLogCreateSerializer',
     'DailyLogUpdateSerializer',
+    'TimelineActivitySerializer',
+    'DailyLogTimelineSerializer',
 ]
 
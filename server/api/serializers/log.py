@@ -87,11 +87,11 @@ class DailyLogSerializer(serializers.ModelSerializer):
             'home_terminal', 'carrier_name', 'tractor_number', 'trailer_numbers',
             'shipper', 'commodity', 'shipping_doc_numbers', 'total_miles_driven',
             'total_truck_mileage', 'off_duty_hours', 'sleeper_berth_hours',
-            'driving_hours', 'on_duty_not_driving_hours', 'activities'
+            'driving_hours', 'on_duty_not_driving_hours', 'version', 'activities'
         ]
         read_only_fields = [
             'id', 'total_miles_driven', 'total_truck_mileage', 'off_duty_hours',
-            'sleeper_berth_hours', 'driving_hours', 'on_duty_not_driving_hours'
+            'sleeper_berth_hours', 'driving_hours', 'on_duty_not_driving_hours', 'version'
         ]
 
 
@@ -122,3 +122,17 @@ class DailyLogUpdateSerializer(serializers.ModelSerializer):
             'shipper', 'commodity', 'shipping_doc_numbers', 'driver_signature'
         ]
 
+
+
+class TimelineActivitySerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = Activity
+        fields = [
+            'id', 'status', 'start_time', 'end_time', 'location', 'end_location', 'remark', 'miles_driven'
+        ]
+
+
+class DailyLogTimelineSerializer(serializers.Serializer):
+    activities = TimelineActivitySerializer(many=True)
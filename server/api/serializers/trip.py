@@ -1,5 +1,47 @@
 from rest_framework import serializers
-from ..models import Trip, Route, RequiredStop
+from ..models import Trip, Route, RequiredStop, RouteJob
+from ..services.route_geometry import RouteGeometry
+from ..services.stop_order import StopOrderOptimizer
+from ..services.trip_planner import TripPlanner
+
+
+MAX_TRIP_STOPS = 100
+
+
+def _validate_stops(value):
+    """Intermediate stops: a list of location dicts"""
+    if not isinstance(value, list) or not all(isinstance(stop, dict) for stop in value):
+        raise serializers.ValidationError('Expected a list of location objects.')
+    if len(value) > MAX_TRIP_STOPS:
+        raise serializers.ValidationError(f'At most {MAX_TRIP_STOPS} stops allowed.')
+    return value
+
+
+def _validate_location(value):
+    """A location dict (address and/or latitude/longitude)"""
+    if not isinstance(value, dict):
+        raise serializers.ValidationError('Expected a location object.')
+    return value
+
+
+class _TripStopsMixin:
+    """Validates `stops` and reorders them when `optimize_stops` is set"""
+    
+    def validate_stops(self, value):
+        return _validate_stops(value)
+    
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs.pop('optimize_stops', False):
+            def current(field):
+                return attrs.get(field, getattr(self.instance, field, None)) or {}
+            
+            attrs['stops'] = StopOrderOptimizer.optimize(
+                current('pickup_location') or current('current_location'),
+                current('stops'),
+                current('dropoff_location'),
+            )
+        return attrs
 
 
 class TripSerializer(serializers.ModelSerializer):
@@ -7,11 +49,11 @@ class TripSerializer(serializers.ModelSerializer):
         model = Trip
         fields = [
             'id', 'driver', 'status', 'name', 'current_location', 'pickup_location',
-            'dropoff_location', 'current_cycle_hours', 'total_distance',
-            'estimated_duration', 'start_datetime', 'end_datetime',
+            'stops', 'dropoff_location', 'current_cycle_hours', 'total_distance',
+            'estimated_duration', 'start_datetime', 'end_datetime', 'route_status',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['driver', 'created_at', 'updated_at']
+        read_only_fields = ['driver', 'route_status', 'created_at', 'updated_at']
 
 
 class TripDetailSerializer(serializers.ModelSerializer):
@@ -21,43 +63,104 @@ class TripDetailSerializer(serializers.ModelSerializer):
         model = Trip
         fields = [
             'id', 'driver', 'status', 'name', 'current_location', 'pickup_location',
-            'dropoff_location', 'current_cycle_hours', 'total_distance',
-            'estimated_duration', 'start_datetime', 'end_datetime',
+            'stops', 'dropoff_location', 'current_cycle_hours', 'total_distance',
+            'estimated_duration', 'start_datetime', 'end_datetime', 'route_status',
             'created_at', 'updated_at', 'daily_logs_count'
         ]
-        read_only_fields = ['driver', 'created_at', 'updated_at']
+        read_only_fields = ['driver', 'route_status', 'created_at', 'updated_at']
 
 
-class TripCreateSerializer(serializers.ModelSerializer):
+class TripCreateSerializer(_TripStopsMixin, serializers.ModelSerializer):
+    optimize_stops = serializers.BooleanField(write_only=True, required=False, default=False)
+    
     class Meta:
         model = Trip
         fields = [
-            'name', 'current_location', 'pickup_location', 'dropoff_location',
-            'current_cycle_hours'
+            'name', 'current_location', 'pickup_location', 'stops', 'dropoff_location',
+            'current_cycle_hours', 'optimize_stops'
         ]
 
 
-class TripUpdateSerializer(serializers.ModelSerializer):
+class TripUpdateSerializer(_TripStopsMixin, serializers.ModelSerializer):
+    optimize_stops = serializers.BooleanField(write_only=True, required=False, default=False)
+    
     class Meta:
         model = Trip
         fields = [
-            'name', 'current_location', 'pickup_location', 'dropoff_location',
-            'current_cycle_hours'
+            'name', 'current_location', 'pickup_location', 'stops', 'dropoff_location',
+            'current_cycle_hours', 'optimize_stops'
         ]
 
 
+class TripPlanSerializer(serializers.Serializer):
+    """What-if planning request: trip locations, driver HOS state and a departure grid"""
+    current_location = serializers.JSONField(validators=[_validate_location])
+    pickup_location = serializers.JSONField(required=False, default=dict, validators=[_validate_location])
+    stops = serializers.JSONField(required=False, default=list, validators=[_validate_stops])
+    dropoff_location = serializers.JSONField(validators=[_validate_location])
+    
+    # Driver HOS state now
+    current_cycle_hours = serializers.FloatField(min_value=0, max_value=70, default=0.0)
+    shift_driving_hours = serializers.FloatField(min_value=0, max_value=24, default=0.0)
+    shift_elapsed_hours = serializers.FloatField(min_value=0, max_value=24, required=False, allow_null=True, default=None)
+    driving_since_break_hours = serializers.FloatField(min_value=0, max_value=24, default=0.0)
+    
+    # Candidate departures: every interval_minutes from earliest_departure for window_hours
+    earliest_departure = serializers.DateTimeField(required=False)
+    window_hours = serializers.FloatField(min_value=0, max_value=7 * 24, default=24)
+    interval_minutes = serializers.IntegerField(min_value=5, max_value=24 * 60, default=60)
+    deliver_by = serializers.DateTimeField(required=False, allow_null=True, default=None)
+    optimize_stops = serializers.BooleanField(default=False)
+    
+    def validate(self, attrs):
+        for field in ('current_location', 'dropoff_location'):
+            if not attrs.get(field):
+                raise serializers.ValidationError({field: 'This field is required.'})
+        
+        if attrs.pop('optimize_stops'):
+            attrs['stops'] = StopOrderOptimizer.optimize(
+                attrs['pickup_location'] or attrs['current_location'], attrs['stops'], attrs['dropoff_location']
+            )
+        
+        count = int(attrs['window_hours'] * 60 // attrs['interval_minutes']) + 1
+        if count > TripPlanner.MAX_CANDIDATES:
+            raise serializers.ValidationError(
+                f'{count} candidate departures requested; at most {TripPlanner.MAX_CANDIDATES} allowed'
+            )
+        return attrs
+
+
 class RequiredStopSerializer(serializers.ModelSerializer):
     class Meta:
         model = RequiredStop
-        fields = ['id', 'type', 'location', 'duration_minutes', 'miles_from_start', 'reason']
+        fields = ['id', 'type', 'location', 'duration_minutes', 'miles_from_start', 'reason', 'eta']
         read_only_fields = ['id']
 
 
 class RouteSerializer(serializers.ModelSerializer):
     stops = RequiredStopSerializer(many=True, read_only=True)
+    polyline = serializers.SerializerMethodField()
 
     class Meta:
         model = Route
-        fields = ['id', 'trip', 'waypoints', 'total_distance', 'estimated_time', 'stops']
-        read_only_fields = ['id', 'trip']
+        fields = [
+            'id', 'trip', 'waypoints', 'total_distance', 'estimated_time', 'estimated_arrival',
+            'provider', 'polyline', 'stops'
+        ]
+        read_only_fields = ['id', 'trip', 'provider', 'estimated_arrival']
 
+    def get_polyline(self, obj) -> str:
+        """Route geometry as a Google encoded polyline ('' if none stored)"""
+        geometry = RouteGeometry.from_route(obj)
+        return geometry.polyline() if geometry else ''
+
+
+
+class RouteJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RouteJob
+        fields = [
+            'id', 'trip', 'status', 'progress', 'attempts', 'max_attempts', 'error',
+            'run_after', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,43 @@
+import copy
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class ComplianceCache:
+    """
+    Caches per-day HOS compliance results under the daily log's version.
+
+    DailyLog.version is bumped on every activity change, so a changed log
+    simply stops matching its old keys; nothing is ever invalidated
+    explicitly and stale entries age out with HOS_COMPLIANCE_CACHE_TIMEOUT.
+    """
+
+    @staticmethod
+    def make_key(rule_set, daily_log, previous_daily_log=None, check_rest=False):
+        """
+        Build the cache key for a daily log's compliance result.
+
+        Args:
+            rule_set: identifier of the rules that produced the result
+            daily_log: DailyLog instance (its pk and version are used)
+            previous_daily_log: previous day's DailyLog, when the rest check is included
+            check_rest: whether the 10-hour rest check is part of the result
+        """
+        key = f'hos:{rule_set}:{daily_log.pk}:{daily_log.version}'
+        if check_rest:
+            if previous_daily_log is not None:
+                key += f':rest:{previous_daily_log.pk}:{previous_daily_log.version}'
+            else:
+                key += ':rest:none'
+        return key
+
+    @staticmethod
+    def get(key):
+        """Get a cached result (a copy, safe to mutate), or None"""
+        result = cache.get(key)
+        return copy.deepcopy(result) if result is not None else None
+
+    @staticmethod
+    def set(key, result):
+        cache.set(key, copy.deepcopy(result), getattr(settings, 'HOS_COMPLIANCE_CACHE_TIMEOUT', 24 * 60 * 60))
@@ -1,41 +1,51 @@
-import requests
 from django.conf import settings
 
+from .geo import format_location
+from .maps_client import get_maps_client
+from .route_cache import DirectionsCache
+
 
 class DistanceCalculator:
     """
     Calculates distance between two locations using Google Directions API.
     """
     
+    # Directions API limit on intermediate waypoints per request
+    MAX_WAYPOINTS = 25
+    
     @staticmethod
-    def _format_location(location):
+    def _request_route(origin, destination, waypoints):
         """
-        Format location dict to string for Google Directions API.
+        Request one route from the Google Directions API.
         
-        Args:
-            location: dict with address, latitude, longitude, etc.
-            
         Returns:
-            String address or lat,lng format, or None if invalid
+            dict: routes[0] of the response, or None on error
         """
-        if not location:
+        return get_maps_client().directions(origin, destination, waypoints)
+    
+    @staticmethod
+    def _route_miles(route):
+        """Sum leg distances of a Directions route, in miles (None if malformed)"""
+        try:
+            # Sum distance from all legs
+            total_distance_meters = 0
+            for leg in route.get('legs', []):
+                if leg.get('distance', {}).get('value'):
+                    total_distance_meters += leg['distance']['value']
+            
+            # Convert meters to miles
+            return total_distance_meters / 1609.34
+            
+        except (KeyError, ValueError, TypeError, AttributeError):
             return None
-        
-        # Prefer formatted address
-        if location.get('address'):
-            return location['address']
-        
-        # Fall back to lat,lng
-        if location.get('latitude') is not None and location.get('longitude') is not None:
-            return f"{location['latitude']},{location['longitude']}"
-        
-        return None
     
     @staticmethod
     def calculate_distance(start_location, end_location):
         """
         Calculate distance in miles between two locations using Google Directions API.
         
+        A leg cached by calculate_distances answers it as well as a full route.
+        
         Args:
             start_location: dict with address or lat/lng
             end_location: dict with address or lat/lng
@@ -47,41 +57,114 @@ class DistanceCalculator:
         if not api_key:
             return None
         
-        origin = DistanceCalculator._format_location(start_location)
-        destination = DistanceCalculator._format_location(end_location)
+        origin = format_location(start_location)
+        destination = format_location(end_location)
         
         if not origin or not destination:
             return None
         
-        url = 'https://maps.googleapis.com/maps/api/directions/json'
-        params = {
-            'origin': origin,
-            'destination': destination,
-            'key': api_key,
-            'units': 'imperial',  # Get results in miles
-        }
+        route = DirectionsCache.get(origin, destination, kind=DirectionsCache.KIND_LEG)
+        if route is None:
+            route = DirectionsCache.get(origin, destination)
         
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('status') != 'OK' or not data.get('routes'):
+        if route is None:
+            route = DistanceCalculator._request_route(origin, destination, [])
+            if route is None:
                 return None
+            DirectionsCache.set(origin, destination, [], route)
+        
+        return DistanceCalculator._route_miles(route)
+    
+    @staticmethod
+    def _connected_runs(pairs):
+        """
+        Split (origin, destination) pairs into runs of consecutive pairs that
+        share an endpoint, as lists of points: [(a, b), (b, c), (d, e)] gives
+        [[a, b, c], [d, e]]. No leg joins one run to the next.
+        """
+        normalize = DirectionsCache.normalize
+        runs = []
+        for origin, destination in pairs:
+            if runs and normalize(runs[-1][-1]) == normalize(origin):
+                runs[-1].append(destination)
+            else:
+                runs.append([origin, destination])
+        return runs
+    
+    @staticmethod
+    def calculate_distances(pairs):
+        """
+        Calculate distances for many (start_location, end_location) pairs with
+        as few Directions requests as possible.
+        
+        Cached pairs are answered from DirectionsCache in one query. The rest
+        are grouped into runs of consecutive pairs that share an endpoint, and
+        each run is requested as multi-waypoint routes of up to MAX_WAYPOINTS
+        stops, so only legs some pair asked for are requested. The legs are
+        cached in one write as their own origin/destination pairs, under
+        DirectionsCache.KIND_LEG since a leg has no route geometry.
+        
+        Args:
+            pairs: list of (start_location, end_location) dicts
             
-            route = data['routes'][0]
-            
-            # Sum distance from all legs
-            total_distance_meters = 0
-            for leg in route.get('legs', []):
-                if leg.get('distance', {}).get('value'):
-                    total_distance_meters += leg['distance']['value']
-            
-            # Convert meters to miles
-            distance_miles = total_distance_meters / 1609.34
-            
-            return distance_miles
-            
-        except (requests.RequestException, KeyError, ValueError, TypeError):
-            return None
-
+        Returns:
+            list: distance in miles (or None) for each pair, in input order
+        """
+        results = [None] * len(pairs)
+        
+        api_key = getattr(settings, 'GOOGLE_MAPS_API_KEY', '')
+        if not api_key:
+            return results
+        
+        normalize = DirectionsCache.normalize
+        
+        # normalized (origin, destination) -> formatted pair and the indexes asking for it
+        requested = {}
+        for i, (start_location, end_location) in enumerate(pairs):
+            origin = format_location(start_location)
+            destination = format_location(end_location)
+            if origin and destination:
+                pair = requested.setdefault((normalize(origin), normalize(destination)), [(origin, destination), []])
+                pair[1].append(i)
+        
+        if not requested:
+            return results
+        
+        cached = DirectionsCache.get_many(
+            [pair for pair, _ in requested.values()], kind=DirectionsCache.KIND_LEG
+        )
+        pending = []
+        for (pair, indexes), route in zip(requested.values(), cached):
+            if route is None:
+                pending.append(pair)
+                continue
+            miles = DistanceCalculator._route_miles(route)
+            for i in indexes:
+                results[i] = miles
+        
+        if not pending:
+            return results
+        
+        # Each request covers up to MAX_WAYPOINTS + 1 legs; chunks share their boundary point
+        legs = []
+        step = DistanceCalculator.MAX_WAYPOINTS + 1
+        for points in DistanceCalculator._connected_runs(pending):
+            for start in range(0, len(points) - 1, step):
+                chunk = points[start:start + step + 1]
+                route = DistanceCalculator._request_route(chunk[0], chunk[-1], chunk[1:-1])
+                if route is None:
+                    continue
+                for origin, destination, leg in zip(chunk, chunk[1:], route.get('legs', [])):
+                    legs.append((origin, destination, {'legs': [leg]}))
+        
+        DirectionsCache.set_many(legs, kind=DirectionsCache.KIND_LEG)
+        
+        for origin, destination, leg_route in legs:
+            pair = requested.get((normalize(origin), normalize(destination)))
+            if pair is None:
+                continue
+            miles = DistanceCalculator._route_miles(leg_route)
+            for i in pair[1]:
+                results[i] = miles
+        
+        return results
@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models import Sum
+
+from ..models import Activity, ActivityStatus, DriverDutyRollup
+
+
+ON_DUTY_STATUSES = (ActivityStatus.DRIVING, ActivityStatus.ON_DUTY_NOT_DRIVING)
+
+
+class DutyRollupService:
+    """
+    Maintains DriverDutyRollup rows so the 70-hour/8-day cycle is a single
+    range-sum over one driver's dates, across all of their trips.
+    """
+
+    @staticmethod
+    def refresh(driver_id, date):
+        """
+        Recompute one driver/date rollup from its activities.
+
+        Args:
+            driver_id: Driver primary key
+            date: datetime.date
+        """
+        totals = dict(
+            Activity.objects.filter(
+                daily_log__trip__driver_id=driver_id,
+                daily_log__date=date,
+                status__in=ON_DUTY_STATUSES,
+            ).values_list('status').annotate(total=Sum('duration_minutes'))
+        )
+
+        driving = totals.get(ActivityStatus.DRIVING, 0) or 0
+        on_duty = driving + (totals.get(ActivityStatus.ON_DUTY_NOT_DRIVING, 0) or 0)
+
+        if on_duty:
+            DriverDutyRollup.objects.update_or_create(
+                driver_id=driver_id,
+                date=date,
+                defaults={'on_duty_minutes': on_duty, 'driving_minutes': driving},
+            )
+        else:
+            DriverDutyRollup.objects.filter(driver_id=driver_id, date=date).delete()
+
+    @staticmethod
+    def on_duty_minutes(driver_id, start_date, end_date):
+        """Total on-duty minutes for a driver between two dates, inclusive (one query)"""
+        return DriverDutyRollup.objects.filter(
+            driver_id=driver_id,
+            date__gte=start_date,
+            date__lte=end_date,
+        ).aggregate(total=Sum('on_duty_minutes'))['total'] or 0
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(driver_id=None):
+        """
+        Rebuild rollups from scratch with one grouped query.
+
+        Args:
+            driver_id: limit to one driver (default: all drivers)
+
+        Returns:
+            int: number of rollup rows written
+        """
+        activities = Activity.objects.filter(status__in=ON_DUTY_STATUSES)
+        rollups = DriverDutyRollup.objects.all()
+        if driver_id is not None:
+            activities = activities.filter(daily_log__trip__driver_id=driver_id)
+            rollups = rollups.filter(driver_id=driver_id)
+
+        grouped = {}
+        rows = activities.values_list(
+            'daily_log__trip__driver_id', 'daily_log__date', 'status'
+        ).annotate(total=Sum('duration_minutes'))
+        for row_driver_id, date, status, total in rows:
+            rollup = grouped.setdefault(
+                (row_driver_id, date),
+                DriverDutyRollup(driver_id=row_driver_id, date=date),
+            )
+            rollup.on_duty_minutes += total or 0
+            if status == ActivityStatus.DRIVING:
+                rollup.driving_minutes += total or 0
+
+        rollups.delete()
+        DriverDutyRollup.objects.bulk_create(grouped.values(), batch_size=1000)
+        return len(grouped)
@@ -0,0 +1,258 @@
+"""
+Great-circle distance helpers.
+
+Bulk functions take sequences of (lat, lng) pairs (or N x 2 arrays) and use
+NumPy when it is installed (`uv sync --extra geo`), falling back to tight
+pure-Python loops (the matrix fallback computes each point's cosine once).
+"""
+from math import pi, radians, cos, sin, asin, sqrt
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+
+EARTH_RADIUS_MILES = 3959
+
+_RADIANS = pi / 180
+
+HAS_NUMPY = np is not None
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles between two lat/lng points"""
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
+    return EARTH_RADIUS_MILES * 2 * asin(sqrt(a))
+
+
+def has_coordinates(location):
+    """
+    Whether a location dict has a latitude and longitude.
+
+    0.0 is a valid coordinate; only missing (None or empty) values count.
+    """
+    return bool(location) and all(
+        location.get(field) not in (None, '') for field in ('latitude', 'longitude')
+    )
+
+
+def format_location(location):
+    """
+    Format a location dict as a Directions API origin/destination string.
+
+    Returns:
+        The address if set, else "lat,lng", or None if it has neither
+    """
+    if not location:
+        return None
+
+    # Prefer formatted address
+    if location.get('address'):
+        return location['address']
+
+    # Fall back to lat,lng
+    if has_coordinates(location):
+        return f"{location['latitude']},{location['longitude']}"
+
+    return None
+
+
+def _prepare(points):
+    """(lat radians, lng radians, cos lat) for each (lat, lng) point"""
+    prepared = []
+    for lat, lng in points:
+        lat_r = radians(lat)
+        prepared.append((lat_r, radians(lng), cos(lat_r)))
+    return prepared
+
+
+def _as_array(points):
+    return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+
+def pairwise_distances(origins, destinations, use_numpy=None):
+    """
+    Distance in miles between origins[i] and destinations[i] for every i.
+
+    Args:
+        origins: sequence of (lat, lng), or an N x 2 array
+        destinations: sequence of (lat, lng), same length as origins
+        use_numpy: force (True) or skip (False) the NumPy path; default: when installed
+
+    Returns:
+        NumPy array (NumPy path) or list of floats, length N
+    """
+    if use_numpy is None:
+        use_numpy = HAS_NUMPY
+
+    if use_numpy:
+        a = np.radians(_as_array(origins))
+        b = np.radians(_as_array(destinations))
+        if a.shape != b.shape:
+            raise ValueError('origins and destinations must have the same length')
+
+        dlat = b[:, 0] - a[:, 0]
+        dlon = b[:, 1] - a[:, 1]
+        h = np.sin(dlat / 2) ** 2 + np.cos(a[:, 0]) * np.cos(b[:, 0]) * np.sin(dlon / 2) ** 2
+        return EARTH_RADIUS_MILES * 2 * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+    if len(origins) != len(destinations):
+        raise ValueError('origins and destinations must have the same length')
+
+    # Local names and a degree->radian factor keep the per-pair loop tight
+    _sin, _cos, _asin, _sqrt = sin, cos, asin, sqrt
+    half_rad = _RADIANS / 2
+    diameter = EARTH_RADIUS_MILES * 2
+
+    distances = []
+    append = distances.append
+    for (lat1, lng1), (lat2, lng2) in zip(origins, destinations):
+        h = (
+            _sin((lat2 - lat1) * half_rad) ** 2
+            + _cos(lat1 * _RADIANS) * _cos(lat2 * _RADIANS) * _sin((lng2 - lng1) * half_rad) ** 2
+        )
+        append(diameter * _asin(_sqrt(min(h, 1.0))))
+    return distances
+
+
+def path_length(points, use_numpy=None):
+    """Total miles along consecutive (lat, lng) points"""
+    if len(points) < 2:
+        return 0.0
+    return float(sum(pairwise_distances(points[:-1], points[1:], use_numpy=use_numpy)))
+
+
+def distance_matrix(origins, destinations=None, use_numpy=None):
+    """
+    Distance in miles from every origin to every destination.
+
+    Args:
+        origins: sequence of (lat, lng), or an N x 2 array
+        destinations: sequence of (lat, lng) (default: origins, for a square matrix)
+        use_numpy: force (True) or skip (False) the NumPy path; default: when installed
+
+    Returns:
+        N x M NumPy array (NumPy path) or list of N lists of M floats
+    """
+    if destinations is None:
+        destinations = origins
+    if use_numpy is None:
+        use_numpy = HAS_NUMPY
+
+    if use_numpy:
+        a = np.radians(_as_array(origins))
+        b = np.radians(_as_array(destinations))
+
+        lat1 = a[:, 0][:, None]
+        lat2 = b[:, 0][None, :]
+        dlat = lat2 - lat1
+        dlon = b[:, 1][None, :] - a[:, 1][:, None]
+        h = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+        return EARTH_RADIUS_MILES * 2 * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+    _sin, _asin, _sqrt = sin, asin, sqrt
+    diameter = EARTH_RADIUS_MILES * 2
+    cols = _prepare(destinations)
+
+    matrix = []
+    for lat1, lng1, cos1 in _prepare(origins):
+        matrix.append([
+            diameter * _asin(_sqrt(min(
+                _sin((lat2 - lat1) * 0.5) ** 2 + cos1 * cos2 * _sin((lng2 - lng1) * 0.5) ** 2,
+                1.0,
+            )))
+            for lat2, lng2, cos2 in cols
+        ])
+    return matrix
+
+
+class GridIndex:
+    """
+    Uniform lat/lng grid over a fixed set of points, for in-process
+    nearest-neighbour and radius queries.
+
+    Points are bucketed by (floor(lat / cell), floor(lng / cell)); a query
+    only measures the points in the cells its radius can reach.
+    """
+
+    def __init__(self, lats, lngs, cell_degrees=0.1):
+        self.lats = lats
+        self.lngs = lngs
+        self.cell_degrees = cell_degrees
+        self.cells = {}
+        for i, (lat, lng) in enumerate(zip(lats, lngs)):
+            self.cells.setdefault(self._cell(lat, lng), []).append(i)
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _cell(self, lat, lng):
+        return int(lat // self.cell_degrees), int(lng // self.cell_degrees)
+
+    def _cell_miles(self, lat):
+        """Narrowest cell dimension in miles at a latitude (longitude shrinks towards the poles)"""
+        return max(self.cell_degrees * 69 * cos(radians(abs(lat))), 0.1)
+
+    def within(self, lat, lng, radius_miles):
+        """
+        Points within radius_miles of (lat, lng).
+
+        Returns:
+            list of (index, miles), nearest first
+        """
+        row, col = self._cell(lat, lng)
+        lat_span = int(radius_miles / (self.cell_degrees * 69)) + 1
+        lng_span = int(radius_miles / self._cell_miles(lat)) + 1
+
+        found = []
+        lats, lngs = self.lats, self.lngs
+        for r in range(row - lat_span, row + lat_span + 1):
+            for c in range(col - lng_span, col + lng_span + 1):
+                for i in self.cells.get((r, c), ()):
+                    miles = haversine(lat, lng, lats[i], lngs[i])
+                    if miles <= radius_miles:
+                        found.append((i, miles))
+
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def nearest(self, lat, lng, max_miles=None, accept=None):
+        """
+        Closest point to (lat, lng), searching outward ring by ring.
+
+        Args:
+            max_miles: give up beyond this distance (default: search ~50 miles)
+            accept: optional predicate on the point index to skip points
+
+        Returns:
+            tuple: (index, miles), or (None, None) if nothing within max_miles
+        """
+        if not self.cells:
+            return None, None
+
+        row, col = self._cell(lat, lng)
+        cell_miles = self._cell_miles(lat)
+        max_ring = int((max_miles or 50) / cell_miles) + 1
+
+        best, best_miles = None, None
+        for ring in range(max_ring + 1):
+            for r in range(row - ring, row + ring + 1):
+                # Only the ring's border cells are new
+                step = 1 if abs(r - row) == ring else 2 * ring
+                for c in range(col - ring, col + ring + 1, max(step, 1)):
+                    for i in self.cells.get((r, c), ()):
+                        if accept is not None and not accept(i):
+                            continue
+                        miles = haversine(lat, lng, self.lats[i], self.lngs[i])
+                        if best_miles is None or miles < best_miles:
+                            best, best_miles = i, miles
+            # Anything in a further ring is at least `ring` cells away
+            if best is not None and best_miles <= ring * cell_miles:
+                break
+
+        if best is None or (max_miles is not None and best_miles > max_miles):
+            return None, None
+        return best, best_miles
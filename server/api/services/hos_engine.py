@@ -0,0 +1,176 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ..instrumentation import traced
+from ..models import ActivityStatus
+from .compliance_cache import ComplianceCache
+from .duty_rollup import DutyRollupService
+from .hos_validator import HOSValidator
+
+
+OFF_DUTY_STATUSES = (ActivityStatus.OFF_DUTY, ActivityStatus.SLEEPER_BERTH)
+
+
+class HOSComplianceEngine:
+    """
+    Evaluates HOS compliance for a daily log with one activity query and one
+    ordered pass, instead of one or more queries per rule.
+
+    Produces the same violations/warnings structure as the per-rule
+    HOSValidator.validate_* methods. Per-day results are cached under
+    (daily log id, version, RULE_SET); the 70-hour cycle spans other days
+    and trips, so it is always read live from the duty rollups.
+    """
+
+    # Change whenever rule logic changes so cached results are not reused
+    RULE_SET = 'property-70-8:v1'
+
+    @staticmethod
+    def load_activities(daily_log):
+        """
+        Get a daily log's activities in timeline order, reusing a
+        prefetch_related('activities') cache when present.
+        """
+        prefetched = getattr(daily_log, '_prefetched_objects_cache', {})
+        if 'activities' in prefetched:
+            activities = list(prefetched['activities'])
+        else:
+            activities = list(daily_log.activities.all())
+
+        activities.sort(key=lambda a: (a.sequence, a.start_time))
+        return activities
+
+    @staticmethod
+    def evaluate_daily_log(activities):
+        """
+        Run the 11-hour, 14-hour and 30-minute break rules in one pass.
+
+        Args:
+            activities: the day's activities in timeline order
+
+        Returns:
+            tuple: (violations, warnings)
+        """
+        total_driving = 0
+        driving_since_break = 0
+        break_violated = False
+        consecutive_off_duty = 0
+        duty_start = None
+        last_driving = None
+
+        for activity in activities:
+            minutes = activity.duration_minutes
+
+            if activity.status == ActivityStatus.DRIVING:
+                total_driving += minutes
+                driving_since_break += minutes
+                if driving_since_break > 8 * 60:
+                    break_violated = True
+
+                key = (activity.sequence, activity.end_time)
+                if last_driving is None or key >= last_driving:
+                    last_driving = key
+            elif minutes >= 30:
+                # Break qualifies if 30+ consecutive minutes not driving
+                driving_since_break = 0
+
+            # Duty period starts at the first on-duty activity after 10+ hours off
+            if activity.status in OFF_DUTY_STATUSES:
+                consecutive_off_duty += minutes
+            else:
+                if duty_start is None and consecutive_off_duty >= 10 * 60:
+                    duty_start = activity.start_time
+                consecutive_off_duty = 0
+
+        if duty_start is None and activities:
+            duty_start = activities[0].start_time
+
+        violations = []
+        warnings = []
+
+        result = HOSValidator._11_hour_result(total_driving)
+        if result:
+            (violations if result['violated'] else warnings).append(result)
+
+        if duty_start is not None and last_driving is not None:
+            result = HOSValidator._14_hour_result(
+                HOSValidator._calculate_duration(duty_start, last_driving[1])
+            )
+            if result and result['violated']:
+                violations.append(result)
+
+        if break_violated:
+            violations.append(HOSValidator._30_minute_break_result())
+
+        return violations, warnings
+
+    @staticmethod
+    def cycle_on_duty_minutes(trip, current_date):
+        """Driver's on-duty minutes over the 8 days ending current_date, across trips (one query)"""
+        start_date = current_date - timedelta(days=7)
+        return DutyRollupService.on_duty_minutes(trip.driver_id, start_date, current_date)
+
+    @staticmethod
+    @traced('HOSComplianceEngine')
+    def get_compliance_status(trip, daily_log, current_date=None, activities=None,
+                              check_rest=False, previous_daily_log=None, use_cache=True):
+        """
+        Get all HOS compliance statuses for a trip/daily_log.
+
+        Args:
+            trip: Trip instance
+            daily_log: DailyLog instance
+            current_date: end of the 70-hour/8-day window (default: today)
+            activities: the log's activities if already loaded
+            check_rest: also run the 10-hour rest check against previous_daily_log
+            previous_daily_log: previous day's DailyLog (optional)
+            use_cache: reuse/store the per-day result in ComplianceCache
+
+        Returns:
+            dict with 'violations', 'warnings', 'compliant' boolean
+        """
+        if current_date is None:
+            current_date = timezone.now().date()
+
+        key = ComplianceCache.make_key(
+            HOSComplianceEngine.RULE_SET, daily_log, previous_daily_log, check_rest
+        )
+        day = ComplianceCache.get(key) if use_cache else None
+
+        if day is None:
+            if activities is None:
+                activities = HOSComplianceEngine.load_activities(daily_log)
+
+            day_violations, day_warnings = HOSComplianceEngine.evaluate_daily_log(activities)
+            day = {'violations': day_violations, 'warnings': day_warnings, 'rest': None}
+
+            if check_rest:
+                prev_activities = None
+                if activities and activities[0].status == ActivityStatus.DRIVING and previous_daily_log:
+                    prev_activities = HOSComplianceEngine.load_activities(previous_daily_log)
+                    prev_activities.reverse()
+
+                day['rest'] = HOSValidator._10_hour_rest_result(activities, previous_daily_log, prev_activities)
+
+            if use_cache:
+                ComplianceCache.set(key, day)
+
+        violations = day['violations']
+        warnings = day['warnings']
+
+        result = HOSValidator._70_hour_result(
+            HOSComplianceEngine.cycle_on_duty_minutes(trip, current_date)
+        )
+        if result:
+            (violations if result['violated'] else warnings).append(result)
+
+        result = day['rest']
+        if result:
+            (violations if result['violated'] else warnings).append(result)
+
+        return {
+            'compliant': len(violations) == 0,
+            'violations': violations,
+            'warnings': warnings
+        }
@@ -1,5 +1,6 @@
 from datetime import timedelta
 from django.utils import timezone
+from ..instrumentation import traced
 from ..models import ActivityStatus
 
 
@@ -22,6 +23,11 @@ class HOSValidator:
             if a.status == ActivityStatus.DRIVING
         )
         
+        return HOSValidator._11_hour_result(total_driving)
+    
+    @staticmethod
+    def _11_hour_result(total_driving):
+        """Build the 11-hour limit result from total driving minutes"""
         max_driving_minutes = 11 * 60  # 660 minutes
         
         if total_driving > max_driving_minutes:
@@ -100,6 +106,11 @@ class HOSValidator:
         
         time_since_duty_start = HOSValidator._calculate_duration(duty_start, last_driving.end_time)
         
+        return HOSValidator._14_hour_result(time_since_duty_start)
+    
+    @staticmethod
+    def _14_hour_result(time_since_duty_start):
+        """Build the 14-hour window result from minutes between duty start and last driving"""
         if time_since_duty_start > 14 * 60:  # 840 minutes
             return {
                 'violated': True,
@@ -126,13 +137,7 @@ class HOSValidator:
                 driving_time_since_break += activity.duration_minutes
                 
                 if driving_time_since_break > 8 * 60:  # 480 minutes
-                    return {
-                        'violated': True,
-                        'message': 'Drove more than 8 hours without 30-minute break',
-                        'severity': 'error',
-                        'rule': '30_minute_break',
-                        'suggestion': 'Log a 30-minute off-duty or sleeper berth break'
-                    }
+                    return HOSValidator._30_minute_break_result()
             else:
                 # Break qualifies if 30+ consecutive minutes not driving
                 if activity.duration_minutes >= 30:
@@ -140,11 +145,25 @@ class HOSValidator:
         
         return None
     
+    @staticmethod
+    def _30_minute_break_result():
+        """Build the 30-minute break violation"""
+        return {
+            'violated': True,
+            'message': 'Drove more than 8 hours without 30-minute break',
+            'severity': 'error',
+            'rule': '30_minute_break',
+            'suggestion': 'Log a 30-minute off-duty or sleeper berth break'
+        }
+    
     @staticmethod
     def validate_70_hour_cycle(trip, current_date):
         """
         Check 70-hour/8-day limit.
         
+        The cycle belongs to the driver, so on-duty time from all of the
+        driver's trips counts, read from the per-date DriverDutyRollup table.
+        
         Args:
             trip: Trip instance
             current_date: datetime.date of current day
@@ -152,24 +171,17 @@ class HOSValidator:
         Returns:
             dict with violation info if violated/warned, else None
         """
-        from datetime import timedelta
-        from ..models import DailyLog, ActivityStatus
+        from .duty_rollup import DutyRollupService
         
-        # Get last 8 days of logs
+        # Last 8 days, including today
         start_date = current_date - timedelta(days=7)
-        eight_days_logs = DailyLog.objects.filter(
-            trip=trip,
-            date__gte=start_date,
-            date__lte=current_date
-        )
-        
-        total_on_duty_minutes = 0
-        
-        for daily_log in eight_days_logs:
-            for activity in daily_log.activities.all():
-                if activity.status in [ActivityStatus.DRIVING, ActivityStatus.ON_DUTY_NOT_DRIVING]:
-                    total_on_duty_minutes += activity.duration_minutes
+        total_on_duty_minutes = DutyRollupService.on_duty_minutes(trip.driver_id, start_date, current_date)
         
+        return HOSValidator._70_hour_result(total_on_duty_minutes)
+    
+    @staticmethod
+    def _70_hour_result(total_on_duty_minutes):
+        """Build the 70-hour/8-day result from on-duty minutes in the window"""
         max_minutes = 70 * 60  # 4200 minutes
         
         if total_on_duty_minutes > max_minutes:
@@ -202,16 +214,31 @@ class HOSValidator:
             dict with violation info if violated, else None
         """
         activities = list(daily_log.activities.all().order_by('sequence', 'start_time'))
+        prev_activities = None
         
+        # Check if first activity of day is driving
+        if activities and activities[0].status == ActivityStatus.DRIVING and previous_daily_log:
+            prev_activities = list(
+                previous_daily_log.activities.all()
+                .order_by('-sequence', '-start_time')
+            )
+        
+        return HOSValidator._10_hour_rest_result(activities, previous_daily_log, prev_activities)
+    
+    @staticmethod
+    def _10_hour_rest_result(activities, previous_daily_log, prev_activities):
+        """
+        Build the 10-hour rest result.
+        
+        Args:
+            activities: current day's activities in timeline order
+            previous_daily_log: previous day's DailyLog or None
+            prev_activities: previous day's activities, latest first
+        """
         # Check if first activity of day is driving
         if activities and activities[0].status == ActivityStatus.DRIVING:
             # Need to check previous day's rest
             if previous_daily_log:
-                prev_activities = list(
-                    previous_daily_log.activities.all()
-                    .order_by('-sequence', '-start_time')
-                )
-                
                 consecutive_rest = 0
                 for activity in prev_activities:
                     if activity.status in [ActivityStatus.OFF_DUTY, ActivityStatus.SLEEPER_BERTH]:
@@ -238,10 +265,27 @@ class HOSValidator:
         return None
     
     @staticmethod
+    @traced('HOSValidator')
     def get_compliance_status(trip, daily_log, current_date=None):
         """
         Get all HOS compliance statuses for a trip/daily_log.
         
+        Evaluated by HOSComplianceEngine in a single pass over the log's
+        activities; the validate_* methods above remain for per-rule checks.
+        
+        Returns:
+            dict with 'violations', 'warnings', 'compliant' boolean
+        """
+        from .hos_engine import HOSComplianceEngine
+        return HOSComplianceEngine.get_compliance_status(trip, daily_log, current_date)
+    
+    @staticmethod
+    @traced('HOSValidator')
+    def get_compliance_status_per_rule(trip, daily_log, current_date=None):
+        """
+        Reference implementation of get_compliance_status that runs each rule
+        validator separately (one or more queries per rule).
+        
         Returns:
             dict with 'violations', 'warnings', 'compliant' boolean
         """
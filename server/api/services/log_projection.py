@@ -0,0 +1,236 @@
+from datetime import datetime, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Activity, ActivityStatus, DailyLog, RequiredStopType, Route
+from .recalculation import deferred_recalculation, mark_dirty, mark_rollup_dirty
+from .route_calculator import RouteCalculator
+from .timeline import TimelineService
+from .trip_simulator import TripSimulator
+
+
+MINUTES_PER_DAY = 24 * 60
+
+# Duty status logged for each kind of stop
+STOP_STATUSES = {
+    RequiredStopType.PICKUP: ActivityStatus.ON_DUTY_NOT_DRIVING,
+    RequiredStopType.DROPOFF: ActivityStatus.ON_DUTY_NOT_DRIVING,
+    RequiredStopType.FUEL: ActivityStatus.ON_DUTY_NOT_DRIVING,
+    RequiredStopType.BREAK_30: ActivityStatus.OFF_DUTY,
+    RequiredStopType.REST_10HR: ActivityStatus.SLEEPER_BERTH,
+    RequiredStopType.RESTART_34: ActivityStatus.OFF_DUTY,
+}
+
+TOTAL_FIELDS = {
+    ActivityStatus.OFF_DUTY: 'off_duty_hours',
+    ActivityStatus.SLEEPER_BERTH: 'sleeper_berth_hours',
+    ActivityStatus.DRIVING: 'driving_hours',
+    ActivityStatus.ON_DUTY_NOT_DRIVING: 'on_duty_not_driving_hours',
+}
+
+
+class LogProjectionService:
+    """
+    Generates the projected logbook (DailyLogs and Activities) for a planned
+    trip from its route's stop schedule.
+    """
+
+    @staticmethod
+    def build_segments(trip, route, stops, start_time):
+        """
+        Turn a stop schedule into a continuous duty timeline.
+
+        Driving between consecutive stops takes the miles between them at the
+        route's average speed, so the timeline matches the HOS simulation.
+
+        Args:
+            trip: Trip instance
+            route: its Route
+            stops: RequiredStops in route order
+            start_time: departure datetime
+
+        Returns:
+            list of dicts: status, start, end (datetimes), miles, location,
+            end_location, remark
+        """
+        speed = RouteCalculator.average_speed(route) or TripSimulator.AVERAGE_SPEED_MPH
+
+        segments = []
+        now = start_time
+        mile = 0.0
+        location = trip.current_location or {}
+
+        for stop in stops:
+            if stop.miles_from_start > mile:
+                driven = stop.miles_from_start - mile
+                end = now + timedelta(hours=driven / speed)
+                segments.append({
+                    'status': ActivityStatus.DRIVING,
+                    'start': now,
+                    'end': end,
+                    'miles': driven,
+                    'location': location,
+                    'end_location': stop.location or {},
+                    'remark': 'Driving',
+                })
+                now, mile = end, stop.miles_from_start
+
+            location = stop.location or location
+            end = now + timedelta(minutes=stop.duration_minutes)
+            segments.append({
+                'status': STOP_STATUSES.get(stop.type, ActivityStatus.ON_DUTY_NOT_DRIVING),
+                'start': now,
+                'end': end,
+                'miles': None,
+                'location': location,
+                'end_location': location,
+                'remark': stop.reason or stop.get_type_display(),
+            })
+            now = end
+
+        return segments
+
+    @staticmethod
+    def _off_duty(start, end, location):
+        return ActivityStatus.OFF_DUTY, start, end, None, location, location, 'Off duty'
+
+    @staticmethod
+    def split_days(segments):
+        """
+        Split a timeline at local midnights into 24-hour days, padded with
+        off-duty time before departure and after arrival.
+
+        Boundaries are rounded to the minute; segments that round to nothing
+        are dropped, and miles are shared out by time when a drive spans midnight.
+
+        Returns:
+            list of (date, [activity dicts with status, start_time, end_time,
+            duration_minutes, miles_driven, location, end_location, remark])
+        """
+        if not segments:
+            return []
+
+        first_start = timezone.localtime(segments[0]['start'])
+        first_day = first_start.date()
+        origin = timezone.make_aware(datetime.combine(first_day, time.min), first_start.tzinfo)
+
+        def minute(moment):
+            return round((moment - origin).total_seconds() / 60)
+
+        timeline = []
+        cursor = 0
+        for segment in segments:
+            start, end = max(minute(segment['start']), cursor), minute(segment['end'])
+            if end <= start:
+                continue
+            if start > cursor:
+                # Before departure (or a rounding gap)
+                timeline.append(LogProjectionService._off_duty(cursor, start, segment['location']))
+            timeline.append((
+                segment['status'], start, end, segment['miles'],
+                segment['location'], segment['end_location'], segment['remark'],
+            ))
+            cursor = end
+
+        day_count = -(-cursor // MINUTES_PER_DAY)
+        if cursor < day_count * MINUTES_PER_DAY:
+            timeline.append(LogProjectionService._off_duty(
+                cursor, day_count * MINUTES_PER_DAY, segments[-1]['end_location']
+            ))
+
+        days = [(first_day + timedelta(days=i), []) for i in range(day_count)]
+        for status, start, end, miles, location, end_location, remark in timeline:
+            while start < end:
+                day = start // MINUTES_PER_DAY
+                day_end = min(end, (day + 1) * MINUTES_PER_DAY)
+                days[day][1].append({
+                    'status': status,
+                    'start_time': TimelineService._minutes_to_time(start),
+                    'end_time': TimelineService._minutes_to_time(day_end),
+                    'duration_minutes': day_end - start,
+                    'miles_driven': round(miles * (day_end - start) / (end - start), 1) if miles else None,
+                    'location': location or {},
+                    'end_location': end_location or {},
+                    'remark': remark,
+                })
+                start = day_end
+
+        return days
+
+    @staticmethod
+    @transaction.atomic
+    def project_logs(trip, replace=False):
+        """
+        Create the trip's projected daily logs and activities.
+
+        Everything is written with two bulk inserts (logs, then activities) so
+        no per-activity signals run; log totals are computed in memory, and
+        the driver's duty rollups are refreshed once per date after commit.
+        The trip's current location and cycle hours are left alone, since
+        the projection describes the plan rather than where the driver is.
+
+        Args:
+            trip: Trip instance with a calculated route
+            replace: delete the trip's existing daily logs first; otherwise
+                a trip that already has logs is rejected
+
+        Returns:
+            list of the created DailyLog instances, in date order
+        """
+        route = Route.objects.filter(trip=trip).first()
+        if route is None or route.calculated_at is None:
+            raise ValidationError('Calculate the route before projecting logs')
+
+        stops = list(route.stops.order_by('miles_from_start', 'id'))
+        segments = LogProjectionService.build_segments(
+            trip, route, stops, RouteCalculator.start_time(trip, route)
+        )
+        days = LogProjectionService.split_days(segments)
+
+        with deferred_recalculation(update_trips=False):
+            existing = trip.daily_logs.all()
+            if existing.exists():
+                if not replace:
+                    raise ValidationError(
+                        'Trip already has daily logs; pass replace to overwrite them', code='logs_exist'
+                    )
+                # Mark first so the activity delete signals skip loading each log
+                for daily_log in existing:
+                    mark_dirty(daily_log)
+                existing.delete()
+
+            driver = trip.driver
+            user = driver.user
+            header = {
+                'driver_name': user.get_full_name() or user.username,
+                'home_terminal': driver.home_terminal,
+                'carrier_name': driver.carrier_name,
+            }
+
+            logs = []
+            for date, entries in days:
+                daily_log = DailyLog(trip=trip, date=date, **header)
+                for entry in entries:
+                    field = TOTAL_FIELDS[entry['status']]
+                    setattr(daily_log, field, getattr(daily_log, field) + entry['duration_minutes'] / 60)
+                    if entry['miles_driven']:
+                        daily_log.total_miles_driven += entry['miles_driven']
+                daily_log.total_miles_driven = round(daily_log.total_miles_driven, 1)
+                daily_log.total_truck_mileage = daily_log.total_miles_driven
+                logs.append(daily_log)
+
+            DailyLog.objects.bulk_create(logs)
+
+            activities = []
+            for daily_log, (_, entries) in zip(logs, days):
+                activities.extend(
+                    Activity(daily_log=daily_log, sequence=(i + 1) * TimelineService.SEQUENCE_GAP, **entry)
+                    for i, entry in enumerate(entries)
+                )
+                mark_rollup_dirty(trip.driver_id, daily_log.date)
+
+            Activity.objects.bulk_create(activities, batch_size=500)
+
+        return logs
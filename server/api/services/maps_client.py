@@ -0,0 +1,279 @@
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+from ..instrumentation import current_profile
+
+
+# Google statuses that mean "try again later" rather than "bad request"
+RETRYABLE_API_STATUSES = ('OVER_QUERY_LIMIT', 'UNKNOWN_ERROR')
+RETRYABLE_HTTP_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker.
+
+    Opens once at least `min_calls` of the last `window` calls were recorded
+    and the failure rate reaches `failure_rate`. While open, calls are
+    refused until `reset_seconds` pass; then a single trial call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window=20, min_calls=5, failure_rate=0.5, reset_seconds=30):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.reset_seconds = reset_seconds
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """True if a call may be made now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = True
+            return True
+
+    def record(self, success):
+        """Record the outcome of an allowed call"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                if success:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._state = self.OPEN
+                    self._opened_at = time.monotonic()
+                return
+
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (
+                len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_rate
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self._outcomes.clear()
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    call takes one, waiting for it if the bucket is empty, so bursts of up
+    to `capacity` calls go straight through and the long-run rate never
+    exceeds `rate`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        self.acquired = 0
+        self.waited_seconds = 0.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping until one is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.acquired += 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+                self.waited_seconds += wait
+            time.sleep(wait)
+
+
+class MapsClient:
+    """
+    Shared HTTP client for the maps provider.
+
+    Keeps connections alive in a pooled requests.Session, retries transient
+    failures (timeouts, connection errors, 429/5xx, OVER_QUERY_LIMIT) with
+    jittered exponential backoff, and fails fast through a circuit breaker
+    while the provider is unhealthy, so callers drop straight to their
+    haversine fallback instead of waiting on timeouts. Every request
+    attempt, retries included, first takes a token from `rate_limiter`
+    when one is set (MAPS_RATE_LIMIT_PER_SECOND, or swapped in by batch jobs).
+    """
+
+    def __init__(self, base_url=None, pool_size=None, connect_timeout=None, read_timeout=None,
+                 max_retries=None, backoff_seconds=None, breaker=None, rate_limiter=None):
+        self.base_url = (base_url or getattr(settings, 'MAPS_API_BASE_URL', 'https://maps.googleapis.com')).rstrip('/')
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else getattr(settings, 'MAPS_HTTP_CONNECT_TIMEOUT', 3),
+            read_timeout if read_timeout is not None else getattr(settings, 'MAPS_HTTP_READ_TIMEOUT', 10),
+        )
+        self.max_retries = max_retries if max_retries is not None else getattr(settings, 'MAPS_HTTP_MAX_RETRIES', 2)
+        self.backoff_seconds = (
+            backoff_seconds if backoff_seconds is not None else getattr(settings, 'MAPS_HTTP_BACKOFF_SECONDS', 0.5)
+        )
+        self.breaker = breaker or CircuitBreaker(
+            window=getattr(settings, 'MAPS_CIRCUIT_WINDOW', 20),
+            min_calls=getattr(settings, 'MAPS_CIRCUIT_MIN_CALLS', 5),
+            failure_rate=getattr(settings, 'MAPS_CIRCUIT_FAILURE_RATE', 0.5),
+            reset_seconds=getattr(settings, 'MAPS_CIRCUIT_RESET_SECONDS', 30),
+        )
+        rate = getattr(settings, 'MAPS_RATE_LIMIT_PER_SECOND', 0)
+        if rate_limiter is None and rate > 0:
+            rate_limiter = TokenBucket(rate, getattr(settings, 'MAPS_RATE_LIMIT_BURST', 0) or None)
+        self.rate_limiter = rate_limiter
+
+        pool_size = pool_size or getattr(settings, 'MAPS_HTTP_POOL_SIZE', 10)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff: uniform(0, base * 2^attempt)"""
+        return random.uniform(0, self.backoff_seconds * (2 ** attempt))
+
+    def get_json(self, path, params):
+        """
+        GET a JSON endpoint of the maps provider.
+
+        Args:
+            path: URL path, e.g. '/maps/api/directions/json'
+            params: query parameters
+
+        Returns:
+            dict: decoded response, or None if the call failed, exhausted its
+            retries or was refused by the open circuit
+        """
+        if not self.breaker.allow():
+            return None
+
+        profile = current_profile()
+        start = time.perf_counter()
+        try:
+            return self._get_json(path, params)
+        except BaseException:
+            # Every allowed call must be recorded, or a half-open trial that
+            # raised would leave the circuit refusing calls for good
+            self.breaker.record(False)
+            raise
+        finally:
+            if profile is not None:
+                profile.add_http(time.perf_counter() - start)
+
+    def _get_json(self, path, params):
+        """get_json's request loop: retries, backoff and circuit breaker bookkeeping"""
+        url = f'{self.base_url}{path}'
+        for attempt in range(self.max_retries + 1):
+            retryable = False
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code in RETRYABLE_HTTP_STATUSES:
+                    retryable = True
+                else:
+                    response.raise_for_status()
+                    data = response.json()
+                    if not isinstance(data, dict):
+                        raise ValueError('Response is not a JSON object')
+                    if data.get('status') in RETRYABLE_API_STATUSES:
+                        retryable = True
+                    else:
+                        self.breaker.record(True)
+                        return data
+            except (requests.ConnectionError, requests.Timeout):
+                retryable = True
+            except (requests.RequestException, ValueError):
+                # Client errors and malformed bodies will not improve on retry
+                self.breaker.record(True)
+                return None
+
+            if retryable and attempt < self.max_retries:
+                time.sleep(self._backoff(attempt))
+
+        self.breaker.record(False)
+        return None
+
+    def directions(self, origin, destination, waypoints=None, **params):
+        """
+        Request a Directions API route.
+
+        Returns:
+            dict: routes[0] of the response, or None on error
+        """
+        params = {
+            'origin': origin,
+            'destination': destination,
+            'waypoints': '|'.join(waypoints) if waypoints else None,
+            'key': getattr(settings, 'GOOGLE_MAPS_API_KEY', ''),
+            'units': 'imperial',  # Get results in miles
+            **params,
+        }
+
+        # Remove None values
+        params = {k: v for k, v in params.items() if v is not None}
+
+        data = self.get_json('/maps/api/directions/json', params)
+        if not data or data.get('status') != 'OK' or not data.get('routes'):
+            return None
+
+        return data['routes'][0]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_maps_client():
+    """Get the process-wide MapsClient, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MapsClient()
+    return _client
+
+
+def reset_maps_client():
+    """Drop the shared client (e.g. after changing MAPS_* settings)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.session.close()
+        _client = None
@@ -0,0 +1,240 @@
+import csv
+import json
+import os
+import threading
+from array import array
+from django.conf import settings
+
+from .geo import GridIndex
+
+
+FUEL = 'fuel'
+TRUCK_STOP = 'truck_stop'
+REST_AREA = 'rest_area'
+
+KINDS = (FUEL, TRUCK_STOP, REST_AREA)
+
+# Spellings seen in common POI exports (OSM amenity/highway tags, state DOT lists)
+_KIND_ALIASES = {
+    'fuel': FUEL,
+    'gas_station': FUEL,
+    'truck_stop': TRUCK_STOP,
+    'truckstop': TRUCK_STOP,
+    'travel_center': TRUCK_STOP,
+    'rest_area': REST_AREA,
+    'rest_stop': REST_AREA,
+    'services': TRUCK_STOP,
+}
+
+CSV_FIELDS = ('name', 'kind', 'latitude', 'longitude', 'address')
+
+_GRID_CELL_DEGREES = 0.1
+
+
+def normalize_kind(value):
+    """Map a dataset's category spelling to one of KINDS, or None"""
+    if not value:
+        return None
+    return _KIND_ALIASES.get(str(value).strip().lower().replace(' ', '_').replace('-', '_'))
+
+
+def _poi(name, kind, lat, lng, address=''):
+    return {
+        'name': name or '',
+        'kind': kind,
+        'latitude': float(lat),
+        'longitude': float(lng),
+        'address': address or '',
+    }
+
+
+def read_csv(path):
+    """
+    POIs from a CSV with name, kind, latitude/lat, longitude/lng/lon and
+    optional address columns; rows with an unknown kind or no coordinates
+    are skipped.
+    """
+    pois = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            kind = normalize_kind(row.get('kind') or row.get('type') or row.get('amenity'))
+            lat = row.get('latitude') or row.get('lat')
+            lng = row.get('longitude') or row.get('lng') or row.get('lon')
+            if kind is None or not lat or not lng:
+                continue
+            try:
+                pois.append(_poi(row.get('name'), kind, lat, lng, row.get('address')))
+            except ValueError:
+                continue
+    return pois
+
+
+def read_geojson(path):
+    """
+    POIs from a GeoJSON FeatureCollection of Point features; the kind is
+    read from the kind, type, amenity or highway property.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    pois = []
+    for feature in data.get('features', []):
+        geometry = feature.get('geometry') or {}
+        props = feature.get('properties') or {}
+        if geometry.get('type') != 'Point':
+            continue
+        kind = None
+        for key in ('kind', 'type', 'amenity', 'highway'):
+            kind = normalize_kind(props.get(key))
+            if kind:
+                break
+        if kind is None:
+            continue
+        try:
+            lng, lat = geometry['coordinates'][:2]
+            pois.append(_poi(props.get('name'), kind, lat, lng, props.get('address')))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return pois
+
+
+def read_pois(path):
+    """Read a .csv or .geojson/.json POI file"""
+    if os.path.splitext(path)[1].lower() in ('.geojson', '.json'):
+        return read_geojson(path)
+    return read_csv(path)
+
+
+def write_csv(path, pois):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for poi in pois:
+            writer.writerow({field: poi[field] for field in CSV_FIELDS})
+
+
+class POIIndex:
+    """
+    In-memory spatial index of truck stops, fuel stations and rest areas.
+
+    POIs are held in a uniform lat/lng grid (geo.GridIndex), so a lookup
+    only measures the handful of facilities in nearby cells.
+    """
+
+    def __init__(self, pois):
+        self.pois = list(pois)
+        self.grid = GridIndex(
+            array('d', (poi['latitude'] for poi in self.pois)),
+            array('d', (poi['longitude'] for poi in self.pois)),
+            _GRID_CELL_DEGREES,
+        )
+
+    @classmethod
+    def load(cls, path):
+        return cls(read_pois(path))
+
+    def __len__(self):
+        return len(self.pois)
+
+    def nearest(self, lat, lng, radius_miles, kinds=None):
+        """
+        Closest POI of one of `kinds` within radius_miles.
+
+        Returns:
+            tuple: (poi dict, miles), or (None, None)
+        """
+        pois = self.pois
+        accept = None if kinds is None else (lambda i: pois[i]['kind'] in kinds)
+        i, miles = self.grid.nearest(lat, lng, max_miles=radius_miles, accept=accept)
+        if i is None:
+            return None, None
+        return pois[i], miles
+
+    def within(self, lat, lng, radius_miles, kinds=None):
+        """
+        POIs of one of `kinds` within radius_miles.
+
+        Returns:
+            list of (poi dict, miles), nearest first
+        """
+        return [
+            (self.pois[i], miles)
+            for i, miles in self.grid.within(lat, lng, radius_miles)
+            if kinds is None or self.pois[i]['kind'] in kinds
+        ]
+
+    def along_corridor(self, geometry, start_mile, end_mile, width_miles, kinds=None):
+        """
+        POIs within width_miles of a stretch of route.
+
+        The route is sampled every width_miles (from one step before
+        start_mile to one step after end_mile) and each sample searches
+        width * 1.5, so every point of the corridor is covered. A POI's
+        route mile is that of its nearest sample, so facilities just past
+        either end are attributed there and left out.
+
+        Args:
+            geometry: RouteGeometry
+            start_mile, end_mile: stretch of the route to search
+
+        Returns:
+            list of (poi dict, route_mile, offset_miles), ordered by route_mile
+        """
+        step = max(width_miles, 0.5)
+        radius = width_miles + step / 2
+        found = {}
+
+        mile = max(start_mile - step, 0.0)
+        last_mile = min(end_mile + step, geometry.length_miles)
+        while True:
+            point = geometry.point_at_mile(mile)
+            if point is None:
+                break
+            for i, miles in self.grid.within(point[0], point[1], radius):
+                if kinds is not None and self.pois[i]['kind'] not in kinds:
+                    continue
+                if i not in found or miles < found[i][1]:
+                    found[i] = (mile, miles)
+            if mile >= last_mile:
+                break
+            mile = min(mile + step, last_mile)
+
+        return sorted(
+            (
+                (self.pois[i], route_mile, offset)
+                for i, (route_mile, offset) in found.items()
+                if start_mile <= route_mile <= end_mile and offset <= width_miles
+            ),
+            key=lambda item: item[1],
+        )
+
+
+_index = None
+_index_path = None
+_index_lock = threading.Lock()
+
+
+def get_poi_index():
+    """
+    Get the process-wide POIIndex loaded from POI_DATASET_PATH.
+
+    A dataset that fails to load is not retried until the setting changes
+    (or the process restarts).
+
+    Returns:
+        POIIndex, or None if no dataset is configured or the file is missing
+    """
+    global _index, _index_path
+    path = getattr(settings, 'POI_DATASET_PATH', '')
+    if not path:
+        return None
+
+    if _index_path != path:
+        with _index_lock:
+            if _index_path != path:
+                try:
+                    _index = POIIndex.load(path)
+                except (OSError, ValueError, csv.Error):
+                    _index = None
+                _index_path = path
+    return _index
@@ -0,0 +1,63 @@
+def decode(encoded, precision=5):
+    """
+    Decode a Google encoded polyline.
+
+    Args:
+        encoded: polyline string (e.g. a Directions route's overview_polyline.points)
+        precision: decimal places encoded (5 for Google, 6 for OSRM/Valhalla polyline6)
+
+    Returns:
+        list of (lat, lng) tuples
+    """
+    factor = 10 ** precision
+    points = []
+    index = lat = lng = 0
+    length = len(encoded or '')
+
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            result = shift = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append((lat / factor, lng / factor))
+
+    return points
+
+
+def _encode_value(value, chunks):
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+
+
+def encode(points, precision=5):
+    """
+    Encode (lat, lng) points as a Google encoded polyline.
+
+    Returns:
+        str
+    """
+    factor = 10 ** precision
+    chunks = []
+    prev_lat = prev_lng = 0
+
+    for lat, lng in points:
+        lat_int = int(round(lat * factor))
+        lng_int = int(round(lng * factor))
+        _encode_value(lat_int - prev_lat, chunks)
+        _encode_value(lng_int - prev_lng, chunks)
+        prev_lat, prev_lng = lat_int, lng_int
+
+    return ''.join(chunks)
@@ -0,0 +1,121 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from ..instrumentation import traced
+
+
+_state = threading.local()
+
+
+class _Batch:
+    def __init__(self, update_trips=True):
+        self.daily_logs = {}
+        self.rollups = set()  # (driver_id, date) pairs whose logs were deleted
+        self.update_trips = update_trips
+
+
+def is_deferring():
+    """True while inside a deferred_recalculation() block on this thread"""
+    return getattr(_state, 'batch', None) is not None
+
+
+def is_marked(daily_log_id):
+    """True if the daily log is already waiting in this thread's batch"""
+    batch = getattr(_state, 'batch', None)
+    return batch is not None and daily_log_id in batch.daily_logs
+
+
+def mark_dirty(daily_log):
+    """
+    Record a daily log (and its trip) for recalculation when the batch flushes.
+
+    Outside a batch the totals and trip fields are recalculated immediately.
+
+    Args:
+        daily_log: DailyLog instance whose activities changed
+    """
+    batch = getattr(_state, 'batch', None)
+    if batch is None:
+        batch = _Batch()
+        batch.daily_logs[daily_log.pk] = daily_log
+        _flush(batch)
+        return
+
+    batch.daily_logs.setdefault(daily_log.pk, daily_log)
+
+
+def mark_rollup_dirty(driver_id, date):
+    """
+    Record a driver/date duty rollup for recalculation, for changes that
+    mark_dirty cannot see (e.g. a deleted daily log).
+    """
+    batch = getattr(_state, 'batch', None)
+    if batch is None:
+        from .duty_rollup import DutyRollupService
+        DutyRollupService.refresh(driver_id, date)
+        return
+
+    batch.rollups.add((driver_id, date))
+
+
+@contextmanager
+def deferred_recalculation(update_trips=True):
+    """
+    Collect dirty daily logs while activities are written and recalculate
+    each log's totals, each driver/date duty rollup and each trip's derived
+    fields exactly once, after the surrounding transaction commits.
+
+    Nested blocks join the outermost batch. If the block raises, or the
+    transaction rolls back, nothing is recalculated.
+
+    Usable as a context manager or a decorator.
+
+    Args:
+        update_trips: also update the trips' current_location/current_cycle_hours
+            (False for logs that do not describe where the driver is now,
+            e.g. projected logs)
+    """
+    if is_deferring():
+        yield
+        return
+
+    _state.batch = _Batch(update_trips)
+    try:
+        yield
+        batch = _state.batch
+    finally:
+        _state.batch = None
+
+    if batch.daily_logs or batch.rollups:
+        transaction.on_commit(lambda: _flush(batch))
+
+
+@traced('recalculation')
+def _flush(batch):
+    """Recalculate dirty daily logs and duty rollups, then update their trips once each"""
+    from ..models import DailyLog, Trip
+    from .duty_rollup import DutyRollupService
+    from .timeline import TimelineService
+    from .trip_updater import TripUpdateService
+
+    # Logs and trips may have been deleted in the same transaction (cascade deletes)
+    existing = DailyLog.objects.filter(pk__in=list(batch.daily_logs)).values_list(
+        'pk', 'trip__driver_id', 'date'
+    )
+
+    rollups = set(batch.rollups)
+    for pk, driver_id, date in existing:
+        TimelineService._recalculate_totals(batch.daily_logs[pk])
+        rollups.add((driver_id, date))
+
+    for driver_id, date in rollups:
+        DutyRollupService.refresh(driver_id, date)
+
+    if not batch.update_trips:
+        return
+
+    trip_ids = {daily_log.trip_id for daily_log in batch.daily_logs.values()}
+    for trip in Trip.objects.filter(pk__in=trip_ids):
+        TripUpdateService.update_all_fields(trip)
@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.db import connection
+
+from ..models import Route, RouteStatus, Trip
+from .maps_client import TokenBucket, get_maps_client
+from .route_calculator import RouteCalculator
+from .route_jobs import RouteJobQueue
+
+
+class RouteCheckpoint:
+    """
+    Progress of a batch recomputation, kept in a JSON file so an interrupted
+    run can resume: trips already done are skipped, failed and fallback
+    trips are tried again.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.done = set()
+        self.failed = {}
+        self.fallback = set()
+
+    @classmethod
+    def load(cls, path):
+        checkpoint = cls(path)
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            checkpoint.done = set(data.get('done', []))
+            checkpoint.failed = {int(k): v for k, v in data.get('failed', {}).items()}
+            checkpoint.fallback = set(data.get('fallback', []))
+        return checkpoint
+
+    def record(self, trip_id, outcome, error=''):
+        self.failed.pop(trip_id, None)
+        self.fallback.discard(trip_id)
+        if outcome == RouteBatchRecalculator.SUCCEEDED:
+            self.done.add(trip_id)
+        elif outcome == RouteBatchRecalculator.FALLBACK:
+            self.fallback.add(trip_id)
+        else:
+            self.failed[trip_id] = error
+
+    def save(self):
+        """Write the checkpoint atomically (a crash never leaves a torn file)"""
+        if not self.path:
+            return
+        data = {
+            'done': sorted(self.done),
+            'failed': {str(k): v for k, v in sorted(self.failed.items())},
+            'fallback': sorted(self.fallback),
+        }
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+
+class RouteBatchRecalculator:
+    """
+    Recomputes routes for many trips with RouteCalculator.calculate_route.
+
+    Trips are routed on a bounded thread pool (routing is mostly waiting on
+    the provider) while a token bucket on the shared MapsClient caps
+    provider requests per second across all threads, so a fleet-wide run
+    cannot trip the provider's rate limit. Results are checkpointed from
+    the coordinating thread only.
+    """
+
+    SUCCEEDED = 'succeeded'
+    FALLBACK = 'fallback'
+    FAILED = 'failed'
+
+    @staticmethod
+    def select_trips(statuses=None, providers=None, trip_ids=None):
+        """
+        Trip ids to recompute, in id order.
+
+        Args:
+            statuses: only trips with one of these Trip.status values
+            providers: only trips whose route came from one of these providers
+                ('' matches trips without a route or that could not be routed)
+            trip_ids: only these trips
+        """
+        trips = Trip.objects.exclude(current_location={}).exclude(dropoff_location={})
+        if statuses:
+            trips = trips.filter(status__in=statuses)
+        if trip_ids:
+            trips = trips.filter(pk__in=trip_ids)
+        if providers:
+            routed = Route.objects.filter(provider__in=providers)
+            selected = trips.filter(pk__in=routed.values('trip_id'))
+            if '' in providers:
+                selected = selected | trips.filter(route__isnull=True)
+            trips = selected
+        return list(trips.order_by('pk').values_list('pk', flat=True))
+
+    @staticmethod
+    def recompute_trip(trip_id, stale_providers=()):
+        """
+        Recompute one trip's route in a pool thread.
+
+        Returns:
+            tuple: (trip_id, outcome, provider, seconds, error)
+        """
+        started = time.monotonic()
+        try:
+            trip = Trip.objects.get(pk=trip_id)
+            RouteJobQueue._set_trip_status(trip, RouteStatus.CALCULATING)
+            route = RouteCalculator.calculate_route(trip)
+            RouteJobQueue._set_trip_status(trip, RouteStatus.READY)
+        except Exception as e:
+            try:
+                Trip.objects.filter(pk=trip_id).update(route_status=RouteStatus.FAILED)
+            except Exception:
+                pass
+            outcome = (trip_id, RouteBatchRecalculator.FAILED, '', time.monotonic() - started,
+                       f'{e.__class__.__name__}: {e}')
+        else:
+            # Still on a provider we were trying to replace (e.g. the API was unavailable)
+            stale = route.provider in stale_providers
+            outcome = (
+                trip_id,
+                RouteBatchRecalculator.FALLBACK if stale else RouteBatchRecalculator.SUCCEEDED,
+                route.provider, time.monotonic() - started, '',
+            )
+        finally:
+            # Each pool thread has its own connection; don't leave them open
+            connection.close()
+        return outcome
+
+    @staticmethod
+    def run(trip_ids, workers=4, rate=10, burst=None, stale_providers=(), checkpoint=None,
+            checkpoint_every=25, on_result=None, stop_event=None):
+        """
+        Recompute routes for trip_ids.
+
+        Args:
+            trip_ids: trips to recompute (ids in the checkpoint's done set are skipped)
+            workers: pool threads
+            rate: provider requests per second (0: unlimited)
+            burst: token bucket capacity (default: rate)
+            stale_providers: providers whose result counts as a fallback
+            checkpoint: RouteCheckpoint, saved every checkpoint_every results
+            on_result: optional callback(result tuple) for progress output
+            stop_event: optional threading.Event; once set no new trips start
+
+        Returns:
+            dict summary: selected, skipped, succeeded, fallback, failed,
+            providers (count per provider), provider_requests, throttled_seconds,
+            elapsed_seconds, trips_per_second, p50_seconds, p95_seconds, stopped
+        """
+        checkpoint = checkpoint or RouteCheckpoint()
+        pending = [trip_id for trip_id in trip_ids if trip_id not in checkpoint.done]
+        stop_event = stop_event or threading.Event()
+
+        client = get_maps_client()
+        previous_limiter = client.rate_limiter
+        limiter = TokenBucket(rate, burst) if rate > 0 else None
+        client.rate_limiter = limiter
+
+        counts = {RouteBatchRecalculator.SUCCEEDED: 0, RouteBatchRecalculator.FALLBACK: 0,
+                  RouteBatchRecalculator.FAILED: 0}
+        providers = {}
+        durations = []
+        started = time.monotonic()
+        since_save = 0
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                queue = iter(pending)
+                in_flight = set()
+                while True:
+                    # Keep a bounded number of trips in flight so a stop takes effect quickly
+                    while not stop_event.is_set() and len(in_flight) < workers * 2:
+                        trip_id = next(queue, None)
+                        if trip_id is None:
+                            break
+                        in_flight.add(executor.submit(
+                            RouteBatchRecalculator.recompute_trip, trip_id, tuple(stale_providers)
+                        ))
+                    if not in_flight:
+                        break
+
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        result = future.result()
+                        trip_id, outcome, provider, seconds, error = result
+                        counts[outcome] += 1
+                        if provider:
+                            providers[provider] = providers.get(provider, 0) + 1
+                        durations.append(seconds)
+                        checkpoint.record(trip_id, outcome, error)
+                        since_save += 1
+                        if on_result is not None:
+                            on_result(result)
+
+                    if since_save >= checkpoint_every:
+                        checkpoint.save()
+                        since_save = 0
+        finally:
+            client.rate_limiter = previous_limiter
+            checkpoint.save()
+
+        elapsed = time.monotonic() - started
+        durations.sort()
+        processed = len(durations)
+        return {
+            'selected': len(trip_ids),
+            'skipped': len(trip_ids) - len(pending),
+            'succeeded': counts[RouteBatchRecalculator.SUCCEEDED],
+            'fallback': counts[RouteBatchRecalculator.FALLBACK],
+            'failed': counts[RouteBatchRecalculator.FAILED],
+            'providers': providers,
+            'provider_requests': limiter.acquired if limiter else None,
+            'throttled_seconds': limiter.waited_seconds if limiter else 0.0,
+            'elapsed_seconds': elapsed,
+            'trips_per_second': processed / elapsed if elapsed else 0.0,
+            'p50_seconds': durations[processed // 2] if durations else 0.0,
+            'p95_seconds': durations[min(int(processed * 0.95), processed - 1)] if durations else 0.0,
+            'stopped': stop_event.is_set() and processed < len(pending),
+        }
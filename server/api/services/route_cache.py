@@ -0,0 +1,329 @@
+import hashlib
+import json
+import random
+import re
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import RouteCacheEntry, RouteCacheCounter
+
+
+_LAT_LNG_RE = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$')
+
+
+class DirectionsCache:
+    """
+    DB-backed cache for Google Directions API routes.
+
+    Entries are keyed by the normalized origin, destination and waypoint list,
+    expire after ROUTE_CACHE_TTL_SECONDS and are evicted least-recently-used
+    first once the table grows past ROUTE_CACHE_MAX_ENTRIES. Eviction runs on
+    about one write in ROUTE_CACHE_EVICT_EVERY (and via `manage.py route_cache
+    evict`), so the table can briefly exceed its limit.
+
+    A hit is a single SELECT: last_accessed_at is refreshed only once it is
+    older than ROUTE_CACHE_TOUCH_AFTER_SECONDS, and hit/miss counts (global
+    and per entry) are kept in process memory and written every
+    ROUTE_CACHE_STATS_FLUSH_EVERY lookups, or when stats() is read.
+    """
+
+    # Full routes (with overview_polyline) and single legs cached by
+    # DistanceCalculator.calculate_distances live under separate keys
+    KIND_ROUTE = 'route'
+    KIND_LEG = 'leg'
+
+    COUNTER_HITS = 'hits'
+    COUNTER_MISSES = 'misses'
+    COUNTER_EVICTIONS = 'evictions'
+
+    # Counts not yet written to the database, shared by this process's threads
+    _stats_lock = threading.Lock()
+    _pending = {COUNTER_HITS: 0, COUNTER_MISSES: 0}
+    _pending_entry_hits = {}  # entry id -> hits
+
+    @staticmethod
+    def is_enabled():
+        return getattr(settings, 'ROUTE_CACHE_ENABLED', True)
+
+    @staticmethod
+    def normalize(value):
+        """
+        Normalize a formatted location string so equivalent inputs share a key.
+
+        Addresses are lowercased with whitespace collapsed; "lat,lng" pairs are
+        rounded to 5 decimal places (~1 m).
+        """
+        if not value:
+            return ''
+
+        match = _LAT_LNG_RE.match(str(value))
+        if match:
+            lat, lng = float(match.group(1)), float(match.group(2))
+            return f"{lat:.5f},{lng:.5f}"
+
+        return ' '.join(str(value).lower().split())
+
+    @staticmethod
+    def make_key(origin, destination, waypoints=None, kind=KIND_ROUTE):
+        """Build the cache key for an origin/destination/waypoints request"""
+        parts = [
+            DirectionsCache.normalize(origin),
+            DirectionsCache.normalize(destination),
+            [DirectionsCache.normalize(w) for w in (waypoints or [])],
+        ]
+        if kind != DirectionsCache.KIND_ROUTE:
+            parts.append(kind)
+        return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _slim_route(route):
+        """Drop turn-by-turn steps, which are large and never read back"""
+        slim = {k: v for k, v in route.items() if k != 'legs'}
+        slim['legs'] = [
+            {k: v for k, v in leg.items() if k != 'steps'}
+            for leg in route.get('legs', [])
+        ]
+        return slim
+
+    @staticmethod
+    def _increment(name, amount=1):
+        updated = RouteCacheCounter.objects.filter(name=name).update(value=F('value') + amount)
+        if not updated:
+            try:
+                with transaction.atomic():
+                    RouteCacheCounter.objects.create(name=name, value=amount)
+            except IntegrityError:
+                RouteCacheCounter.objects.filter(name=name).update(value=F('value') + amount)
+
+    @staticmethod
+    def _record(hits=0, misses=0, entry_ids=()):
+        """Count lookups in memory, flushing once enough have accumulated"""
+        cls = DirectionsCache
+        with cls._stats_lock:
+            cls._pending[cls.COUNTER_HITS] += hits
+            cls._pending[cls.COUNTER_MISSES] += misses
+            for entry_id in entry_ids:
+                cls._pending_entry_hits[entry_id] = cls._pending_entry_hits.get(entry_id, 0) + 1
+            pending = cls._pending[cls.COUNTER_HITS] + cls._pending[cls.COUNTER_MISSES]
+
+        every = getattr(settings, 'ROUTE_CACHE_STATS_FLUSH_EVERY', 100)
+        if pending >= max(every, 1):
+            cls.flush_stats()
+
+    @staticmethod
+    def flush_stats():
+        """Write this process's pending hit/miss counts to the database"""
+        cls = DirectionsCache
+        with cls._stats_lock:
+            counters = {name: value for name, value in cls._pending.items() if value}
+            entry_hits = cls._pending_entry_hits
+            cls._pending = dict.fromkeys(cls._pending, 0)
+            cls._pending_entry_hits = {}
+
+        for name, value in counters.items():
+            cls._increment(name, value)
+
+        # One UPDATE per distinct hit count rather than per entry
+        by_count = {}
+        for entry_id, count in entry_hits.items():
+            by_count.setdefault(count, []).append(entry_id)
+        for count, entry_ids in by_count.items():
+            RouteCacheEntry.objects.filter(pk__in=entry_ids).update(hit_count=F('hit_count') + count)
+
+    @staticmethod
+    def _touch(entries, now):
+        """Refresh last_accessed_at (for LRU eviction) of entries not touched recently"""
+        touch_after = timedelta(seconds=getattr(settings, 'ROUTE_CACHE_TOUCH_AFTER_SECONDS', 3600))
+        stale_ids = [entry.pk for entry in entries if entry.last_accessed_at <= now - touch_after]
+        if stale_ids:
+            RouteCacheEntry.objects.filter(pk__in=stale_ids).update(last_accessed_at=now)
+
+    @staticmethod
+    def get(origin, destination, waypoints=None, kind=KIND_ROUTE):
+        """
+        Look up a cached route (or, with kind=KIND_LEG, a single cached leg).
+
+        Returns:
+            dict: routes[0] of the cached Directions response, or None on miss
+        """
+        if not DirectionsCache.is_enabled():
+            return None
+
+        key = DirectionsCache.make_key(origin, destination, waypoints, kind)
+        now = timezone.now()
+
+        entry = (
+            RouteCacheEntry.objects.filter(key=key, expires_at__gt=now)
+            .only('id', 'response', 'last_accessed_at')
+            .first()
+        )
+        if entry is None:
+            DirectionsCache._record(misses=1)
+            return None
+
+        DirectionsCache._touch([entry], now)
+        DirectionsCache._record(hits=1, entry_ids=[entry.pk])
+        return entry.response
+
+    @staticmethod
+    def get_many(pairs, kind=KIND_ROUTE):
+        """
+        Look up many (origin, destination) pairs without waypoints in one query.
+
+        Returns:
+            list: cached route (or None on miss) for each pair, in input order
+        """
+        if not DirectionsCache.is_enabled() or not pairs:
+            return [None] * len(pairs)
+
+        keys = [DirectionsCache.make_key(origin, destination, None, kind) for origin, destination in pairs]
+        now = timezone.now()
+
+        entries = {
+            entry.key: entry
+            for entry in RouteCacheEntry.objects.filter(key__in=set(keys), expires_at__gt=now)
+            .only('id', 'key', 'response', 'last_accessed_at')
+        }
+        found = [entries.get(key) for key in keys]
+
+        DirectionsCache._touch(list(entries.values()), now)
+        hits = [entry.pk for entry in found if entry is not None]
+        DirectionsCache._record(hits=len(hits), misses=len(found) - len(hits), entry_ids=hits)
+        return [entry.response if entry is not None else None for entry in found]
+
+    @staticmethod
+    def _entry_fields(origin, destination, waypoints, route, now, ttl):
+        return {
+            'origin': DirectionsCache.normalize(origin)[:512],
+            'destination': DirectionsCache.normalize(destination)[:512],
+            'waypoints': [DirectionsCache.normalize(w) for w in (waypoints or [])],
+            'response': DirectionsCache._slim_route(route),
+            'last_accessed_at': now,
+            'expires_at': now + timedelta(seconds=ttl),
+        }
+
+    @staticmethod
+    def _maybe_evict():
+        every = getattr(settings, 'ROUTE_CACHE_EVICT_EVERY', 100)
+        if every > 0 and random.random() * every < 1:
+            DirectionsCache.evict()
+
+    @staticmethod
+    def set(origin, destination, waypoints, route, kind=KIND_ROUTE):
+        """
+        Store a route (routes[0] of a Directions response) in the cache.
+
+        Partial routes, such as one leg of a longer request ({'legs': [leg]},
+        no overview_polyline), must be stored with kind=KIND_LEG so they never
+        answer a route lookup.
+        """
+        if not DirectionsCache.is_enabled() or not route:
+            return
+
+        key = DirectionsCache.make_key(origin, destination, waypoints, kind)
+        now = timezone.now()
+        ttl = getattr(settings, 'ROUTE_CACHE_TTL_SECONDS', 7 * 24 * 60 * 60)
+
+        RouteCacheEntry.objects.update_or_create(
+            key=key,
+            defaults=DirectionsCache._entry_fields(origin, destination, waypoints, route, now, ttl),
+        )
+        DirectionsCache._maybe_evict()
+
+    @staticmethod
+    def set_many(items, kind=KIND_ROUTE):
+        """
+        Store many routes without waypoints in one upsert (see set()).
+
+        Args:
+            items: list of (origin, destination, route)
+            kind: KIND_ROUTE or KIND_LEG, for all of them
+        """
+        if not DirectionsCache.is_enabled():
+            return
+
+        now = timezone.now()
+        ttl = getattr(settings, 'ROUTE_CACHE_TTL_SECONDS', 7 * 24 * 60 * 60)
+
+        entries = {}
+        for origin, destination, route in items:
+            if route:
+                key = DirectionsCache.make_key(origin, destination, None, kind)
+                entries[key] = RouteCacheEntry(
+                    key=key, **DirectionsCache._entry_fields(origin, destination, None, route, now, ttl)
+                )
+        if not entries:
+            return
+
+        RouteCacheEntry.objects.bulk_create(
+            entries.values(),
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['origin', 'destination', 'waypoints', 'response', 'last_accessed_at', 'expires_at'],
+        )
+        DirectionsCache._maybe_evict()
+
+    @staticmethod
+    def evict():
+        """
+        Remove expired entries, then trim least-recently-used entries down to
+        ROUTE_CACHE_MAX_ENTRIES.
+
+        Returns:
+            int: number of entries removed
+        """
+        max_entries = getattr(settings, 'ROUTE_CACHE_MAX_ENTRIES', 10000)
+
+        removed, _ = RouteCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+
+        overflow = RouteCacheEntry.objects.count() - max_entries
+        if overflow > 0:
+            stale_ids = list(
+                RouteCacheEntry.objects.order_by('last_accessed_at')
+                .values_list('id', flat=True)[:overflow]
+            )
+            trimmed, _ = RouteCacheEntry.objects.filter(id__in=stale_ids).delete()
+            removed += trimmed
+
+        if removed:
+            DirectionsCache._increment(DirectionsCache.COUNTER_EVICTIONS, removed)
+
+        return removed
+
+    @staticmethod
+    def clear():
+        """Delete all cached routes and reset counters"""
+        with DirectionsCache._stats_lock:
+            DirectionsCache._pending = dict.fromkeys(DirectionsCache._pending, 0)
+            DirectionsCache._pending_entry_hits = {}
+        RouteCacheEntry.objects.all().delete()
+        RouteCacheCounter.objects.all().delete()
+
+    @staticmethod
+    def stats():
+        """
+        Get cache statistics.
+
+        Hit/miss counts still pending in other processes are not included.
+
+        Returns:
+            dict with entries, hits, misses, evictions and hit_rate
+        """
+        DirectionsCache.flush_stats()
+        counters = dict(RouteCacheCounter.objects.values_list('name', 'value'))
+        hits = counters.get(DirectionsCache.COUNTER_HITS, 0)
+        misses = counters.get(DirectionsCache.COUNTER_MISSES, 0)
+        lookups = hits + misses
+
+        return {
+            'entries': RouteCacheEntry.objects.count(),
+            'hits': hits,
+            'misses': misses,
+            'evictions': counters.get(DirectionsCache.COUNTER_EVICTIONS, 0),
+            'hit_rate': hits / lookups if lookups else 0.0,
+        }
@@ -1,138 +1,55 @@
-import requests
+import hashlib
+import json
+
 from django.conf import settings
+from django.utils import timezone
+from ..instrumentation import traced
 from ..models import Trip, Route, RequiredStop, RequiredStopType
+from . import poi_index
+from .geo import has_coordinates, haversine, pairwise_distances
+from .route_geometry import RouteGeometry
+from .routing import RoutingService
+from .single_flight import SingleFlight
+from .trip_simulator import TripSimulator
 
 
 class RouteCalculator:
     """
-    Calculates routes and required stops for trips using Google Directions API.
+    Calculates routes and required stops for trips.
     """
     
     @staticmethod
-    def _format_location(location):
-        """
-        Format location dict to string for Google Directions API.
-        
-        Args:
-            location: dict with address, latitude, longitude, etc.
-            
-        Returns:
-            String address or lat,lng format
-        """
-        if not location:
-            return None
-        
-        # Prefer formatted address
-        if location.get('address'):
-            return location['address']
-        
-        # Fall back to lat,lng
-        if location.get('latitude') and location.get('longitude'):
-            return f"{location['latitude']},{location['longitude']}"
-        
-        return None
+    def _route_locations(trip):
+        """Ordered stops for a trip: current location, pickup (if set), intermediate stops, dropoff"""
+        locations = [trip.current_location or {}]
+        if trip.pickup_location:
+            locations.append(trip.pickup_location)
+        locations.extend(trip.stops or [])
+        locations.append(trip.dropoff_location or {})
+        return locations
     
     @staticmethod
-    def _calculate_distance_from_api(trip):
-        """
-        Calculate route distance using Google Directions API.
-        
-        Args:
-            trip: Trip instance
-            
-        Returns:
-            tuple: (distance_miles, duration_hours, waypoints_list) or (None, None, None) on error
-        """
-        api_key = getattr(settings, 'GOOGLE_MAPS_API_KEY', '')
-        if not api_key:
-            return None, None, None
-        
-        # Build waypoints for the route: current -> pickup -> dropoff
-        origins = []
-        destinations = []
-        waypoints_list = []
-        
-        current = RouteCalculator._format_location(trip.current_location)
-        pickup = RouteCalculator._format_location(trip.pickup_location)
-        dropoff = RouteCalculator._format_location(trip.dropoff_location)
-        
-        if not current or not dropoff:
-            return None, None, None
-        
-        origins.append(current)
-        destinations.append(dropoff)
-        
-        if pickup and pickup != current and pickup != dropoff:
-            waypoints_list.append(pickup)
-        
-        # Build Google Directions API request
-        url = 'https://maps.googleapis.com/maps/api/directions/json'
-        params = {
-            'origin': origins[0],
-            'destination': destinations[0],
-            'waypoints': '|'.join(waypoints_list) if waypoints_list else None,
-            'key': api_key,
-            'units': 'imperial',  # Get results in miles
-        }
-        
-        # Remove None values
-        params = {k: v for k, v in params.items() if v is not None}
-        
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('status') != 'OK' or not data.get('routes'):
-                return None, None, None
-            
-            route = data['routes'][0]
-            
-            # Calculate total distance and duration
-            total_distance_meters = 0
-            total_duration_seconds = 0
-            
-            for leg in route.get('legs', []):
-                if leg.get('distance', {}).get('value'):
-                    total_distance_meters += leg['distance']['value']
-                if leg.get('duration', {}).get('value'):
-                    total_duration_seconds += leg['duration']['value']
-            
-            # Convert to miles and hours
-            distance_miles = total_distance_meters / 1609.34
-            duration_hours = total_duration_seconds / 3600
-            
-            # Extract waypoints from route
-            waypoints = []
-            for leg in route.get('legs', []):
-                start_location = leg.get('start_location', {})
-                if start_location:
-                    waypoints.append({
-                        'latitude': start_location.get('lat'),
-                        'longitude': start_location.get('lng'),
-                        'address': leg.get('start_address', ''),
-                    })
-            
-            # Add final destination
-            if route.get('legs'):
-                end_location = route['legs'][-1].get('end_location', {})
-                if end_location:
-                    waypoints.append({
-                        'latitude': end_location.get('lat'),
-                        'longitude': end_location.get('lng'),
-                        'address': route['legs'][-1].get('end_address', ''),
-                    })
-            
-            return distance_miles, duration_hours, waypoints
-            
-        except (requests.RequestException, KeyError, ValueError) as e:
-            # Log error or handle gracefully
-            return None, None, None
+    def input_fingerprint(trip):
+        """Hash of the trip fields a route calculation depends on"""
+        inputs = [
+            RouteCalculator._route_locations(trip),
+            trip.current_cycle_hours,
+            trip.start_datetime.isoformat() if trip.start_datetime else None,
+        ]
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
     
     @staticmethod
+    @traced('RouteCalculator')
     def calculate_route(trip):
         """
-        Calculate route from trip locations using Google Directions API.
+        Calculate route from trip locations using the routing provider chain
+        (Google Directions, then the offline road graph, then haversine).
+        
+        Concurrent calculations for the same trip (across processes) are
+        coalesced with SingleFlight: one caller computes while the others
+        wait, then share its route if the trip's inputs are unchanged.
+        This keeps them from routing twice and from rewriting the same
+        RequiredStop rows at once.
         
         Args:
             trip: Trip instance
@@ -140,88 +57,220 @@ class RouteCalculator:
         Returns:
             Route instance with calculated waypoints and distance
         """
+        fingerprint = RouteCalculator.input_fingerprint(trip)
+        
+        def reuse():
+            route = Route.objects.filter(
+                trip=trip, input_fingerprint=fingerprint, calculated_at__isnull=False
+            ).first()
+            if route is not None:
+                trip.refresh_from_db(fields=['total_distance', 'estimated_duration'])
+            return route
+        
+        return SingleFlight.run(
+            f'trip-route:{trip.pk}',
+            lambda: RouteCalculator._calculate_route(trip, fingerprint),
+            reuse,
+        )
+    
+    @staticmethod
+    def _calculate_route(trip, fingerprint):
         route, created = Route.objects.get_or_create(trip=trip)
         
-        # Try to calculate using Google API
-        distance_miles, duration_hours, waypoints_list = RouteCalculator._calculate_distance_from_api(trip)
-        print(f"distance_miles: {distance_miles}, duration_hours: {duration_hours}, waypoints_list: {waypoints_list}")
+        result = RoutingService.route(RouteCalculator._route_locations(trip))
         
-        if distance_miles is not None:
-            route.total_distance = distance_miles
-            route.estimated_time = duration_hours
-            route.waypoints = waypoints_list or [
+        if result is not None:
+            route.total_distance = result['distance_miles']
+            route.estimated_time = result['duration_hours']
+            route.provider = result['provider']
+            route.waypoints = result['waypoints'] or [
                 trip.current_location,
                 trip.pickup_location,
+                *(trip.stops or []),
                 trip.dropoff_location
             ]
-        else:
-            # Fallback to rough calculation if API fails
-            pickup = trip.pickup_location
-            dropoff = trip.dropoff_location
-            current = trip.current_location
             
-            if current.get('latitude') and dropoff.get('latitude'):
-                # Simple Haversine-like approximation
-                from math import radians, cos, sin, asin, sqrt
-                
-                def haversine(lat1, lon1, lat2, lon2):
-                    R = 3959  # Earth radius in miles
-                    dlat = radians(lat2 - lat1)
-                    dlon = radians(lon2 - lon1)
-                    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-                    c = 2 * asin(sqrt(a))
-                    return R * c
-                
-                # Calculate current to dropoff distance
-                distance_miles = haversine(
-                    current['latitude'], current['longitude'],
-                    dropoff['latitude'], dropoff['longitude']
-                )
-                
-                # If pickup exists, add it to the route
-                if pickup.get('latitude'):
-                    distance_to_pickup = haversine(
-                        current['latitude'], current['longitude'],
-                        pickup['latitude'], pickup['longitude']
-                    )
-                    distance_from_pickup = haversine(
-                        pickup['latitude'], pickup['longitude'],
-                        dropoff['latitude'], dropoff['longitude']
-                    )
-                    distance_miles = distance_to_pickup + distance_from_pickup
-                
-                route.total_distance = distance_miles
-                route.estimated_time = distance_miles / 55  # Assume 55 mph average
-                route.waypoints = [
-                    trip.current_location,
-                    trip.pickup_location,
-                    trip.dropoff_location
-                ]
-            else:
-                route.total_distance = 0
-                route.estimated_time = 0
-                route.waypoints = [
-                    trip.current_location,
-                    trip.pickup_location,
-                    trip.dropoff_location
-                ]
+            # Full geometry with a cumulative-miles index scaled to the routed distance
+            geometry = RouteGeometry(result['geometry'] or [])
+            geometry.scaled_to(route.total_distance).save_to(route)
+        else:
+            route.total_distance = 0
+            route.estimated_time = 0
+            route.provider = ''
+            route.geometry = b''
+            route.cumulative_miles = b''
+            route.waypoints = [
+                trip.current_location,
+                trip.pickup_location,
+                *(trip.stops or []),
+                trip.dropoff_location
+            ]
         
+        route.origin_location = trip.current_location or {}
+        route.calculated_at = timezone.now()
+        route.input_fingerprint = fingerprint
         route.save()
         
-        # Update trip's total_distance
+        # Update trip's total_distance (only these fields: the trip may have been
+        # edited since a background job loaded it)
         trip.total_distance = route.total_distance
         trip.estimated_duration = route.estimated_time
-        trip.save()
+        trip.save(update_fields=['total_distance', 'estimated_duration', 'updated_at'])
         
         # Calculate required stops
         RouteCalculator.calculate_required_stops(route)
         
         return route
     
+    @staticmethod
+    def _location_at_mile(geometry, miles):
+        """Location dict for a point along the route geometry ({} without geometry)"""
+        point = geometry.point_at_mile(miles) if geometry else None
+        if point is None:
+            return {}
+        return {'latitude': round(point[0], 6), 'longitude': round(point[1], 6)}
+    
+    # Facilities a required stop may be moved to
+    STOP_FACILITY_KINDS = {
+        RequiredStopType.FUEL: (poi_index.FUEL, poi_index.TRUCK_STOP),
+        RequiredStopType.REST_10HR: (poi_index.TRUCK_STOP, poi_index.REST_AREA),
+        RequiredStopType.RESTART_34: (poi_index.TRUCK_STOP, poi_index.REST_AREA),
+        RequiredStopType.BREAK_30: poi_index.KINDS,
+    }
+    
+    @staticmethod
+    def _facility_snapper(geometry, index):
+        """
+        Build a TripSimulator snap callback that moves a stop to the facility
+        nearest the route within POI_SNAP_MILES before its ideal mileage
+        (never later, so HOS and fuel limits still hold), preferring the
+        latest one.
+        """
+        snap_miles = getattr(settings, 'POI_SNAP_MILES', 25)
+        corridor_miles = getattr(settings, 'POI_CORRIDOR_MILES', 3)
+        
+        def snap(stop_type, ideal_mile, earliest_mile):
+            kinds = RouteCalculator.STOP_FACILITY_KINDS.get(stop_type)
+            if not kinds:
+                return None
+            
+            candidates = index.along_corridor(
+                geometry, max(ideal_mile - snap_miles, earliest_mile), ideal_mile, corridor_miles, kinds
+            )
+            if not candidates:
+                return None
+            
+            poi, route_mile, offset = max(candidates, key=lambda item: (item[1], -item[2]))
+            return route_mile, {
+                'latitude': poi['latitude'],
+                'longitude': poi['longitude'],
+                'name': poi['name'],
+                'address': poi['address'],
+                'kind': poi['kind'],
+                'offset_miles': round(offset, 2),
+            }
+        
+        return snap
+    
+    @staticmethod
+    def _stop_miles(trip, route, geometry):
+        """
+        Route miles of the pickup and intermediate stops, in route order.
+        
+        Each stop is matched to the nearest point of the route geometry at or
+        after the previous stop's, so a route that passes near a stop twice
+        keeps the stops in order. Without geometry, miles are the
+        straight-line share of the trip before each stop.
+        
+        Returns:
+            list of (mile, RequiredStopType, location or None) for TripSimulator
+        """
+        fixed = []
+        if trip.pickup_location:
+            fixed.append((RequiredStopType.PICKUP, trip.pickup_location, None))
+        for stop in trip.stops or []:
+            fixed.append((RequiredStopType.DROPOFF, stop, stop))
+        if not fixed:
+            return []
+        
+        def point(location):
+            if has_coordinates(location):
+                return float(location['latitude']), float(location['longitude'])
+            return None
+        
+        miles = []
+        if geometry:
+            first = 0
+            for _, location, _ in fixed:
+                target = point(location)
+                if target is not None:
+                    candidates = geometry.points[first:]
+                    distances = pairwise_distances([target] * len(candidates), candidates)
+                    first += min(range(len(distances)), key=distances.__getitem__)
+                miles.append(geometry.cumulative[first])
+        else:
+            points = [point(trip.current_location)] + [point(loc) for _, loc, _ in fixed]
+            points.append(point(trip.dropoff_location))
+            if any(p is None for p in points):
+                miles = [0.0] * len(fixed)
+            else:
+                legs = [haversine(*a, *b) for a, b in zip(points, points[1:])]
+                total = sum(legs)
+                travelled = 0.0
+                for leg in legs[:-1]:
+                    travelled += leg
+                    miles.append(route.total_distance * travelled / total if total else 0.0)
+        
+        return [
+            (mile, stop_type, location)
+            for mile, (stop_type, _, location) in zip(miles, fixed)
+        ]
+    
+    @staticmethod
+    def start_time(trip, route):
+        """When the planned trip departs: its start_datetime, else when the route was calculated"""
+        return trip.start_datetime or route.calculated_at or timezone.now()
+    
+    @staticmethod
+    def average_speed(route):
+        """Average driving speed over the route in mph, or None if unknown"""
+        if route.total_distance and route.estimated_time:
+            return route.total_distance / route.estimated_time
+        return None
+    
+    @staticmethod
+    def simulate_trip(trip, route, geometry=None, snap=None):
+        """
+        Run the HOS trip simulation for a trip's route.
+        
+        Args:
+            trip: Trip instance
+            route: its Route
+            geometry: the route's RouteGeometry (for the pickup/stop miles), if loaded
+            snap: optional TripSimulator snap callback
+            
+        Returns:
+            TripSimulator.simulate() plan
+        """
+        return TripSimulator.simulate(
+            route.total_distance,
+            speed_mph=RouteCalculator.average_speed(route),
+            cycle_hours_used=trip.current_cycle_hours,
+            waypoints=RouteCalculator._stop_miles(trip, route, geometry),
+            snap=snap,
+        )
+    
     @staticmethod
     def calculate_required_stops(route):
         """
-        Calculate required stops based on distance and HOS rules.
+        Calculate the trip's stop schedule by simulating it under HOS rules.
+        
+        The simulation (TripSimulator) accounts for the driver's used cycle
+        hours, the 11/14-hour limits, 30-minute breaks, pickup/dropoff time
+        and fueling, and gives each stop an ETA from the trip's start time.
+        Stops are placed along the stored route geometry, or at a real
+        facility from the POI index (POI_DATASET_PATH) shortly before their
+        ideal mileage, and written with one bulk insert.
         
         Args:
             route: Route instance
@@ -229,50 +278,38 @@ class RouteCalculator:
         # Clear existing stops
         route.stops.all().delete()
         
-        total_distance = route.total_distance
-        distance_covered = 0
+        trip = route.trip
+        geometry = RouteGeometry.from_route(route)
+        index = poi_index.get_poi_index() if geometry else None
+        snap = RouteCalculator._facility_snapper(geometry, index) if index is not None else None
         
-        # Fuel stops every 1000 miles
-        while distance_covered + 1000 < total_distance:
-            distance_covered += 1000
-            
-            RequiredStop.objects.create(
-                route=route,
-                type=RequiredStopType.FUEL,
-                location={},  # TODO: Will find actual fuel station via Mapbox
-                duration_minutes=15,  # Typical fuel stop
-                miles_from_start=distance_covered,
-                reason='Fueling required every 1,000 miles'
-            )
-        
-        # Rest stops based on driving hours (assume 55 mph average)
-        # 11 hours driving = ~605 miles, 14 hour window = ~770 miles
-        avg_speed = 55
-        driving_miles = 0
+        plan = RouteCalculator.simulate_trip(trip, route, geometry, snap)
+        start_time = RouteCalculator.start_time(trip, route)
+        schedule, arrival = TripSimulator.schedule(plan, start_time)
         
-        while driving_miles + 605 < total_distance:
-            driving_miles += 605
-            
-            RequiredStop.objects.create(
-                route=route,
-                type=RequiredStopType.REST_10HR,
-                location={},  # TODO: Will find actual rest area via Mapbox
-                duration_minutes=10 * 60,  # 10 hours
-                miles_from_start=driving_miles,
-                reason='10-hour rest required after 11 hours driving'
+        fixed_locations = {
+            RequiredStopType.PICKUP: trip.pickup_location,
+            RequiredStopType.DROPOFF: trip.dropoff_location,
+        }
+        stops = []
+        for stop in schedule:
+            miles = stop['miles_from_start']
+            location = (
+                stop.get('location')
+                or fixed_locations.get(stop['type'])
+                or RouteCalculator._location_at_mile(geometry, miles)
             )
-        
-        # 30-minute break stops (every 8 hours = ~440 miles)
-        driving_miles = 0
-        while driving_miles + 440 < total_distance:
-            driving_miles += 440
-            
-            RequiredStop.objects.create(
+            stops.append(RequiredStop(
                 route=route,
-                type=RequiredStopType.BREAK_30,
-                location={},  # TODO: Will find rest area
-                duration_minutes=30,
-                miles_from_start=driving_miles,
-                reason='30-minute break required after 8 hours driving'
-            )
-
+                type=stop['type'],
+                location=location,
+                duration_minutes=round(stop['duration_hours'] * 60),
+                miles_from_start=round(miles, 1),
+                reason=stop['reason'],
+                eta=stop['eta'],
+            ))
+        
+        RequiredStop.objects.bulk_create(stops)
+        
+        route.estimated_arrival = arrival
+        route.save(update_fields=['estimated_arrival'])
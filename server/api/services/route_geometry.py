@@ -0,0 +1,109 @@
+import sys
+from array import array
+from bisect import bisect_left
+
+from . import polyline
+from .geo import pairwise_distances
+
+
+def _pack(typecode, values):
+    packed = array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(typecode, blob):
+    values = array(typecode)
+    values.frombytes(bytes(blob or b''))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class RouteGeometry:
+    """
+    Full route geometry with a cumulative-distance index.
+
+    Stored on Route as two little-endian float32 blobs: interleaved lat/lng
+    pairs (8 bytes per point, ~1 m precision) and the cumulative miles at
+    each point (4 bytes per point). point_at_mile() is a binary search over
+    the cumulative array plus a linear interpolation within one segment.
+    """
+
+    def __init__(self, points, cumulative=None):
+        self.points = [(float(lat), float(lng)) for lat, lng in points]
+        if cumulative is None:
+            cumulative = [0.0]
+            if len(self.points) > 1:
+                for miles in pairwise_distances(self.points[:-1], self.points[1:]):
+                    cumulative.append(cumulative[-1] + float(miles))
+        self.cumulative = list(cumulative) if self.points else []
+
+    @classmethod
+    def from_polyline(cls, encoded, precision=5):
+        return cls(polyline.decode(encoded, precision))
+
+    @classmethod
+    def from_route(cls, route):
+        """Load a Route's stored geometry, or None if it has none"""
+        coords = _unpack('f', route.geometry)
+        if not coords:
+            return None
+        points = list(zip(coords[0::2], coords[1::2]))
+        return cls(points, _unpack('f', route.cumulative_miles))
+
+    def __len__(self):
+        return len(self.points)
+
+    @property
+    def length_miles(self):
+        return self.cumulative[-1] if self.cumulative else 0.0
+
+    def scaled_to(self, total_miles):
+        """
+        Rescale the index so it ends at total_miles (e.g. the provider's road
+        distance, which a straight-line sum over a simplified polyline undershoots).
+        """
+        if self.length_miles > 0 and total_miles:
+            factor = total_miles / self.length_miles
+            self.cumulative = [miles * factor for miles in self.cumulative]
+        return self
+
+    def pack(self):
+        """
+        Returns:
+            tuple: (geometry bytes, cumulative_miles bytes)
+        """
+        coords = [value for point in self.points for value in point]
+        return _pack('f', coords), _pack('f', self.cumulative)
+
+    def save_to(self, route):
+        """Set the geometry fields on a Route (the caller saves it)"""
+        route.geometry, route.cumulative_miles = self.pack()
+
+    def point_at_mile(self, mile):
+        """
+        Interpolated (lat, lng) at a distance along the route, clamped to its ends.
+
+        Returns:
+            tuple (lat, lng), or None for an empty geometry
+        """
+        if not self.points:
+            return None
+        if mile <= 0 or len(self.points) == 1:
+            return self.points[0]
+        if mile >= self.length_miles:
+            return self.points[-1]
+
+        i = bisect_left(self.cumulative, mile)
+        start_miles, end_miles = self.cumulative[i - 1], self.cumulative[i]
+        (lat1, lng1), (lat2, lng2) = self.points[i - 1], self.points[i]
+        if end_miles <= start_miles:
+            return lat2, lng2
+
+        t = (mile - start_miles) / (end_miles - start_miles)
+        return lat1 + (lat2 - lat1) * t, lng1 + (lng2 - lng1) * t
+
+    def polyline(self, precision=5):
+        return polyline.encode(self.points, precision)
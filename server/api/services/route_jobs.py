@@ -0,0 +1,174 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from ..models import Trip, RouteJob, RouteJobStatus, RouteStatus
+
+
+class RouteJobQueue:
+    """
+    DB-backed queue for route calculations.
+
+    Requests enqueue a RouteJob and return immediately; the run_route_worker
+    management command claims and runs jobs outside the request path.
+    """
+
+    @staticmethod
+    def _set_trip_status(trip, route_status):
+        Trip.objects.filter(pk=trip.pk).update(route_status=route_status)
+        trip.route_status = route_status
+
+    @staticmethod
+    @transaction.atomic
+    def enqueue(trip, run_after=None):
+        """
+        Queue a route calculation for a trip.
+
+        A trip has at most one queued job; enqueueing again while one is
+        waiting returns the existing job instead of creating a duplicate,
+        moved up to run_after if that is earlier (an immediate request is
+        not held back by a debounced one).
+
+        Args:
+            trip: Trip instance
+            run_after: optional datetime before which the job must not run
+
+        Returns:
+            RouteJob instance
+        """
+        run_after = run_after or timezone.now()
+
+        job = RouteJob.objects.filter(trip=trip, status=RouteJobStatus.QUEUED).first()
+        if job is None:
+            job = RouteJob.objects.create(
+                trip=trip,
+                run_after=run_after,
+                max_attempts=getattr(settings, 'ROUTE_JOB_MAX_ATTEMPTS', 3),
+            )
+        elif run_after < job.run_after:
+            RouteJob.objects.filter(pk=job.pk, status=RouteJobStatus.QUEUED).update(
+                run_after=Least(F('run_after'), run_after)
+            )
+            job.run_after = run_after
+
+        RouteJobQueue._set_trip_status(trip, RouteStatus.PENDING)
+        return job
+
+    @staticmethod
+    def claim_next():
+        """
+        Claim the oldest runnable job.
+
+        The status transition is a conditional UPDATE, so concurrent workers
+        never claim the same job.
+
+        Returns:
+            RouteJob instance marked running, or None if the queue is empty
+        """
+        now = timezone.now()
+        candidate_ids = list(
+            RouteJob.objects.filter(status=RouteJobStatus.QUEUED, run_after__lte=now)
+            .order_by('run_after', 'id')
+            .values_list('id', flat=True)[:10]
+        )
+
+        for job_id in candidate_ids:
+            claimed = RouteJob.objects.filter(pk=job_id, status=RouteJobStatus.QUEUED).update(
+                status=RouteJobStatus.RUNNING,
+                started_at=now,
+                progress=10,
+                attempts=F('attempts') + 1,
+            )
+            if claimed:
+                return RouteJob.objects.select_related('trip').get(pk=job_id)
+
+        return None
+
+    @staticmethod
+    def run(job):
+        """
+        Run a claimed job, retrying with a delay until max_attempts is reached.
+
+        Args:
+            job: RouteJob instance returned by claim_next
+        """
+        from .route_calculator import RouteCalculator
+
+        trip = job.trip
+        RouteJobQueue._set_trip_status(trip, RouteStatus.CALCULATING)
+
+        try:
+            RouteCalculator.calculate_route(trip)
+        except Exception as e:
+            job.error = f'{e.__class__.__name__}: {e}'
+            job.progress = 0
+
+            if job.attempts < job.max_attempts:
+                delay = getattr(settings, 'ROUTE_JOB_RETRY_DELAY_SECONDS', 30) * job.attempts
+                job.status = RouteJobStatus.QUEUED
+                job.run_after = timezone.now() + timedelta(seconds=delay)
+                job.save(update_fields=['status', 'error', 'progress', 'run_after'])
+                RouteJobQueue._set_trip_status(trip, RouteStatus.PENDING)
+            else:
+                job.status = RouteJobStatus.FAILED
+                job.finished_at = timezone.now()
+                job.save(update_fields=['status', 'error', 'progress', 'finished_at'])
+                RouteJobQueue._set_trip_status(trip, RouteStatus.FAILED)
+            return job
+
+        job.status = RouteJobStatus.SUCCEEDED
+        job.progress = 100
+        job.error = ''
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'progress', 'error', 'finished_at'])
+
+        # A newer job may have been queued while this one was running
+        if not RouteJob.objects.filter(trip_id=trip.pk, status=RouteJobStatus.QUEUED).exists():
+            RouteJobQueue._set_trip_status(trip, RouteStatus.READY)
+
+        return job
+
+    @staticmethod
+    def requeue_stale():
+        """
+        Return jobs stuck in running (e.g. after a worker crash) to the queue.
+
+        Jobs that already used all their attempts are marked failed instead,
+        so a job that kills its worker every time is not retried forever.
+
+        Returns:
+            tuple: (number of jobs requeued, number of jobs failed)
+        """
+        timeout = getattr(settings, 'ROUTE_JOB_STALE_AFTER_SECONDS', 300)
+        now = timezone.now()
+        stale = RouteJob.objects.filter(
+            status=RouteJobStatus.RUNNING,
+            started_at__lt=now - timedelta(seconds=timeout),
+        )
+
+        exhausted_trip_ids = list(
+            stale.filter(attempts__gte=F('max_attempts')).values_list('trip_id', flat=True)
+        )
+        failed = stale.filter(attempts__gte=F('max_attempts')).update(
+            status=RouteJobStatus.FAILED,
+            progress=0,
+            error='Worker stopped while running the job',
+            finished_at=now,
+        )
+        if exhausted_trip_ids:
+            # Trips with a newer queued job stay pending
+            Trip.objects.filter(pk__in=exhausted_trip_ids).exclude(
+                route_jobs__status=RouteJobStatus.QUEUED
+            ).update(route_status=RouteStatus.FAILED)
+
+        requeued = stale.update(status=RouteJobStatus.QUEUED, progress=0, run_after=now)
+        return requeued, failed
+
+    @staticmethod
+    def latest_for_trip(trip):
+        """Get the most recent job for a trip, or None"""
+        return RouteJob.objects.filter(trip=trip).order_by('-created_at', '-id').first()
@@ -0,0 +1,264 @@
+from django.conf import settings
+
+from .maps_client import get_maps_client
+from . import polyline
+from .geo import format_location, has_coordinates, path_length
+from .road_graph import get_road_graph
+from .route_cache import DirectionsCache
+from .single_flight import SingleFlight
+
+
+AVERAGE_SPEED_MPH = 55
+
+
+def _coordinates(locations):
+    """
+    (lat, lng) of each stop that has coordinates, in order; empty if the
+    origin or destination has none.
+    """
+    if not locations or not has_coordinates(locations[0]) or not has_coordinates(locations[-1]):
+        return []
+    return [
+        (float(loc['latitude']), float(loc['longitude']))
+        for loc in locations
+        if has_coordinates(loc)
+    ]
+
+
+class RoutingProvider:
+    """
+    A routing backend.
+
+    route() takes the ordered stops of a trip (location dicts) and returns a
+    result dict with distance_miles, duration_hours, waypoints (or None to
+    keep the input locations), geometry (list of (lat, lng) along the route,
+    or None) and provider, or None if it cannot route them.
+    """
+
+    name = ''
+
+    def route(self, locations):
+        raise NotImplementedError
+
+    def _result(self, distance_miles, duration_hours, waypoints=None, geometry=None):
+        return {
+            'distance_miles': distance_miles,
+            'duration_hours': duration_hours,
+            'waypoints': waypoints,
+            'geometry': geometry,
+            'provider': self.name,
+        }
+
+
+class GoogleDirectionsProvider(RoutingProvider):
+    """Google Directions API (through DirectionsCache and the shared MapsClient)"""
+
+    name = 'google'
+
+    # Intermediate waypoints the Directions API accepts per request; longer
+    # multi-stop trips are routed in chunks that share their boundary stops
+    MAX_WAYPOINTS = 25
+
+    @staticmethod
+    def _cached_route(origin, destination, waypoints_list):
+        """Cached full route, ignoring geometry-less entries (legs cached under route keys by older versions)"""
+        route = DirectionsCache.get(origin, destination, waypoints_list)
+        if route is not None and not (route.get('overview_polyline') or {}).get('points'):
+            return None
+        return route
+
+    def _directions(self, origin, destination, waypoints_list):
+        route = self._cached_route(origin, destination, waypoints_list)
+        if route is not None:
+            return route
+
+        def fetch():
+            route = get_maps_client().directions(origin, destination, waypoints_list)
+            if route is not None:
+                DirectionsCache.set(origin, destination, waypoints_list, route)
+            return route
+
+        if not DirectionsCache.is_enabled():
+            return fetch()
+
+        # Identical concurrent requests make one provider call; the others
+        # wait for it and read its response from the cache
+        key = DirectionsCache.make_key(origin, destination, waypoints_list)
+        return SingleFlight.run(
+            f'directions:{key}',
+            fetch,
+            lambda: self._cached_route(origin, destination, waypoints_list),
+        )
+
+    def route(self, locations):
+        if not getattr(settings, 'GOOGLE_MAPS_API_KEY', ''):
+            return None
+
+        formatted = [format_location(loc) for loc in locations]
+        if not formatted or not formatted[0] or not formatted[-1]:
+            return None
+
+        origin, destination = formatted[0], formatted[-1]
+        stops = [origin] + [
+            stop for stop in formatted[1:-1]
+            if stop and stop != origin and stop != destination
+        ] + [destination]
+
+        legs = []
+        geometry = []
+        step = self.MAX_WAYPOINTS + 1
+        for i in range(0, len(stops) - 1, step):
+            chunk = stops[i:i + step + 1]
+            route = self._directions(chunk[0], chunk[-1], chunk[1:-1])
+            if route is None:
+                return None
+
+            try:
+                legs.extend(route.get('legs', []))
+                points = polyline.decode((route.get('overview_polyline') or {}).get('points', ''))
+            except (ValueError, TypeError, AttributeError, IndexError):
+                return None
+            # Chunks meet at a shared stop; drop the repeated point
+            geometry.extend(points[1:] if geometry and points else points)
+
+        try:
+            # Calculate total distance and duration
+            total_distance_meters = 0
+            total_duration_seconds = 0
+
+            for leg in legs:
+                if leg.get('distance', {}).get('value'):
+                    total_distance_meters += leg['distance']['value']
+                if leg.get('duration', {}).get('value'):
+                    total_duration_seconds += leg['duration']['value']
+
+            # Extract waypoints from route
+            waypoints = []
+            for leg in legs:
+                start_location = leg.get('start_location', {})
+                if start_location:
+                    waypoints.append({
+                        'latitude': start_location.get('lat'),
+                        'longitude': start_location.get('lng'),
+                        'address': leg.get('start_address', ''),
+                    })
+
+            # Add final destination
+            if legs:
+                end_location = legs[-1].get('end_location', {})
+                if end_location:
+                    waypoints.append({
+                        'latitude': end_location.get('lat'),
+                        'longitude': end_location.get('lng'),
+                        'address': legs[-1].get('end_address', ''),
+                    })
+        except (KeyError, ValueError, TypeError, AttributeError, IndexError):
+            return None
+
+        # Convert to miles and hours
+        return self._result(
+            total_distance_meters / 1609.34,
+            total_duration_seconds / 3600,
+            waypoints,
+            geometry or None,
+        )
+
+
+class RoadGraphProvider(RoutingProvider):
+    """
+    Offline shortest paths over the local road graph (ROUTING_GRAPH_PATH).
+
+    Each stop is snapped to its nearest graph node; stops further than
+    ROUTING_GRAPH_MAX_SNAP_MILES from the network, or legs with no path,
+    make the provider decline so the chain falls through.
+    """
+
+    name = 'road_graph'
+
+    def route(self, locations):
+        graph = get_road_graph()
+        points = _coordinates(locations)
+        if graph is None or len(points) < 2:
+            return None
+
+        max_snap = getattr(settings, 'ROUTING_GRAPH_MAX_SNAP_MILES', 5)
+        nodes = []
+        snap_miles = []
+        for lat, lng in points:
+            node, miles = graph.nearest_node(lat, lng, max_miles=max_snap)
+            if node is None:
+                return None
+            nodes.append(node)
+            snap_miles.append(miles)
+
+        distance_miles = 0.0
+        duration_hours = 0.0
+        geometry = [points[0]]
+        for i, (source, target) in enumerate(zip(nodes, nodes[1:])):
+            path = graph.shortest_path(source, target)
+            if path is None:
+                return None
+            distance_miles += path[0]
+            duration_hours += path[1]
+            geometry.extend((graph.lats[node], graph.lngs[node]) for node in path[2])
+            geometry.append(points[i + 1])
+
+        # Getting on and off the network, at local-road speed
+        # (every stop but the first and last is both entered and left)
+        access_miles = sum(snap_miles) + sum(snap_miles[1:-1])
+        distance_miles += access_miles
+        duration_hours += access_miles / 25
+
+        return self._result(distance_miles, duration_hours, geometry=geometry)
+
+
+class HaversineProvider(RoutingProvider):
+    """Straight-line distance between stops at an assumed 55 mph average"""
+
+    name = 'haversine'
+
+    def route(self, locations):
+        points = _coordinates(locations)
+        if len(points) < 2:
+            return None
+
+        distance_miles = path_length(points)
+        return self._result(distance_miles, distance_miles / AVERAGE_SPEED_MPH, geometry=points)
+
+
+PROVIDERS = {
+    GoogleDirectionsProvider.name: GoogleDirectionsProvider,
+    RoadGraphProvider.name: RoadGraphProvider,
+    HaversineProvider.name: HaversineProvider,
+}
+
+
+class RoutingService:
+    """
+    Routes a trip's stops through the configured provider chain
+    (ROUTING_PROVIDERS), returning the first provider's answer.
+    """
+
+    @staticmethod
+    def get_providers():
+        """Instantiate the providers named in ROUTING_PROVIDERS, in order"""
+        names = getattr(settings, 'ROUTING_PROVIDERS', ['google', 'road_graph', 'haversine'])
+        return [PROVIDERS[name]() for name in names if name in PROVIDERS]
+
+    @staticmethod
+    def route(locations, providers=None):
+        """
+        Route ordered stops with the first provider that can.
+
+        Args:
+            locations: list of location dicts (origin, stops..., destination)
+            providers: optional provider list (default: get_providers())
+
+        Returns:
+            dict with distance_miles, duration_hours, waypoints, provider; or None
+        """
+        for provider in providers if providers is not None else RoutingService.get_providers():
+            result = provider.route(locations)
+            if result is not None:
+                return result
+        return None
@@ -0,0 +1,106 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from ..models import ComputationLock
+
+
+class SingleFlight:
+    """
+    Cross-process single-flight coordination through the ComputationLock table.
+
+    The first caller for a key inserts its lock row and computes; callers
+    that find the row wait for it to go away and then try to reuse the
+    result the leader stored (e.g. the route it saved or the directions it
+    cached) before computing themselves. Lock rows expire, so a leader
+    that dies mid-computation only blocks its key for the lock TTL.
+
+    Locks must be taken outside a transaction: the row has to be committed
+    for other processes to see it.
+    """
+
+    # Polling backoff while waiting for a leader
+    POLL_START_SECONDS = 0.025
+    POLL_MAX_SECONDS = 0.5
+
+    @staticmethod
+    def _ttl():
+        return getattr(settings, 'SINGLE_FLIGHT_LOCK_TTL_SECONDS', 120)
+
+    @staticmethod
+    def acquire(key, ttl=None):
+        """
+        Try to take the lock for key.
+
+        Returns:
+            str: owner token to release with, or None if another caller holds it
+        """
+        token = uuid.uuid4().hex
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=ttl or SingleFlight._ttl())
+        try:
+            with transaction.atomic():
+                ComputationLock.objects.create(key=key, owner=token, expires_at=expires_at)
+            return token
+        except IntegrityError:
+            # Take over a lock whose holder died without releasing it
+            taken = ComputationLock.objects.filter(key=key, expires_at__lte=now).update(
+                owner=token, expires_at=expires_at
+            )
+            return token if taken else None
+
+    @staticmethod
+    def release(key, token):
+        ComputationLock.objects.filter(key=key, owner=token).delete()
+
+    @staticmethod
+    def wait(key, timeout=None):
+        """
+        Wait until nobody holds the lock for key (released or expired).
+
+        Returns:
+            bool: False if it was still held after timeout seconds
+        """
+        deadline = time.monotonic() + (timeout or SingleFlight._ttl())
+        delay = SingleFlight.POLL_START_SECONDS
+        while True:
+            if not ComputationLock.objects.filter(key=key, expires_at__gt=timezone.now()).exists():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, SingleFlight.POLL_MAX_SECONDS)
+
+    @staticmethod
+    def run(key, compute, reuse=None, ttl=None):
+        """
+        Compute a result once across concurrent callers.
+
+        Args:
+            key: identifies the computation (at most 191 characters)
+            compute: callable producing the result; run while holding the lock
+            reuse: optional callable returning the result a finished leader
+                stored, or None if it does not apply (the caller then computes)
+            ttl: lock lifetime in seconds (default SINGLE_FLIGHT_LOCK_TTL_SECONDS);
+                should exceed how long compute can take
+
+        Returns:
+            compute()'s result, or reuse()'s after waiting for another caller
+        """
+        while True:
+            token = SingleFlight.acquire(key, ttl)
+            if token is not None:
+                try:
+                    return compute()
+                finally:
+                    SingleFlight.release(key, token)
+
+            SingleFlight.wait(key, ttl)
+            if reuse is not None:
+                result = reuse()
+                if result is not None:
+                    return result
@@ -0,0 +1,84 @@
+from .geo import distance_matrix, has_coordinates
+
+
+def _point(location):
+    return float(location['latitude']), float(location['longitude'])
+
+
+class StopOrderOptimizer:
+    """
+    Orders a trip's intermediate stops to shorten the route, locally.
+
+    The straight-line distance matrix between the start, the stops and the
+    end is computed once (geo.distance_matrix); a nearest-neighbour tour is
+    then improved with 2-opt moves that only read that matrix, so no
+    routing requests are made per candidate order. Start and end stay fixed.
+    """
+
+    # Stop improving once a full 2-opt pass gains less than this many miles
+    MIN_GAIN_MILES = 1e-6
+
+    @staticmethod
+    def tour_length(matrix, order):
+        return sum(matrix[a][b] for a, b in zip(order, order[1:]))
+
+    @staticmethod
+    def nearest_neighbour(matrix, start, end, nodes):
+        """Greedy path from start through every node to end"""
+        order = [start]
+        remaining = set(nodes)
+        current = start
+        while remaining:
+            row = matrix[current]
+            current = min(remaining, key=row.__getitem__)
+            remaining.remove(current)
+            order.append(current)
+        order.append(end)
+        return order
+
+    @staticmethod
+    def two_opt(matrix, order):
+        """
+        Improve a path in place by reversing segments while that shortens it
+        (the first and last node stay put).
+        """
+        improved = True
+        while improved:
+            improved = False
+            for i in range(1, len(order) - 2):
+                a, b = order[i - 1], order[i]
+                for j in range(i + 1, len(order) - 1):
+                    c, d = order[j], order[j + 1]
+                    gain = matrix[a][b] + matrix[c][d] - matrix[a][c] - matrix[b][d]
+                    if gain > StopOrderOptimizer.MIN_GAIN_MILES:
+                        order[i:j + 1] = reversed(order[i:j + 1])
+                        b = order[i]
+                        improved = True
+        return order
+
+    @staticmethod
+    def optimize(start, stops, end):
+        """
+        Reorder intermediate stops between a fixed start and end.
+
+        Args:
+            start: location dict the route leaves from
+            stops: list of location dicts to visit in any order
+            end: location dict the route finishes at
+
+        Returns:
+            list: the stops in optimized order (unchanged if any location
+            lacks coordinates or there is nothing to reorder)
+        """
+        if len(stops) < 2 or not all(has_coordinates(loc) for loc in [start, *stops, end]):
+            return list(stops)
+
+        points = [_point(start)] + [_point(stop) for stop in stops] + [_point(end)]
+        # Plain lists: the 2-opt loop reads single cells, which is slow on an array
+        matrix = distance_matrix(points, use_numpy=False)
+
+        end_index = len(points) - 1
+        order = StopOrderOptimizer.nearest_neighbour(matrix, 0, end_index, range(1, end_index))
+        order = StopOrderOptimizer.two_opt(matrix, order)
+
+        return [stops[i - 1] for i in order[1:-1]]
@@ -1,16 +1,29 @@
 from datetime import time, timedelta
 from django.db import transaction
+from django.db.models import F
 from django.core.exceptions import ValidationError
 
-from ..models import Activity, ActivityStatus
+from ..models import Activity, ActivityStatus, DailyLog
+from ..instrumentation import traced
+from .recalculation import deferred_recalculation, mark_dirty
 
 
 class TimelineService:
     """
     Handles timeline cascade logic for activities.
     Ensures linear timeline with no gaps, handles insertion, updates, and deletions.
+    
+    Shifted activities are written with a single bulk_update, and daily log
+    totals / trip fields are recalculated once per mutation after commit
+    (see services.recalculation).
+    
+    Activities are ordered by sparse sequence numbers spaced SEQUENCE_GAP
+    apart, so inserts and deletes never renumber neighbours; a day is only
+    renumbered when an insert finds no free number between its neighbours.
     """
     
+    SEQUENCE_GAP = 1024
+    
     @staticmethod
     def _time_to_minutes(t: time) -> int:
         """Convert time to minutes since midnight"""
@@ -34,6 +47,33 @@ class TimelineService:
         
         return end_mins - start_mins
     
+    @staticmethod
+    def _sequence_between(lower, upper):
+        """
+        Pick a sequence number strictly between two neighbours.
+        
+        Args:
+            lower: previous activity's sequence, or None at the head
+            upper: next activity's sequence, or None at the tail
+            
+        Returns:
+            int, or None if there is no free number between them
+        """
+        if upper is None:
+            return (lower if lower is not None else 0) + TimelineService.SEQUENCE_GAP
+        
+        low = lower if lower is not None else -1
+        if upper - low <= 1:
+            return None
+        
+        return low + (upper - low) // 2
+    
+    @staticmethod
+    def _rebalance_sequences(activities):
+        """Respace activities (in timeline order) SEQUENCE_GAP apart, in memory"""
+        for i, act in enumerate(activities):
+            act.sequence = (i + 1) * TimelineService.SEQUENCE_GAP
+    
     @staticmethod
     def _validate_24_hour_coverage(daily_log):
         """Ensure all activities cover exactly 24 hours"""
@@ -48,6 +88,8 @@ class TimelineService:
     
     @staticmethod
     @transaction.atomic
+    @deferred_recalculation()
+    @traced('TimelineService')
     def insert_activity(daily_log, activity_data, position=None):
         """
         Insert activity and cascade following activities forward.
@@ -55,7 +97,7 @@ class TimelineService:
         Args:
             daily_log: DailyLog instance
             activity_data: dict with activity fields
-            position: optional sequence number to insert at (if None, appends at end)
+            position: optional index in the timeline to insert at (if None, appends at end)
         """
         start_time = activity_data.get('start_time')
         end_time = activity_data.get('end_time')
@@ -72,6 +114,16 @@ class TimelineService:
         if position is None:
             position = len(activities)
         
+        # Pick a sequence number between the neighbours, respacing the day if they are adjacent
+        lower = activities[position - 1].sequence if position > 0 else None
+        upper = activities[position].sequence if position < len(activities) else None
+        sequence = TimelineService._sequence_between(lower, upper)
+        
+        rebalanced = sequence is None
+        if rebalanced:
+            TimelineService._rebalance_sequences(activities)
+            sequence = activities[position].sequence - TimelineService.SEQUENCE_GAP // 2
+        
         # Check if inserting in the middle
         if position < len(activities):
             # Get the activity at this position
@@ -85,19 +137,21 @@ class TimelineService:
             shift_minutes = duration_minutes
             
             # Shift all following activities forward
-            for i in range(position, len(activities)):
-                act = activities[i]
+            shifted = activities[position:]
+            for act in shifted:
                 old_start = TimelineService._time_to_minutes(act.start_time)
                 new_start_minutes = (old_start + shift_minutes) % (24 * 60)
                 new_end_minutes = (TimelineService._time_to_minutes(act.end_time) + shift_minutes) % (24 * 60)
                 
                 act.start_time = TimelineService._minutes_to_time(new_start_minutes)
                 act.end_time = TimelineService._minutes_to_time(new_end_minutes)
-                act.sequence = i + 1
-                act.save()
+            
+            if rebalanced:
+                Activity.objects.bulk_update(activities, ['start_time', 'end_time', 'sequence'])
+            else:
+                Activity.objects.bulk_update(shifted, ['start_time', 'end_time'])
         
         # Create new activity
-        sequence = position
         new_activity = Activity.objects.create(
             daily_log=daily_log,
             status=activity_data.get('status'),
@@ -112,12 +166,14 @@ class TimelineService:
         )
         
         # Recalculate totals
-        TimelineService._recalculate_totals(daily_log)
+        mark_dirty(daily_log)
         
         return new_activity
     
     @staticmethod
     @transaction.atomic
+    @deferred_recalculation()
+    @traced('TimelineService')
     def update_activity(activity, new_data):
         """
         Update activity and cascade changes to adjacent activities.
@@ -155,8 +211,8 @@ class TimelineService:
                 # Shortened - pull following activities backward
                 shift_index = current_index + 1
             
-            for i in range(shift_index, len(activities)):
-                act = activities[i]
+            shifted = activities[shift_index:]
+            for act in shifted:
                 old_act_start = TimelineService._time_to_minutes(act.start_time)
                 new_act_start_minutes = (old_act_start + duration_diff) % (24 * 60)
                 old_act_end = TimelineService._time_to_minutes(act.end_time)
@@ -164,7 +220,8 @@ class TimelineService:
                 
                 act.start_time = TimelineService._minutes_to_time(new_act_start_minutes)
                 act.end_time = TimelineService._minutes_to_time(new_act_end_minutes)
-                act.save()
+            
+            Activity.objects.bulk_update(shifted, ['start_time', 'end_time'])
         
         # Update the activity
         for key, value in new_data.items():
@@ -175,12 +232,14 @@ class TimelineService:
         activity.save()
         
         # Recalculate totals
-        TimelineService._recalculate_totals(daily_log)
+        mark_dirty(daily_log)
         
         return activity
     
     @staticmethod
     @transaction.atomic
+    @deferred_recalculation()
+    @traced('TimelineService')
     def delete_activity(activity):
         """
         Delete activity and extend previous activity to fill gap.
@@ -205,7 +264,7 @@ class TimelineService:
             new_start_minutes = (old_start - deleted_duration) % (24 * 60)
             next_activity.start_time = TimelineService._minutes_to_time(new_start_minutes)
             next_activity.duration_minutes += deleted_duration
-            next_activity.save()
+            next_activity.save(update_fields=['start_time', 'duration_minutes'])
         else:
             # Deleting middle/last activity - extend previous one forward
             prev_activity = activities[current_index - 1]
@@ -213,11 +272,10 @@ class TimelineService:
             
             prev_activity.end_time = activity.end_time
             prev_activity.duration_minutes += deleted_duration
-            prev_activity.save()
             
             # Shift all following activities backward
-            for i in range(current_index + 1, len(activities)):
-                act = activities[i]
+            shifted = activities[current_index + 1:]
+            for act in shifted:
                 old_start = TimelineService._time_to_minutes(act.start_time)
                 old_end = TimelineService._time_to_minutes(act.end_time)
                 new_start_minutes = (old_start - deleted_duration) % (24 * 60)
@@ -225,14 +283,166 @@ class TimelineService:
                 
                 act.start_time = TimelineService._minutes_to_time(new_start_minutes)
                 act.end_time = TimelineService._minutes_to_time(new_end_minutes)
-                act.sequence = i - 1
-                act.save()
+            
+            Activity.objects.bulk_update(
+                [prev_activity] + shifted,
+                ['start_time', 'end_time', 'duration_minutes']
+            )
         
         # Delete the activity
         activity.delete()
         
         # Recalculate totals
-        TimelineService._recalculate_totals(daily_log)
+        mark_dirty(daily_log)
+    
+    @staticmethod
+    def _validate_timeline_entries(entries):
+        """
+        Check an ordered list of activity dicts forms one contiguous 24-hour day, in memory.
+        
+        Args:
+            entries: list of dicts with start_time and end_time
+        
+        Returns:
+            list of duration_minutes, one per entry
+        """
+        if not entries:
+            raise ValidationError('Daily log must have at least one activity')
+        
+        ids = [entry['id'] for entry in entries if entry.get('id')]
+        duplicates = sorted({pk for pk in ids if ids.count(pk) > 1})
+        if duplicates:
+            raise ValidationError(f'Activities {duplicates} are listed more than once')
+        
+        durations = []
+        for i, entry in enumerate(entries):
+            start, end = entry['start_time'], entry['end_time']
+            duration = TimelineService._calculate_duration(start, end)
+            if duration == 0 and len(entries) == 1:
+                duration = 24 * 60
+            if duration <= 0:
+                raise ValidationError(f'Activity {i}: end_time must be after start_time')
+            
+            if i > 0 and entries[i - 1]['end_time'] != start:
+                raise ValidationError(f'Activity {i} must start when activity {i - 1} ends')
+            
+            durations.append(duration)
+        
+        total_minutes = sum(durations)
+        if total_minutes != 24 * 60:
+            raise ValidationError(f'Activities must total exactly 24 hours (currently {total_minutes} minutes)')
+        
+        return durations
+    
+    @staticmethod
+    def _check_entry_ids(entries, existing_ids):
+        unknown = [e['id'] for e in entries if e.get('id') and e['id'] not in existing_ids]
+        if unknown:
+            raise ValidationError(f'Activities {unknown} do not belong to this daily log')
+    
+    @staticmethod
+    def validate_timeline(daily_log, entries):
+        """
+        Run replace_timeline's checks without writing or locking anything, so
+        callers can reject an invalid timeline before doing expensive work
+        for it (such as Directions requests in fill_missing_miles).
+        
+        Raises:
+            ValidationError: if replace_timeline would reject the entries
+        """
+        TimelineService._validate_timeline_entries(entries)
+        TimelineService._check_entry_ids(
+            entries, set(daily_log.activities.values_list('id', flat=True))
+        )
+    
+    @staticmethod
+    def fill_missing_miles(entries):
+        """
+        Fill in miles_driven for entries that have both locations but no
+        miles, with one batched DistanceCalculator.calculate_distances call.
+        
+        Args:
+            entries: list of activity dicts, updated in place
+        """
+        from .distance_calculator import DistanceCalculator
+        
+        missing = []
+        for entry in entries:
+            location = entry.get('location') or {}
+            end_location = entry.get('end_location') or {}
+            has_location = location.get('latitude') or location.get('address')
+            has_end_location = end_location.get('latitude') or end_location.get('address')
+            
+            if not entry.get('miles_driven') and has_location and has_end_location:
+                missing.append(entry)
+        
+        if not missing:
+            return
+        
+        distances = DistanceCalculator.calculate_distances(
+            [(entry['location'], entry['end_location']) for entry in missing]
+        )
+        for entry, distance in zip(missing, distances):
+            if distance is not None:
+                entry['miles_driven'] = distance
+    
+    @staticmethod
+    @transaction.atomic
+    @deferred_recalculation()
+    @traced('TimelineService')
+    def replace_timeline(daily_log, entries):
+        """
+        Replace a daily log's whole timeline in one transaction.
+        
+        Entries with an id update that activity, entries without one are
+        created, and existing activities not listed are deleted. Writes are
+        one bulk_update, one bulk_create and one delete; totals and trip
+        fields are recalculated once after commit.
+        
+        Args:
+            daily_log: DailyLog instance
+            entries: ordered list of activity dicts (optional 'id')
+        
+        Returns:
+            list of Activity instances in timeline order
+        """
+        durations = TimelineService._validate_timeline_entries(entries)
+        
+        existing = {a.pk: a for a in daily_log.activities.select_for_update()}
+        TimelineService._check_entry_ids(entries, existing)
+        
+        fields = ['status', 'start_time', 'end_time', 'location', 'end_location', 'remark', 'miles_driven']
+        
+        # Mark first so delete signals for this log skip loading it again
+        mark_dirty(daily_log)
+        
+        activities = []
+        to_update = []
+        to_create = []
+        for i, (entry, duration) in enumerate(zip(entries, durations)):
+            activity = existing.pop(entry['id']) if entry.get('id') else Activity(daily_log=daily_log)
+            
+            activity.status = entry.get('status')
+            activity.start_time = entry['start_time']
+            activity.end_time = entry['end_time']
+            activity.location = entry.get('location') or {}
+            activity.end_location = entry.get('end_location') or {}
+            activity.remark = entry.get('remark', '')
+            activity.miles_driven = entry.get('miles_driven')
+            activity.duration_minutes = duration
+            activity.sequence = (i + 1) * TimelineService.SEQUENCE_GAP
+            
+            (to_update if activity.pk else to_create).append(activity)
+            activities.append(activity)
+        
+        if existing:
+            Activity.objects.filter(pk__in=list(existing)).delete()
+        if to_update:
+            Activity.objects.bulk_update(to_update, fields + ['duration_minutes', 'sequence'])
+        if to_create:
+            Activity.objects.bulk_create(to_create)
+        
+        return activities
     
     @staticmethod
     def _recalculate_totals(daily_log):
@@ -263,14 +473,20 @@ class TimelineService:
             elif activity.status == ActivityStatus.ON_DUTY_NOT_DRIVING:
                 totals['on_duty_not_driving'] += hours
         
-        # Update daily log
-        daily_log.off_duty_hours = totals['off_duty']
-        daily_log.sleeper_berth_hours = totals['sleeper_berth']
-        daily_log.driving_hours = totals['driving']
-        daily_log.on_duty_not_driving_hours = totals['on_duty_not_driving']
-        daily_log.total_miles_driven = total_miles
-        daily_log.total_truck_mileage = total_miles
-        daily_log.save()
+        # Update daily log (queryset update so a log deleted mid-cascade is not re-inserted)
+        # and bump its version, which keys cached compliance results
+        fields = {
+            'off_duty_hours': totals['off_duty'],
+            'sleeper_berth_hours': totals['sleeper_berth'],
+            'driving_hours': totals['driving'],
+            'on_duty_not_driving_hours': totals['on_duty_not_driving'],
+            'total_miles_driven': total_miles,
+            'total_truck_mileage': total_miles,
+        }
+        DailyLog.objects.filter(pk=daily_log.pk).update(version=F('version') + 1, **fields)
+        for field, value in fields.items():
+            setattr(daily_log, field, value)
+        daily_log.version = DailyLog.objects.filter(pk=daily_log.pk).values_list('version', flat=True).first()
     
     @staticmethod
     def validate_timeline_completeness(daily_log):
@@ -0,0 +1,258 @@
+import atexit
+import multiprocessing
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+from django.conf import settings
+
+from ..instrumentation import traced
+from ..models import Route, Trip
+from .hos_validator import HOSValidator
+from .route_calculator import RouteCalculator
+from .route_geometry import RouteGeometry
+from .routing import RoutingService
+from .trip_simulator import TripSimulator
+
+
+def _state_after_off_duty(state, hours):
+    """
+    Driver HOS state after waiting off duty before departure.
+
+    A 34-hour wait restarts the cycle, 10 hours start a fresh shift, and
+    30 minutes count as the break; the 14-hour window keeps running otherwise.
+    """
+    state = dict(state)
+    if hours >= 34:
+        state['cycle_hours_used'] = 0.0
+    if hours >= 10:
+        state['shift_driving_hours'] = 0.0
+        state['shift_elapsed_hours'] = None
+    elif state['shift_elapsed_hours'] is not None:
+        state['shift_elapsed_hours'] += hours
+    if hours >= 0.5:
+        state['driving_since_break_hours'] = 0.0
+    return state
+
+
+def _peak_minutes(plan, key):
+    """A simulated peak in whole minutes (the simulator's float sums land just above exact limits)"""
+    return round(plan[key] * 60)
+
+
+def _rule_results(plan):
+    """HOSValidator results (violations, warnings) for the peaks a plan reaches"""
+    results = [
+        HOSValidator._11_hour_result(_peak_minutes(plan, 'max_shift_driving_hours')),
+        HOSValidator._14_hour_result(_peak_minutes(plan, 'max_window_hours')),
+        HOSValidator._70_hour_result(_peak_minutes(plan, 'max_cycle_hours')),
+    ]
+    if _peak_minutes(plan, 'max_driving_since_break_hours') > 8 * 60:
+        results.append(HOSValidator._30_minute_break_result())
+
+    violations = [r for r in results if r and r['violated']]
+    warnings = [r for r in results if r and not r['violated']]
+    return violations, warnings
+
+
+def evaluate_departures(route_params, state, as_of, departures, deliver_by=None):
+    """
+    Simulate one route for each departure time.
+
+    Module-level (and taking only plain values) so chunks of candidates can
+    be sent to worker processes.
+
+    Args:
+        route_params: dict with total_miles, speed_mph, waypoints
+        state: driver HOS state at as_of (cycle_hours_used, shift_driving_hours,
+            shift_elapsed_hours, driving_since_break_hours)
+        as_of: datetime the state describes
+        departures: list of departure datetimes (not before as_of)
+        deliver_by: optional datetime the dropoff must be finished by
+
+    Returns:
+        list of candidate summary dicts, one per departure
+    """
+    candidates = []
+    for departure in departures:
+        wait_hours = max((departure - as_of).total_seconds() / 3600, 0.0)
+        plan = TripSimulator.simulate(
+            route_params['total_miles'],
+            speed_mph=route_params['speed_mph'],
+            waypoints=route_params['waypoints'],
+            **_state_after_off_duty(state, wait_hours)
+        )
+        arrival = departure + timedelta(hours=plan['arrival_hours'])
+
+        violations, warnings = _rule_results(plan)
+        if deliver_by is not None and arrival > deliver_by:
+            violations.append({
+                'violated': True,
+                'message': f'Arrives {(arrival - deliver_by).total_seconds() / 3600:.1f}h after the delivery deadline',
+                'severity': 'error',
+                'rule': 'delivery_deadline',
+            })
+
+        candidates.append({
+            'departure': departure,
+            'arrival': arrival,
+            'trip_hours': plan['arrival_hours'],
+            'driving_hours': plan['driving_hours'],
+            'on_duty_hours': plan['on_duty_hours'],
+            'stop_count': len(plan['stops']),
+            'stops_by_type': dict(Counter(str(stop['type']) for stop in plan['stops'])),
+            'compliant': not violations,
+            'violations': violations,
+            'warnings': warnings,
+        })
+    return candidates
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_planning_executor():
+    """
+    Process pool for candidate evaluation (PLANNING_WORKERS processes), or
+    None when planning runs in the request process.
+
+    Workers are spawned rather than forked, so they never inherit the web
+    process's threads, locks or database connections, and the pool is shut
+    down when the process exits.
+    """
+    global _executor
+    workers = getattr(settings, 'PLANNING_WORKERS', 0)
+    if workers <= 1:
+        return None
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=django.setup,
+                )
+                atexit.register(shutdown_planning_executor)
+    return _executor
+
+
+def shutdown_planning_executor():
+    """Stop the planning process pool, if one was started"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+
+
+class TripPlanner:
+    """
+    What-if planning: simulates a trip for a grid of departure times
+    without writing anything.
+
+    The route is computed once through the routing provider chain (and its
+    directions cache) and shared by every candidate; each candidate is then
+    a TripSimulator run. Large grids are split across the planning process
+    pool when PLANNING_WORKERS is set.
+    """
+
+    MAX_CANDIDATES = 1000
+
+    @staticmethod
+    def candidate_departures(earliest, window_hours, interval_minutes):
+        """Departure times from earliest, every interval_minutes, for window_hours"""
+        count = int(window_hours * 60 // interval_minutes) + 1
+        step = timedelta(minutes=interval_minutes)
+        return [earliest + step * i for i in range(count)]
+
+    @staticmethod
+    def route_params(locations):
+        """
+        Route the trip once and reduce it to what the simulation needs.
+
+        Args:
+            locations: dict with current_location, pickup_location (optional),
+                stops (optional), dropoff_location
+
+        Returns:
+            tuple: (routing result dict, route params dict), or (None, None) if unroutable
+        """
+        trip = Trip(
+            current_location=locations.get('current_location') or {},
+            pickup_location=locations.get('pickup_location') or {},
+            stops=locations.get('stops') or [],
+            dropoff_location=locations.get('dropoff_location') or {},
+        )
+        result = RoutingService.route(RouteCalculator._route_locations(trip))
+        if result is None:
+            return None, None
+
+        route = Route(
+            trip=trip,
+            total_distance=result['distance_miles'],
+            estimated_time=result['duration_hours'],
+        )
+        geometry = None
+        if result['geometry']:
+            geometry = RouteGeometry(result['geometry']).scaled_to(route.total_distance)
+
+        return result, {
+            'total_miles': route.total_distance,
+            'speed_mph': RouteCalculator.average_speed(route),
+            'waypoints': RouteCalculator._stop_miles(trip, route, geometry),
+        }
+
+    @staticmethod
+    @traced('TripPlanner')
+    def plan(locations, state, as_of, departures, deliver_by=None):
+        """
+        Evaluate departure candidates for a trip.
+
+        Args:
+            locations: dict with current_location, pickup_location, stops, dropoff_location
+            state: driver HOS state at as_of (see evaluate_departures)
+            as_of: datetime the state describes
+            departures: candidate departure datetimes
+            deliver_by: optional delivery deadline
+
+        Returns:
+            dict with 'route' (distance_miles, duration_hours, provider, stops
+            in visiting order),
+            'candidates' and 'best' (index of the earliest compliant arrival,
+            or None); or None if the trip cannot be routed
+        """
+        result, params = TripPlanner.route_params(locations)
+        if result is None:
+            return None
+
+        executor = get_planning_executor()
+        min_parallel = getattr(settings, 'PLANNING_PARALLEL_MIN_CANDIDATES', 200)
+        if executor is None or len(departures) < min_parallel:
+            candidates = evaluate_departures(params, state, as_of, departures, deliver_by)
+        else:
+            workers = getattr(settings, 'PLANNING_WORKERS', 0)
+            size = -(-len(departures) // workers)
+            chunks = [departures[i:i + size] for i in range(0, len(departures), size)]
+            futures = [
+                executor.submit(evaluate_departures, params, state, as_of, chunk, deliver_by)
+                for chunk in chunks
+            ]
+            candidates = [candidate for future in futures for candidate in future.result()]
+
+        compliant = [i for i, c in enumerate(candidates) if c['compliant']]
+        best = min(compliant, key=lambda i: candidates[i]['arrival']) if compliant else None
+
+        return {
+            'route': {
+                'distance_miles': result['distance_miles'],
+                'duration_hours': result['duration_hours'],
+                'provider': result['provider'],
+                'stops': locations.get('stops') or [],
+            },
+            'candidates': candidates,
+            'best': best,
+        }
@@ -0,0 +1,257 @@
+from datetime import timedelta
+
+from ..models import RequiredStopType
+
+
+_EPSILON = 1e-9
+
+
+class TripSimulator:
+    """
+    Discrete-event HOS simulation of driving a route (property-carrying,
+    70-hour/8-day rules).
+
+    The simulator jumps from event to event instead of stepping through
+    time: from each position it computes how much driving is left under
+    the 11-hour, 14-hour window, 8-hour break and 70-hour cycle limits,
+    drives to the nearest of that limit, the next fuel stop, the next
+    pickup/drop or the destination, and applies the stop found there. A plan is a few
+    dozen iterations of plain arithmetic, so thousands of plans per second
+    can be evaluated (see `manage.py benchmark simulator`).
+
+    Stops interact: a 10-hour rest or 34-hour restart also counts as the
+    30-minute break, as does any on-duty stop of 30+ minutes (pickup,
+    dropoff), and fuel that would run out soon after a rest is taken
+    during that rest.
+    """
+
+    AVERAGE_SPEED_MPH = 55
+    MAX_DRIVING_HOURS = 11
+    DUTY_WINDOW_HOURS = 14
+    BREAK_AFTER_DRIVING_HOURS = 8
+    CYCLE_LIMIT_HOURS = 70
+    FUEL_INTERVAL_MILES = 1000
+    # Fuel during a rest or restart when the tank would run out within this many miles
+    FUEL_WITH_REST_MILES = 250
+
+    DURATION_HOURS = {
+        RequiredStopType.PICKUP: 1,
+        RequiredStopType.DROPOFF: 1,
+        RequiredStopType.FUEL: 0.25,
+        RequiredStopType.BREAK_30: 0.5,
+        RequiredStopType.REST_10HR: 10,
+        RequiredStopType.RESTART_34: 34,
+    }
+
+    REASONS = {
+        RequiredStopType.PICKUP: 'Pickup (1 hour on duty)',
+        RequiredStopType.DROPOFF: 'Dropoff (1 hour on duty)',
+        RequiredStopType.FUEL: 'Fueling required every 1,000 miles',
+        RequiredStopType.BREAK_30: '30-minute break required after 8 hours driving',
+        RequiredStopType.REST_10HR: '10-hour rest required by the 11-hour driving / 14-hour window limits',
+        RequiredStopType.RESTART_34: '34-hour restart required by the 70-hour/8-day limit',
+    }
+
+    # Off-duty stops; everything else is on duty (not driving)
+    OFF_DUTY_STOPS = (RequiredStopType.BREAK_30, RequiredStopType.REST_10HR, RequiredStopType.RESTART_34)
+
+    @staticmethod
+    def simulate(total_miles, speed_mph=None, cycle_hours_used=0.0, pickup_mile=None, snap=None,
+                 shift_driving_hours=0.0, shift_elapsed_hours=None, driving_since_break_hours=0.0,
+                 waypoints=None):
+        """
+        Simulate a trip from its start to the dropoff.
+
+        Args:
+            total_miles: route length
+            speed_mph: average driving speed (default AVERAGE_SPEED_MPH)
+            cycle_hours_used: on-duty hours already used in the 70-hour/8-day cycle
+            pickup_mile: route mile of the pickup, or None for no pickup stop
+                (shorthand for a PICKUP entry in waypoints)
+            snap: optional callable(stop_type, ideal_mile, earliest_mile) returning
+                (mile, location) to take a stop at or before its ideal mile
+                (e.g. at a real facility), or None to stop at the ideal mile
+            shift_driving_hours: hours already driven in the current shift
+            shift_elapsed_hours: hours since the current 14-hour window opened,
+                or None if the driver starts rested
+            driving_since_break_hours: driving since the last 30-minute break
+            waypoints: intermediate stops as (mile, stop_type, location or None),
+                e.g. (mile, PICKUP, ...) or (mile, DROPOFF, ...) for multi-drop loads
+
+        Returns:
+            dict with 'stops' (list of dicts: type, miles_from_start,
+            start_hours, duration_hours, reason and location when snapped),
+            'arrival_hours' (after the dropoff), 'driving_hours', 'on_duty_hours'
+            and the peaks reached while driving: 'max_shift_driving_hours',
+            'max_window_hours', 'max_driving_since_break_hours', 'max_cycle_hours'
+        """
+        T = RequiredStopType
+        S = TripSimulator
+        speed = speed_mph or S.AVERAGE_SPEED_MPH
+        max_driving = S.MAX_DRIVING_HOURS
+        window = S.DUTY_WINDOW_HOURS
+        break_after = S.BREAK_AFTER_DRIVING_HOURS
+        cycle_limit = S.CYCLE_LIMIT_HOURS
+        fuel_interval = S.FUEL_INTERVAL_MILES
+        durations = S.DURATION_HOURS
+        reasons = S.REASONS
+        off_duty = S.OFF_DUTY_STOPS
+
+        stops = []
+        now = 0.0
+        mile = 0.0
+        shift_driving = shift_driving_hours or 0.0
+        # Hour the current 14-hour window opened
+        shift_start = -shift_elapsed_hours if shift_elapsed_hours is not None else None
+        since_break = driving_since_break_hours or 0.0
+        cycle = cycle_hours_used or 0.0
+        max_shift_driving = max_window = max_since_break = max_cycle = 0.0
+        last_fuel = 0.0
+        total_driving = 0.0
+        total_on_duty = 0.0
+        waypoints = list(waypoints or ())
+        if pickup_mile is not None:
+            waypoints.insert(0, (pickup_mile, T.PICKUP, None))
+        waypoints = sorted(
+            ((min(max(m, 0.0), total_miles), stop_type, location) for m, stop_type, location in waypoints),
+            key=lambda waypoint: waypoint[0],
+        )
+        next_waypoint = 0
+        next_waypoint_mile = waypoints[0][0] if waypoints else None
+
+        def take(stop_type, location=None):
+            nonlocal now, shift_driving, shift_start, since_break, cycle, last_fuel, total_on_duty
+            hours = durations[stop_type]
+            reason = reasons[stop_type]
+
+            if stop_type in off_duty:
+                since_break = 0.0
+                if stop_type != T.BREAK_30:
+                    shift_driving = 0.0
+                    shift_start = None
+                    if stop_type == T.RESTART_34:
+                        cycle = 0.0
+                    if mile - last_fuel >= fuel_interval - S.FUEL_WITH_REST_MILES:
+                        last_fuel = mile
+                        reason += '; includes fueling'
+            else:
+                if shift_start is None:
+                    shift_start = now
+                cycle += hours
+                total_on_duty += hours
+                if hours >= 0.5:
+                    since_break = 0.0
+                if stop_type == T.FUEL:
+                    last_fuel = mile
+
+            stop = {
+                'type': stop_type,
+                'miles_from_start': mile,
+                'start_hours': now,
+                'duration_hours': hours,
+                'reason': reason,
+            }
+            if location:
+                stop['location'] = location
+            stops.append(stop)
+            now += hours
+
+        while True:
+            while next_waypoint_mile is not None and mile >= next_waypoint_mile - _EPSILON:
+                _, stop_type, location = waypoints[next_waypoint]
+                take(stop_type, location)
+                next_waypoint += 1
+                next_waypoint_mile = waypoints[next_waypoint][0] if next_waypoint < len(waypoints) else None
+            if mile >= total_miles - _EPSILON:
+                take(T.DROPOFF)
+                break
+
+            # Driving hours left before a limit forces a stop
+            drive_left = max_driving - shift_driving
+            window_left = window - (now - shift_start) if shift_start is not None else window
+            break_left = break_after - since_break
+            cycle_left = cycle_limit - cycle
+            hours = min(drive_left, window_left, break_left, cycle_left)
+
+            if hours <= _EPSILON:
+                # At a limit already (e.g. the cycle was used up before the trip)
+                if cycle_left <= _EPSILON:
+                    take(T.RESTART_34)
+                elif drive_left <= _EPSILON or window_left <= _EPSILON:
+                    take(T.REST_10HR)
+                else:
+                    take(T.BREAK_30)
+                continue
+
+            # Next event along the route
+            target = mile + hours * speed
+            stop_type = None
+            if target >= total_miles:
+                target = total_miles
+            elif cycle_left == hours:
+                stop_type = T.RESTART_34
+            elif hours == drive_left or hours == window_left:
+                stop_type = T.REST_10HR
+            else:
+                stop_type = T.BREAK_30
+
+            fuel_at = last_fuel + fuel_interval
+            if fuel_at < target:
+                target = fuel_at
+                stop_type = T.FUEL
+            if next_waypoint_mile is not None and next_waypoint_mile < target:
+                target = next_waypoint_mile
+                stop_type = None
+
+            location = None
+            if stop_type is not None and snap is not None:
+                snapped = snap(stop_type, target, mile)
+                if snapped is not None and mile < snapped[0] <= target:
+                    target, location = snapped
+
+            driven = (target - mile) / speed
+            if shift_start is None:
+                shift_start = now
+            now += driven
+            shift_driving += driven
+            since_break += driven
+            cycle += driven
+            total_driving += driven
+            total_on_duty += driven
+            mile = target
+            if shift_driving > max_shift_driving:
+                max_shift_driving = shift_driving
+            if now - shift_start > max_window:
+                max_window = now - shift_start
+            if since_break > max_since_break:
+                max_since_break = since_break
+            if cycle > max_cycle:
+                max_cycle = cycle
+
+            if stop_type is not None:
+                take(stop_type, location)
+
+        return {
+            'stops': stops,
+            'arrival_hours': now,
+            'driving_hours': total_driving,
+            'on_duty_hours': total_on_duty,
+            'max_shift_driving_hours': max_shift_driving,
+            'max_window_hours': max_window,
+            'max_driving_since_break_hours': max_since_break,
+            'max_cycle_hours': max_cycle,
+        }
+
+    @staticmethod
+    def schedule(plan, start_time):
+        """
+        Attach wall-clock times to a plan.
+
+        Returns:
+            tuple: (list of stop dicts with an 'eta', arrival datetime)
+        """
+        stops = [
+            {**stop, 'eta': start_time + timedelta(hours=stop['start_hours'])}
+            for stop in plan['stops']
+        ]
+        return stops, start_time + timedelta(hours=plan['arrival_hours'])
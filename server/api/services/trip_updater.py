@@ -1,5 +1,10 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db.models import Sum
-from ..models import Trip, Activity, ActivityStatus
+from django.utils import timezone
+from ..models import Trip, Activity, ActivityStatus, Route
+from .geo import haversine
 
 
 class TripUpdateService:
@@ -28,6 +33,8 @@ class TripUpdateService:
             location = end_location if (end_location.get('latitude') or end_location.get('address')) else latest_activity.location
             
             if location and (location.get('latitude') or location.get('address')):
+                if location == trip.current_location:
+                    return
                 trip.current_location = location
                 trip.save(update_fields=['current_location'])
     
@@ -65,6 +72,63 @@ class TripUpdateService:
         from .route_calculator import RouteCalculator
         RouteCalculator.calculate_route(trip)
     
+    @staticmethod
+    def _miles_between(a, b):
+        """
+        Straight-line miles between two location dicts.
+        
+        Returns:
+            float, 0.0 for identical addresses, or None if not comparable
+        """
+        if not a or not b:
+            return None
+        
+        if a.get('latitude') is not None and b.get('latitude') is not None:
+            return haversine(
+                a['latitude'], a['longitude'],
+                b['latitude'], b['longitude']
+            )
+        
+        if a.get('address') and a.get('address') == b.get('address'):
+            return 0.0
+        
+        return None
+    
+    @staticmethod
+    def request_route_recalculation(trip):
+        """
+        Queue a debounced route recalculation after current_location changed.
+        
+        Skipped if the trip has moved less than ROUTE_RECALC_MIN_DISTANCE_MILES
+        since the last calculation; otherwise scheduled no sooner than
+        ROUTE_RECALC_MIN_INTERVAL_SECONDS after it. Requests arriving while a
+        job is queued are coalesced into that job.
+        
+        Args:
+            trip: Trip instance
+            
+        Returns:
+            RouteJob instance, or None if skipped
+        """
+        from .route_jobs import RouteJobQueue
+        
+        if not trip.current_location or not trip.dropoff_location:
+            return None
+        
+        route = Route.objects.filter(trip=trip).only('origin_location', 'calculated_at').first()
+        run_after = timezone.now()
+        
+        if route and route.calculated_at:
+            min_distance = getattr(settings, 'ROUTE_RECALC_MIN_DISTANCE_MILES', 5)
+            moved = TripUpdateService._miles_between(route.origin_location, trip.current_location)
+            if moved is not None and moved < min_distance:
+                return None
+            
+            min_interval = getattr(settings, 'ROUTE_RECALC_MIN_INTERVAL_SECONDS', 300)
+            run_after = max(run_after, route.calculated_at + timedelta(seconds=min_interval))
+        
+        return RouteJobQueue.enqueue(trip, run_after=run_after)
+    
     @staticmethod
     def update_all_fields(trip):
         """
@@ -1,8 +1,9 @@
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-from .models import Activity, Trip
-from .services.timeline import TimelineService
+from .models import Activity, DailyLog, Trip
+from .services.recalculation import is_marked, mark_dirty, mark_rollup_dirty
 from .services.trip_updater import TripUpdateService
 
 
@@ -13,13 +14,10 @@ def update_daily_log_totals_on_save(sender, instance, created, **kwargs):
     Note: TimelineService already handles this, but this ensures it happens
     even if TimelineService is bypassed.
     Also updates trip fields that depend on activities.
+    Inside a deferred_recalculation() batch this only marks the log dirty.
     """
-    daily_log = instance.daily_log
-    TimelineService._recalculate_totals(daily_log)
-    
-    # Update trip fields based on activities
-    trip = daily_log.trip
-    TripUpdateService.update_all_fields(trip)
+    if not is_marked(instance.daily_log_id):
+        mark_dirty(instance.daily_log)
 
 
 @receiver(post_delete, sender=Activity)
@@ -29,26 +27,38 @@ def update_daily_log_totals_on_delete(sender, instance, **kwargs):
     Note: TimelineService.delete_activity already handles this, but this ensures
     it happens even if TimelineService is bypassed.
     Also updates trip fields that depend on activities.
+    Inside a deferred_recalculation() batch this only marks the log dirty.
     """
-    daily_log = instance.daily_log
-    TimelineService._recalculate_totals(daily_log)
-    
-    # Update trip fields based on activities
-    trip = daily_log.trip
-    TripUpdateService.update_all_fields(trip)
+    if not is_marked(instance.daily_log_id):
+        mark_dirty(instance.daily_log)
+
+
+@receiver(post_delete, sender=DailyLog)
+def update_duty_rollup_on_daily_log_delete(sender, instance, **kwargs):
+    """
+    Refresh the driver's duty rollup for the deleted log's date.
+    """
+    driver_id = Trip.objects.filter(pk=instance.trip_id).values_list('driver_id', flat=True).first()
+    if driver_id is not None:
+        mark_rollup_dirty(driver_id, instance.date)
 
 
 @receiver(post_save, sender=Trip)
 def update_trip_distance_on_location_change(sender, instance, created, **kwargs):
     """
     Recalculate trip distance when locations change.
+    Only saves with update_fields reach this (activity-driven current_location
+    updates); the recalculation is debounced and queued after commit so it never
+    runs inside the activity write transaction.
     """
     if not created:
         # Check if locations changed by looking at update_fields
         update_fields = kwargs.get('update_fields')
         if update_fields and any(
             field in update_fields
-            for field in ['current_location', 'pickup_location', 'dropoff_location']
+            for field in ['current_location', 'pickup_location', 'stops', 'dropoff_location']
         ):
-            TripUpdateService.recalculate_total_distance(instance)
+            transaction.on_commit(
+                lambda: TripUpdateService.request_route_recalculation(instance)
+            )
 
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from api.services.distance_calculator import DistanceCalculator
+from api.services.route_cache import DirectionsCache
+
+
+def _fake_route(origin, destination, waypoints):
+    points = [origin, *waypoints, destination]
+    return {'legs': [{'distance': {'value': 1609.34}} for _ in points[1:]]}
+
+
+@override_settings(GOOGLE_MAPS_API_KEY='test', ROUTE_CACHE_EVICT_EVERY=0)
+class CalculateDistancesTests(TestCase):
+    def setUp(self):
+        DirectionsCache.clear()
+        patcher = mock.patch.object(DistanceCalculator, '_request_route', side_effect=_fake_route)
+        self.request_route = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _location(name):
+        return {'address': name}
+
+    def test_chained_pairs_share_one_request(self):
+        a, b, c = self._location('A'), self._location('B'), self._location('C')
+
+        self.assertEqual(DistanceCalculator.calculate_distances([(a, b), (b, c)]), [1.0, 1.0])
+
+        self.request_route.assert_called_once_with('A', 'C', ['B'])
+
+    def test_disjoint_pairs_request_no_connecting_leg(self):
+        a, b, c, d = (self._location(name) for name in 'ABCD')
+
+        DistanceCalculator.calculate_distances([(a, b), (c, d)])
+
+        self.assertEqual(
+            [call.args for call in self.request_route.call_args_list],
+            [('A', 'B', []), ('C', 'D', [])],
+        )
+        self.assertIsNone(DirectionsCache.get('B', 'C', kind=DirectionsCache.KIND_LEG))
+
+    def test_cached_legs_cost_one_query(self):
+        a, b, c = self._location('A'), self._location('B'), self._location('C')
+        DistanceCalculator.calculate_distances([(a, b), (b, c)])
+        self.request_route.reset_mock()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(DistanceCalculator.calculate_distances([(a, b), (b, c)]), [1.0, 1.0])
+        self.request_route.assert_not_called()
+
+    def test_single_pair_uses_cached_leg(self):
+        a, b, c = self._location('A'), self._location('B'), self._location('C')
+        DistanceCalculator.calculate_distances([(a, b), (b, c)])
+        self.request_route.reset_mock()
+
+        self.assertEqual(DistanceCalculator.calculate_distance(b, c), 1.0)
+        self.request_route.assert_not_called()
@@ -0,0 +1,23 @@
+from django.test import SimpleTestCase
+
+from api.services.geo import format_location, has_coordinates
+
+
+class LocationHelperTests(SimpleTestCase):
+    def test_zero_coordinates_are_valid(self):
+        location = {'latitude': 0.0, 'longitude': -0.5}
+        self.assertTrue(has_coordinates(location))
+        self.assertEqual(format_location(location), '0.0,-0.5')
+
+    def test_missing_coordinates(self):
+        self.assertFalse(has_coordinates({}))
+        self.assertFalse(has_coordinates({'latitude': 35.0, 'longitude': None}))
+        self.assertFalse(has_coordinates({'latitude': '', 'longitude': -100.0}))
+        self.assertIsNone(format_location({'latitude': 35.0}))
+        self.assertIsNone(format_location(None))
+
+    def test_address_is_preferred(self):
+        self.assertEqual(
+            format_location({'address': 'Dallas, TX', 'latitude': 32.8, 'longitude': -96.8}),
+            'Dallas, TX',
+        )
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.models import RouteCacheEntry
+from api.services.route_cache import DirectionsCache
+
+
+ROUTE = {'legs': [{'distance': {'value': 1609}}], 'overview_polyline': {'points': '_p~iF~ps|U'}}
+
+
+@override_settings(ROUTE_CACHE_STATS_FLUSH_EVERY=1000, ROUTE_CACHE_EVICT_EVERY=0)
+class DirectionsCacheGetTests(TestCase):
+    def setUp(self):
+        DirectionsCache.clear()
+        DirectionsCache.set('Dallas, TX', 'Austin, TX', [], ROUTE)
+
+    def test_hit_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(DirectionsCache.get('Dallas, TX', 'Austin, TX'))
+        with self.assertNumQueries(1):
+            self.assertIsNone(DirectionsCache.get('Dallas, TX', 'Houston, TX'))
+
+    def test_stale_entry_is_touched(self):
+        old = timezone.now() - timedelta(days=1)
+        RouteCacheEntry.objects.update(last_accessed_at=old)
+
+        with self.assertNumQueries(2):
+            DirectionsCache.get('Dallas, TX', 'Austin, TX')
+
+        self.assertGreater(RouteCacheEntry.objects.get().last_accessed_at, old)
+
+    def test_stats_include_pending_counts(self):
+        DirectionsCache.get('Dallas, TX', 'Austin, TX')
+        DirectionsCache.get('Dallas, TX', 'Austin, TX')
+        DirectionsCache.get('Dallas, TX', 'Houston, TX')
+
+        stats = DirectionsCache.stats()
+
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+        self.assertEqual(RouteCacheEntry.objects.get().hit_count, 2)
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Driver, Trip, RouteJob, RouteJobStatus, RouteStatus
+from api.services.route_jobs import RouteJobQueue
+
+
+class RouteJobQueueEnqueueTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='queue-driver')
+        driver = Driver.objects.create(user=user)
+        self.trip = Trip.objects.create(driver=driver, name='Queue test')
+
+    def test_immediate_request_moves_up_debounced_job(self):
+        delayed = RouteJobQueue.enqueue(self.trip, run_after=timezone.now() + timedelta(minutes=5))
+        self.assertIsNone(RouteJobQueue.claim_next())
+
+        job = RouteJobQueue.enqueue(self.trip)
+
+        self.assertEqual(job.pk, delayed.pk)
+        self.assertEqual(RouteJob.objects.filter(trip=self.trip).count(), 1)
+        claimed = RouteJobQueue.claim_next()
+        self.assertIsNotNone(claimed)
+        self.assertEqual(claimed.pk, delayed.pk)
+        self.assertEqual(claimed.status, RouteJobStatus.RUNNING)
+
+    def test_later_request_keeps_earlier_run_after(self):
+        job = RouteJobQueue.enqueue(self.trip)
+        run_after = RouteJob.objects.get(pk=job.pk).run_after
+
+        RouteJobQueue.enqueue(self.trip, run_after=timezone.now() + timedelta(minutes=5))
+
+        self.assertEqual(RouteJob.objects.get(pk=job.pk).run_after, run_after)
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.route_status, RouteStatus.PENDING)
@@ -0,0 +1,53 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import Driver, Trip, DailyLog
+from api.services.distance_calculator import DistanceCalculator
+
+
+DALLAS = {'address': 'Dallas, TX'}
+AUSTIN = {'address': 'Austin, TX'}
+
+
+class ReplaceTimelineTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='timeline-driver')
+        driver = Driver.objects.create(user=user)
+        trip = Trip.objects.create(driver=driver, name='Timeline test')
+        self.daily_log = DailyLog.objects.create(trip=trip, date=date(2026, 1, 5))
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = f'/api/daily-logs/{self.daily_log.pk}/timeline/'
+
+    def _put(self, activities):
+        with mock.patch.object(
+            DistanceCalculator, 'calculate_distances', side_effect=lambda pairs: [120.0] * len(pairs)
+        ) as calculate_distances:
+            response = self.client.put(self.url, {'activities': activities}, format='json')
+        return response, calculate_distances
+
+    def test_invalid_timeline_makes_no_distance_requests(self):
+        response, calculate_distances = self._put([
+            {'status': 'driving', 'start_time': '00:00', 'end_time': '10:00',
+             'location': DALLAS, 'end_location': AUSTIN},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        calculate_distances.assert_not_called()
+
+    def test_valid_timeline_fills_in_miles(self):
+        response, calculate_distances = self._put([
+            {'status': 'driving', 'start_time': '00:00', 'end_time': '10:00',
+             'location': DALLAS, 'end_location': AUSTIN},
+            {'status': 'off_duty', 'start_time': '10:00', 'end_time': '00:00', 'location': AUSTIN},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        calculate_distances.assert_called_once()
+        self.assertEqual(
+            list(self.daily_log.activities.values_list('miles_driven', flat=True)), [120.0, None]
+        )
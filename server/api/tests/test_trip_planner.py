@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import SimpleTestCase, override_settings
+
+from api.services.trip_planner import TripPlanner, shutdown_planning_executor
+
+
+LOCATIONS = {
+    'current_location': {'latitude': 32.78, 'longitude': -96.80},
+    'pickup_location': {'latitude': 35.47, 'longitude': -97.52},
+    'dropoff_location': {'latitude': 39.74, 'longitude': -104.99},
+}
+STATE = {
+    'cycle_hours_used': 52.0,
+    'shift_driving_hours': 4.0,
+    'shift_elapsed_hours': 6.0,
+    'driving_since_break_hours': 4.0,
+}
+AS_OF = datetime(2026, 1, 5, 6, tzinfo=timezone.utc)
+
+
+@override_settings(ROUTING_PROVIDERS=['haversine'])
+class TripPlannerPoolTests(SimpleTestCase):
+    def test_process_pool_matches_serial_plan(self):
+        departures = TripPlanner.candidate_departures(AS_OF, 48, 30)
+        deliver_by = AS_OF + timedelta(hours=40)
+
+        with override_settings(PLANNING_WORKERS=0):
+            serial = TripPlanner.plan(LOCATIONS, STATE, AS_OF, departures, deliver_by)
+
+        self.addCleanup(shutdown_planning_executor)
+        with override_settings(PLANNING_WORKERS=2, PLANNING_PARALLEL_MIN_CANDIDATES=1):
+            pooled = TripPlanner.plan(LOCATIONS, STATE, AS_OF, departures, deliver_by)
+
+        self.assertEqual(len(pooled['candidates']), len(departures))
+        self.assertEqual(pooled, serial)
+        self.assertTrue(any(not c['compliant'] for c in serial['candidates']))
+        self.assertIsNotNone(serial['best'])
@@ -11,6 +11,7 @@ from ..serializers import (
 from ..response import success_response, error_response
 from ..services.timeline import TimelineService
 from ..services.hos_validator import HOSValidator
+from ..services.hos_engine import HOSComplianceEngine
 
 
 class ActivityViewSet(viewsets.ModelViewSet):
@@ -86,31 +87,40 @@ class ActivityViewSet(viewsets.ModelViewSet):
     
     def list(self, request, *args, **kwargs):
         """List activities with standardized response"""
-        response = super().list(request, *args, **kwargs)
+        daily_log_pk = self.kwargs.get('daily_log_pk')
+        if not daily_log_pk:
+            response = super().list(request, *args, **kwargs)
+            return success_response(
+                message='Activities retrieved successfully',
+                data=response.data
+            )
+        
+        # Load the day once and reuse it for both serialization and compliance
+        activities = list(self.filter_queryset(self.get_queryset()))
+        data = self.get_serializer(activities, many=True).data
         
         # Get compliance status
-        daily_log_pk = self.kwargs.get('daily_log_pk')
-        if daily_log_pk:
-            try:
-                daily_log = DailyLog.objects.get(pk=daily_log_pk)
-                compliance = HOSValidator.get_compliance_status(
-                    daily_log.trip,
-                    daily_log,
-                    daily_log.date
-                )
-                return success_response(
-                    message='Activities retrieved successfully',
-                    data={
-                        'activities': response.data,
-                        'hos_compliance': compliance
-                    }
-                )
-            except DailyLog.DoesNotExist:
-                pass
+        try:
+            daily_log = DailyLog.objects.select_related('trip').get(pk=daily_log_pk)
+            compliance = HOSComplianceEngine.get_compliance_status(
+                daily_log.trip,
+                daily_log,
+                daily_log.date,
+                activities=activities
+            )
+            return success_response(
+                message='Activities retrieved successfully',
+                data={
+                    'activities': data,
+                    'hos_compliance': compliance
+                }
+            )
+        except DailyLog.DoesNotExist:
+            pass
         
         return success_response(
             message='Activities retrieved successfully',
-            data=response.data
+            data=data
         )
     
     def retrieve(self, request, *args, **kwargs):
@@ -1,13 +1,21 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from drf_spectacular.utils import extend_schema
 
 from ..models import Trip, DailyLog
 from ..serializers import (
     DailyLogSerializer,
     DailyLogCreateSerializer,
     DailyLogUpdateSerializer,
+    DailyLogTimelineSerializer,
 )
-from ..response import success_response
+from ..response import success_response, error_response
+from ..services.hos_engine import HOSComplianceEngine
+from ..services.recalculation import deferred_recalculation
+from ..services.timeline import TimelineService
 
 
 class DailyLogViewSet(viewsets.ModelViewSet):
@@ -20,6 +28,9 @@ class DailyLogViewSet(viewsets.ModelViewSet):
     - GET /api/daily-logs/{id}/ - retrieve log detail
     - PUT/PATCH /api/daily-logs/{id}/ - update log metadata
     - DELETE /api/daily-logs/{id}/ - delete log
+    
+    Custom actions:
+    - PUT /api/daily-logs/{id}/timeline/ - replace the whole day's activities at once
     """
     permission_classes = [IsAuthenticated]
     
@@ -38,6 +49,8 @@ class DailyLogViewSet(viewsets.ModelViewSet):
             return DailyLogCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return DailyLogUpdateSerializer
+        elif self.action == 'timeline':
+            return DailyLogTimelineSerializer
         return DailyLogSerializer
     
     def perform_create(self, serializer):
@@ -56,6 +69,12 @@ class DailyLogViewSet(viewsets.ModelViewSet):
             carrier_name=driver.carrier_name
         )
     
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """Delete log; cascaded activity deletes update the trip once"""
+        with deferred_recalculation():
+            instance.delete()
+    
     def list(self, request, *args, **kwargs):
         """List daily logs with standardized response"""
         response = super().list(request, *args, **kwargs)
@@ -100,4 +119,51 @@ class DailyLogViewSet(viewsets.ModelViewSet):
             message='Daily log deleted successfully',
             status_code=status.HTTP_200_OK
         )
-
+    
+    @extend_schema(
+        methods=['put'],
+        description='Replace all activities of a daily log with an ordered 24-hour timeline',
+        request=DailyLogTimelineSerializer,
+    )
+    @action(detail=True, methods=['put'])
+    def timeline(self, request, pk=None):
+        """
+        Replace the day's activities in one request.
+        
+        Activities with an id are updated, ones without are created and
+        any not listed are deleted. Coverage is validated before anything
+        is written, and missing miles are looked up only for a valid
+        timeline; totals and HOS compliance are computed once.
+        """
+        daily_log = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        entries = serializer.validated_data['activities']
+        
+        try:
+            TimelineService.validate_timeline(daily_log, entries)
+            TimelineService.fill_missing_miles(entries)
+            activities = TimelineService.replace_timeline(daily_log, entries)
+        except ValidationError as e:
+            return error_response(
+                message='Failed to replace timeline',
+                error={'detail': e.messages},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Totals and version were recalculated on commit
+        daily_log.refresh_from_db()
+        compliance = HOSComplianceEngine.get_compliance_status(
+            daily_log.trip,
+            daily_log,
+            daily_log.date,
+            activities=activities
+        )
+        
+        return success_response(
+            message='Timeline replaced successfully',
+            data={
+                'daily_log': DailyLogSerializer(daily_log).data,
+                'hos_compliance': compliance
+            }
+        )
@@ -3,12 +3,27 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 
-from ..models import Trip, TripStatus
-from ..serializers import TripSerializer, TripDetailSerializer, TripCreateSerializer, TripUpdateSerializer, RouteSerializer
+from ..models import Trip, TripStatus, Route
+from ..serializers import (
+    DailyLogSerializer,
+    TripSerializer,
+    TripDetailSerializer,
+    TripCreateSerializer,
+    TripUpdateSerializer,
+    TripPlanSerializer,
+    RouteSerializer,
+    RouteJobSerializer,
+)
 from ..response import success_response, error_response
+from ..services.log_projection import LogProjectionService
 from ..services.route_calculator import RouteCalculator
+from ..services.route_jobs import RouteJobQueue
+from ..services.recalculation import deferred_recalculation
+from ..services.trip_planner import TripPlanner
 from ..services.trip_updater import TripUpdateService
-from ..services.hos_validator import HOSValidator
+from ..services.hos_engine import HOSComplianceEngine
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.utils import timezone
 
 
@@ -25,7 +40,11 @@ class TripViewSet(viewsets.ModelViewSet):
     
     Custom actions:
     - POST /api/trips/{id}/calculate-route/ - calculate route
+    - GET /api/trips/{id}/route/ - stored route with encoded polyline geometry and stops
+    - GET /api/trips/{id}/route-status/ - poll background route calculation
     - GET /api/trips/{id}/hos-status/ - get HOS compliance status
+    - POST /api/trips/plan/ - compare candidate departure times for a trip (nothing is saved)
+    - POST /api/trips/{id}/project-logs/ - generate projected daily logs from the route's stop schedule
     - POST /api/trips/{id}/start/ - start trip (change status to in_progress)
     - POST /api/trips/{id}/complete/ - complete trip (change status to completed)
     """
@@ -48,6 +67,12 @@ class TripViewSet(viewsets.ModelViewSet):
         """Auto-assign driver on creation"""
         serializer.save(driver=self.request.user.driver)
     
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """Delete trip without per-activity recalculation during the cascade"""
+        with deferred_recalculation():
+            instance.delete()
+    
     def list(self, request, *args, **kwargs):
         """List trips with standardized response"""
         response = super().list(request, *args, **kwargs)
@@ -72,12 +97,10 @@ class TripViewSet(viewsets.ModelViewSet):
         
         trip = serializer.instance
         
-        # Calculate route distance on creation if locations are provided
+        # Queue route calculation if locations are provided; the worker fills in
+        # distance, duration and stops and flips route_status to ready
         if trip.current_location and trip.dropoff_location:
-            try:
-                RouteCalculator.calculate_route(trip)
-            except Exception:
-                pass  # Don't fail trip creation if route calculation fails
+            RouteJobQueue.enqueue(trip)
         
         return success_response(
             message='Trip created successfully',
@@ -94,29 +117,17 @@ class TripViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(trip, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         
-        # Check if locations changed before saving
-        old_locations = {
-            'current_location': trip.current_location,
-            'pickup_location': trip.pickup_location,
-            'dropoff_location': trip.dropoff_location,
-        }
+        # Everything the route and its stop schedule depend on: locations,
+        # cycle hours and start time
+        old_fingerprint = RouteCalculator.input_fingerprint(trip)
         
         serializer.save()
         trip.refresh_from_db()
         
-        # Check if locations actually changed
-        locations_changed = any(
-            old_locations.get(field) != getattr(trip, field)
-            for field in ['current_location', 'pickup_location', 'dropoff_location']
-        )
-        
-        # Recalculate distance if locations changed
-        if locations_changed and trip.current_location and trip.dropoff_location:
-            try:
-                RouteCalculator.calculate_route(trip)
-                trip.refresh_from_db()
-            except Exception:
-                pass  # Don't fail update if route calculation fails
+        # Queue route recalculation if any of those inputs changed
+        route_inputs_changed = RouteCalculator.input_fingerprint(trip) != old_fingerprint
+        if route_inputs_changed and trip.current_location and trip.dropoff_location:
+            RouteJobQueue.enqueue(trip)
         
         return success_response(
             message='Trip updated successfully',
@@ -156,6 +167,48 @@ class TripViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @extend_schema(
+        methods=['get'],
+        description='Get the stored route, including its geometry as an encoded polyline',
+        responses={200: OpenApiResponse(response=RouteSerializer, description='Route')}
+    )
+    @action(detail=True, methods=['get'], url_path='route')
+    def route(self, request, pk=None):
+        """Get the trip's calculated route"""
+        trip = self.get_object()
+        route = Route.objects.filter(trip=trip).prefetch_related('stops').first()
+        
+        if route is None:
+            return error_response(
+                message='Route has not been calculated yet',
+                error={'route_status': trip.route_status},
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        
+        return success_response(
+            message='Route retrieved successfully',
+            data=RouteSerializer(route).data
+        )
+    
+    @extend_schema(
+        methods=['get'],
+        description='Get progress of the latest background route calculation',
+        responses={200: OpenApiResponse(response=RouteJobSerializer, description='Route job status')}
+    )
+    @action(detail=True, methods=['get'], url_path='route-status')
+    def route_status(self, request, pk=None):
+        """Poll background route calculation"""
+        trip = self.get_object()
+        job = RouteJobQueue.latest_for_trip(trip)
+        
+        return success_response(
+            message='Route status retrieved successfully',
+            data={
+                'route_status': trip.route_status,
+                'job': RouteJobSerializer(job).data if job else None,
+            }
+        )
+    
     @extend_schema(
         methods=['get'],
         description='Get HOS compliance status for trip',
@@ -178,23 +231,90 @@ class TripViewSet(viewsets.ModelViewSet):
         # Get previous day's log
         previous_log = trip.daily_logs.filter(date__lt=latest_log.date).order_by('-date').first()
         
-        compliance = HOSValidator.get_compliance_status(trip, latest_log, current_date)
-        
-        # Also check 10-hour rest
-        rest_check = HOSValidator.validate_10_hour_rest(latest_log, previous_log)
-        if rest_check:
-            if rest_check['violated']:
-                compliance['violations'].append(rest_check)
-            else:
-                compliance['warnings'].append(rest_check)
-        
-        compliance['compliant'] = len(compliance['violations']) == 0
+        # Also check 10-hour rest against the previous day
+        compliance = HOSComplianceEngine.get_compliance_status(
+            trip,
+            latest_log,
+            current_date,
+            check_rest=True,
+            previous_daily_log=previous_log
+        )
         
         return success_response(
             message='HOS status retrieved successfully',
             data=compliance
         )
     
+    @extend_schema(
+        methods=['post'],
+        description=(
+            'Generate the projected daily logs and activities for a planned trip from its '
+            'route stop schedule. Pass {"replace": true} to overwrite existing logs.'
+        ),
+        responses={201: OpenApiResponse(response=DailyLogSerializer(many=True), description='Projected logs')}
+    )
+    @action(detail=True, methods=['post'], url_path='project-logs')
+    def project_logs(self, request, pk=None):
+        """Generate the trip's logbook days from its calculated route"""
+        trip = self.get_object()
+        replace = str(request.data.get('replace', '')).lower() in ('true', '1', 'yes')
+        
+        try:
+            logs = LogProjectionService.project_logs(trip, replace=replace)
+        except ValidationError as e:
+            conflict = getattr(e, 'code', None) == 'logs_exist'
+            return error_response(
+                message='Failed to project daily logs',
+                error={'detail': e.messages},
+                status_code=status.HTTP_409_CONFLICT if conflict else status.HTTP_400_BAD_REQUEST
+            )
+        
+        logs = trip.daily_logs.filter(pk__in=[log.pk for log in logs]).order_by('date').prefetch_related('activities')
+        
+        return success_response(
+            message='Daily logs projected successfully',
+            data=DailyLogSerializer(logs, many=True).data,
+            status_code=status.HTTP_201_CREATED
+        )
+    
+    @extend_schema(
+        methods=['post'],
+        description=(
+            'Simulate a trip for a grid of departure times and return the arrival, stops and '
+            'HOS violations of each. Nothing is saved.'
+        ),
+        request=TripPlanSerializer,
+    )
+    @action(detail=False, methods=['post'])
+    def plan(self, request):
+        """What-if planning over candidate departure times"""
+        serializer = TripPlanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        as_of = timezone.now()
+        earliest = max(data.get('earliest_departure') or as_of, as_of)
+        departures = TripPlanner.candidate_departures(earliest, data['window_hours'], data['interval_minutes'])
+        state = {
+            'cycle_hours_used': data['current_cycle_hours'],
+            'shift_driving_hours': data['shift_driving_hours'],
+            'shift_elapsed_hours': data['shift_elapsed_hours'],
+            'driving_since_break_hours': data['driving_since_break_hours'],
+        }
+        
+        result = TripPlanner.plan(data, state, as_of, departures, data['deliver_by'])
+        if result is None:
+            return error_response(
+                message='Trip could not be routed',
+                error={'detail': 'No routing provider could route these locations'},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return success_response(
+            message='Trip plan evaluated successfully',
+            data=result
+        )
+    
     @extend_schema(
         methods=['post'],
         description='Start trip (change status to in_progress)',
@@ -211,11 +331,20 @@ class TripViewSet(viewsets.ModelViewSet):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
+        old_fingerprint = RouteCalculator.input_fingerprint(trip)
+        
         trip.status = TripStatus.IN_PROGRESS
         if not trip.start_datetime:
             trip.start_datetime = timezone.now()
         trip.save()
         
+        # Stop ETAs are scheduled from start_datetime
+        if (
+            RouteCalculator.input_fingerprint(trip) != old_fingerprint
+            and trip.current_location and trip.dropoff_location
+        ):
+            RouteJobQueue.enqueue(trip)
+        
         return success_response(
             message='Trip started successfully',
             data=TripSerializer(trip).data
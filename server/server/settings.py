@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.ServerTimingMiddleware',  # removes itself unless SERVER_TIMING_ENABLED
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -179,3 +180,87 @@ SIMPLE_JWT = {
 
 # Google Maps API
 GOOGLE_MAPS_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY', '')
+
+# Maps HTTP client: pooled connections, jittered retries and a circuit breaker.
+# MAPS_API_BASE_URL can point at a local stub server for testing.
+MAPS_API_BASE_URL = os.environ.get('MAPS_API_BASE_URL', 'https://maps.googleapis.com')
+MAPS_HTTP_POOL_SIZE = int(os.environ.get('MAPS_HTTP_POOL_SIZE', '10'))
+MAPS_HTTP_CONNECT_TIMEOUT = float(os.environ.get('MAPS_HTTP_CONNECT_TIMEOUT', '3'))
+MAPS_HTTP_READ_TIMEOUT = float(os.environ.get('MAPS_HTTP_READ_TIMEOUT', '10'))
+MAPS_HTTP_MAX_RETRIES = int(os.environ.get('MAPS_HTTP_MAX_RETRIES', '2'))
+MAPS_HTTP_BACKOFF_SECONDS = float(os.environ.get('MAPS_HTTP_BACKOFF_SECONDS', '0.5'))
+MAPS_CIRCUIT_WINDOW = int(os.environ.get('MAPS_CIRCUIT_WINDOW', '20'))
+MAPS_CIRCUIT_MIN_CALLS = int(os.environ.get('MAPS_CIRCUIT_MIN_CALLS', '5'))
+MAPS_CIRCUIT_FAILURE_RATE = float(os.environ.get('MAPS_CIRCUIT_FAILURE_RATE', '0.5'))
+MAPS_CIRCUIT_RESET_SECONDS = float(os.environ.get('MAPS_CIRCUIT_RESET_SECONDS', '30'))
+# Token-bucket limit on provider requests per process (0: unlimited)
+MAPS_RATE_LIMIT_PER_SECOND = float(os.environ.get('MAPS_RATE_LIMIT_PER_SECOND', '0'))
+MAPS_RATE_LIMIT_BURST = int(os.environ.get('MAPS_RATE_LIMIT_BURST', '0'))
+
+# Routing provider chain, tried in order until one answers: google (Directions API),
+# road_graph (offline graph built with `manage.py build_road_graph`) and haversine
+ROUTING_PROVIDERS = [
+    name.strip() for name in os.environ.get('ROUTING_PROVIDERS', 'google,road_graph,haversine').split(',')
+    if name.strip()
+]
+ROUTING_GRAPH_PATH = os.environ.get('ROUTING_GRAPH_PATH', '')
+ROUTING_GRAPH_MAX_SNAP_MILES = float(os.environ.get('ROUTING_GRAPH_MAX_SNAP_MILES', '5'))
+
+# Truck stop / rest area dataset (see `manage.py import_pois`). Required stops move to
+# the facility within POI_CORRIDOR_MILES of the route and up to POI_SNAP_MILES before
+# their ideal mileage.
+POI_DATASET_PATH = os.environ.get('POI_DATASET_PATH', '')
+POI_SNAP_MILES = float(os.environ.get('POI_SNAP_MILES', '25'))
+POI_CORRIDOR_MILES = float(os.environ.get('POI_CORRIDOR_MILES', '3'))
+
+# What-if trip planning (POST /api/trips/plan/): candidate departures are simulated in
+# PLANNING_WORKERS worker processes when a request has at least
+# PLANNING_PARALLEL_MIN_CANDIDATES of them (0 or 1 worker: always in the request process).
+# Off by default: sending results between processes costs about as much as simulating them.
+PLANNING_WORKERS = int(os.environ.get('PLANNING_WORKERS', '0'))
+PLANNING_PARALLEL_MIN_CANDIDATES = int(os.environ.get('PLANNING_PARALLEL_MIN_CANDIDATES', '200'))
+
+# Directions/distance response cache
+ROUTE_CACHE_ENABLED = os.environ.get('ROUTE_CACHE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+ROUTE_CACHE_TTL_SECONDS = int(os.environ.get('ROUTE_CACHE_TTL_SECONDS', str(7 * 24 * 60 * 60)))
+ROUTE_CACHE_MAX_ENTRIES = int(os.environ.get('ROUTE_CACHE_MAX_ENTRIES', '10000'))
+# Expire/trim on about one write in N (0: only via `manage.py route_cache evict`)
+ROUTE_CACHE_EVICT_EVERY = int(os.environ.get('ROUTE_CACHE_EVICT_EVERY', '100'))
+# Refresh an entry's last_accessed_at on a hit only once it is this old
+ROUTE_CACHE_TOUCH_AFTER_SECONDS = int(os.environ.get('ROUTE_CACHE_TOUCH_AFTER_SECONDS', '3600'))
+# Write hit/miss counts kept in memory every this many lookups
+ROUTE_CACHE_STATS_FLUSH_EVERY = int(os.environ.get('ROUTE_CACHE_STATS_FLUSH_EVERY', '100'))
+
+# Background route calculation (see `manage.py run_route_worker`)
+ROUTE_JOB_MAX_ATTEMPTS = int(os.environ.get('ROUTE_JOB_MAX_ATTEMPTS', '3'))
+ROUTE_JOB_RETRY_DELAY_SECONDS = int(os.environ.get('ROUTE_JOB_RETRY_DELAY_SECONDS', '30'))
+ROUTE_JOB_STALE_AFTER_SECONDS = int(os.environ.get('ROUTE_JOB_STALE_AFTER_SECONDS', '300'))
+
+# Route recalculation triggered by activity-driven current_location changes is
+# debounced per trip: at most once per interval, and only after moving this far
+ROUTE_RECALC_MIN_INTERVAL_SECONDS = int(os.environ.get('ROUTE_RECALC_MIN_INTERVAL_SECONDS', '300'))
+ROUTE_RECALC_MIN_DISTANCE_MILES = float(os.environ.get('ROUTE_RECALC_MIN_DISTANCE_MILES', '5'))
+
+# Concurrent calculations of the same trip route / Directions request run once; the
+# lock row expires after this long if its holder dies (keep above the slowest calculation)
+SINGLE_FLIGHT_LOCK_TTL_SECONDS = int(os.environ.get('SINGLE_FLIGHT_LOCK_TTL_SECONDS', '120'))
+
+# Cached HOS compliance results (keyed by daily log version, so never stale)
+HOS_COMPLIANCE_CACHE_TIMEOUT = int(os.environ.get('HOS_COMPLIANCE_CACHE_TIMEOUT', str(24 * 60 * 60)))
+
+# Per-request instrumentation (api.middleware.ServerTimingMiddleware): SQL, maps HTTP and
+# service span timings in a Server-Timing header and a JSON line on the 'api.timing'
+# logger, for requests taking at least SERVER_TIMING_LOG_MIN_MS
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'False').lower() in ('true', '1', 'yes')
+SERVER_TIMING_LOG_MIN_MS = float(os.environ.get('SERVER_TIMING_LOG_MIN_MS', '0'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.timing': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
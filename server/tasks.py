@@ -25,6 +25,11 @@ def makemigrations():
     return run_command("python manage.py makemigrations")
 
 
+def worker():
+    """Start background route worker"""
+    return run_command("python manage.py run_route_worker")
+
+
 def shell():
     """Start Django shell"""
     return run_command("python manage.py shell")
@@ -44,6 +49,7 @@ TASKS = {
     "dev": dev,
     "migrate": migrate,
     "makemigrations": makemigrations,
+    "worker": worker,
     "shell": shell,
     "test": test,
     "superuser": superuser,